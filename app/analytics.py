@@ -0,0 +1,205 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+BIAS_SCORES = {
+    "left": -1.0,
+    "center": 0.0,
+    "right": 1.0
+}
+CATEGORY_COLUMNS = ("bias", "emotion", "framing", "source")
+DEFAULT_ROLLING_WINDOW = "7D"
+DEFAULT_SNAPSHOT_PATH = "analytics_snapshot.pkl"
+# Rewrite the snapshot only once this many rows have been added since the last one
+SNAPSHOT_MIN_ROWS = 1000
+
+
+def _normalize_label(label):
+    return label.strip().lower()
+
+
+def _normalize_emotions(label):
+    return ", ".join(e.strip() for e in label.lower().split(",") if e.strip())
+
+
+_NORMALIZERS = {
+    "bias": _normalize_label,
+    "emotion": _normalize_emotions,
+    "framing": _normalize_label,
+    "source": str.strip
+}
+
+
+def _categorical(values, normalize=_normalize_label):
+    """Build a categorical with cleaned-up labels.
+
+    ``normalize`` runs once per distinct label and the result is mapped back
+    through the codes, so cost does not depend on how often a label repeats.
+    """
+    raw = pd.Categorical(values)
+    labels = pd.Index([normalize(str(c)) for c in raw.categories], dtype=object)
+    categories = pd.Index(labels.unique())
+    lookup = np.append(categories.get_indexer(labels), -1)  # raw code -1 (missing) stays missing
+    return pd.Categorical.from_codes(lookup[raw.codes], categories=categories)
+
+
+def _parse_dates(values):
+    """Parse ISO-8601 strings, converting each distinct string once."""
+    raw = pd.Categorical(values)
+    parsed = pd.to_datetime(pd.Series(raw.categories, dtype=object), utc=True, errors="coerce", format="ISO8601")
+    lookup = np.append(parsed.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT"))
+    return pd.DatetimeIndex(lookup[raw.codes]).tz_localize("UTC")
+
+
+def tone_score(emotion, weights):
+    """Mean slider weight over the comma-separated emotions in ``emotion``."""
+    labels = [e.strip().lower() for e in str(emotion).split(",") if e.strip()]
+    if not labels:
+        return float("nan")
+    return float(np.mean([weights.get(e, 1.0) for e in labels]))
+
+
+def _score_by_category(column, scores):
+    """Look up one score per category and broadcast it through the codes."""
+    per_category = np.append(np.asarray(scores, dtype=np.float64), np.nan)
+    return pd.Series(per_category[column.cat.codes.to_numpy()], index=column.index)
+
+
+def bias_scores(frame):
+    """-1/0/1 for left/center/right, NaN for anything else."""
+    categories = frame["bias"].cat.categories
+    return _score_by_category(frame["bias"], [BIAS_SCORES.get(c, np.nan) for c in categories])
+
+
+def weighted_tone(frame, weights):
+    """Weighted tone per analysis using the sidebar emotion weights."""
+    categories = frame["emotion"].cat.categories
+    return _score_by_category(frame["emotion"], [tone_score(c, weights) for c in categories])
+
+
+class HistoryFrame:
+    """Columnar, categorically-encoded view of the analysis history.
+
+    Only the indexed columns of the SQLite history are loaded; ``refresh``
+    pulls rows appended since the last load, so keeping the frame current
+    costs time proportional to the new rows, not to the whole history. With a
+    ``snapshot_path`` the frame is pickled to disk so a fresh process only
+    reads the rows saved after the snapshot.
+    """
+
+    def __init__(self, store, snapshot_path=None):
+        self.store = store
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self.last_id = 0
+        self.frame = self._build([])
+        self._snapshot_id = 0
+        if snapshot_path and os.path.exists(snapshot_path):
+            try:
+                with open(snapshot_path, "rb") as f:
+                    last_id, frame = pickle.load(f)
+                if last_id <= store.max_id():
+                    self.last_id, self.frame, self._snapshot_id = last_id, frame, last_id
+            except Exception:
+                pass  # corrupt or from an incompatible version; reload from SQLite
+
+    @staticmethod
+    def _build(rows):
+        raw = pd.DataFrame.from_records(
+            rows, columns=["id", "created", "published", *CATEGORY_COLUMNS], coerce_float=True
+        )
+        frame = pd.DataFrame({
+            "id": raw["id"].to_numpy(dtype=np.int64),
+            "created": pd.to_datetime(raw["created"].to_numpy(dtype=np.float64), unit="s", utc=True),
+            "published": _parse_dates(raw["published"])
+        })
+        for name in CATEGORY_COLUMNS:
+            frame[name] = _categorical(raw[name], _NORMALIZERS[name])
+        # Prefer the publication date; fall back to when the article was analyzed
+        frame["date"] = frame["published"].fillna(frame["created"])
+        frame["bias_score"] = bias_scores(frame)
+        return frame
+
+    def refresh(self):
+        """Append history rows saved since the last refresh; returns how many."""
+        with self._lock:
+            rows = self.store.columns_since(self.last_id)
+            if not rows:
+                return 0
+            new = self._build(rows)
+            if self.frame.empty:
+                self.frame = new
+            else:
+                plain = [c for c in self.frame.columns if c not in CATEGORY_COLUMNS]
+                combined = pd.concat([self.frame[plain], new[plain]], ignore_index=True)
+                for name in CATEGORY_COLUMNS:
+                    # Re-codes both sides onto the merged categories without touching the labels
+                    merged = union_categoricals([self.frame[name], new[name]], ignore_order=True)
+                    # Keep object categories; pandas may infer a string dtype for the union
+                    combined[name] = pd.Categorical.from_codes(
+                        merged.codes, categories=pd.Index(merged.categories, dtype=object)
+                    )
+                self.frame = combined[self.frame.columns]
+            self.last_id = int(rows[-1][0])
+            if self.snapshot_path and self.last_id - self._snapshot_id >= SNAPSHOT_MIN_ROWS:
+                self._save_snapshot()
+            return len(rows)
+
+    def _save_snapshot(self):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((self.last_id, self.frame), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.snapshot_path)
+        self._snapshot_id = self.last_id
+
+
+def daily_aggregates(frame, weights=None, window=DEFAULT_ROLLING_WINDOW):
+    """Per-day analysis counts, mean bias and a rolling mean bias.
+
+    The rolling mean is weighted by the number of analyses per day. With
+    ``weights`` a mean weighted-tone column is added as well.
+    """
+    scored = pd.DataFrame({
+        "day": frame["date"].dt.floor("D"),
+        "bias_score": frame["bias_score"]
+    })
+    if weights is not None:
+        scored["tone"] = weighted_tone(frame, weights)
+    grouped = scored.groupby("day", sort=True)
+    daily = pd.DataFrame({
+        "analyses": grouped.size(),
+        "scored": grouped["bias_score"].count(),
+        "bias_sum": grouped["bias_score"].sum()
+    })
+    daily["mean_bias"] = daily["bias_sum"] / daily["scored"].replace(0, np.nan)
+    rolling = daily[["bias_sum", "scored"]].rolling(window).sum()
+    daily["rolling_bias"] = rolling["bias_sum"] / rolling["scored"].replace(0, np.nan)
+    if weights is not None:
+        daily["mean_tone"] = grouped["tone"].mean()
+    return daily.drop(columns="bias_sum")
+
+
+def source_aggregates(frame, weights=None):
+    """Per-source analysis counts, mean bias and left/center/right shares."""
+    scored = pd.DataFrame({
+        "source": frame["source"],
+        "bias": frame["bias"],
+        "bias_score": frame["bias_score"]
+    })
+    if weights is not None:
+        scored["tone"] = weighted_tone(frame, weights)
+    grouped = scored.groupby("source", observed=True)
+    summary = pd.DataFrame({
+        "analyses": grouped.size(),
+        "mean_bias": grouped["bias_score"].mean()
+    })
+    shares = pd.crosstab(scored["source"], scored["bias"], normalize="index")
+    for label in BIAS_SCORES:
+        summary[f"{label}_share"] = shares[label] if label in shares else 0.0
+    if weights is not None:
+        summary["mean_tone"] = grouped["tone"].mean()
+    return summary.sort_values("analyses", ascending=False)
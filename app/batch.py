@@ -0,0 +1,242 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import metrics, stage
+from prompts import batch_prompt_ids, get_bias_prompt, get_batch_bias_prompt, registry
+from ratelimit import estimate_tokens
+from utils import StreamingAnalysisParser, parse_llm_response, parse_batch_response
+
+DEFAULT_MAX_WORKERS = 4
+# Article tokens packed into one batched prompt, and the most articles per prompt
+DEFAULT_MAX_BATCH_TOKENS = 2000
+DEFAULT_MAX_BATCH_SIZE = 20
+
+
+def response_usage(response):
+    """Token counts reported by Gemini; cached and fake responses report none.
+
+    The counts are also added to the token metrics, so call this once per response.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0
+    }
+    if counts["prompt_tokens"]:
+        metrics.inc("narrativelens_llm_tokens_total", counts["prompt_tokens"], kind="prompt")
+    if counts["output_tokens"]:
+        metrics.inc("narrativelens_llm_tokens_total", counts["output_tokens"], kind="output")
+    return counts
+
+
+def _count_request(prompt, outcome):
+    metrics.inc("narrativelens_llm_requests_total", prompt=prompt, outcome=outcome)
+
+
+def _parsed(parsed, prompt):
+    if "error" in parsed:
+        metrics.inc("narrativelens_parse_failures_total", prompt=prompt)
+    return parsed
+
+
+def cacheable_response(prompt, text):
+    """CachedModel validator: analysis replies are stored only once they parse.
+
+    A batch reply must cover every article in its prompt. Other prompts,
+    such as reframes, are free text and always cacheable.
+    """
+    if registry.get("bias_prompt").matches(prompt):
+        return "error" not in parse_llm_response(text)
+    if registry.get("batch_bias_prompt").matches(prompt):
+        parsed = parse_batch_response(text, batch_prompt_ids(prompt))
+        return not any("error" in item for item in parsed.values())
+    return True
+
+
+def analyze_article(model, article):
+    """Run a single article through the bias prompt and parser."""
+    try:
+        with stage("prompt"):
+            prompt = get_bias_prompt(article)
+        with stage("generate"):
+            response = model.generate_content(prompt)
+            raw_result = response.text
+    except Exception as e:
+        _count_request("single", "error")
+        return {
+            "raw": None,
+            "parsed": {"error": "Request failed", "details": str(e)},
+            "exception": e,
+            "usage": response_usage(None)
+        }
+
+    _count_request("single", "ok")
+    with stage("parse"):
+        parsed = _parsed(parse_llm_response(raw_result), "single")
+    return {
+        "raw": raw_result,
+        "parsed": parsed,
+        "exception": None,
+        "usage": response_usage(response)
+    }
+
+
+def analyze_article_stream(model, article, on_fields=None):
+    """Analyze one article with ``stream=True``.
+
+    ``on_fields(fields)`` is called with the fields parsed so far whenever a
+    chunk completes a new one. Returns the same result dict as
+    analyze_article.
+    """
+    parser = StreamingAnalysisParser()
+    parts = []
+    chunk = None  # Gemini reports usage on the final chunk
+    try:
+        with stage("prompt"):
+            prompt = get_bias_prompt(article)
+        # Includes incremental parsing and the caller's rendering of early fields
+        with stage("generate_stream"):
+            for chunk in model.generate_content(prompt, stream=True):
+                parts.append(chunk.text)
+                if parser.feed(chunk.text) and on_fields is not None:
+                    on_fields(parser.fields)
+    except Exception as e:
+        _count_request("stream", "error")
+        return {
+            "raw": None,
+            "parsed": {"error": "Request failed", "details": str(e)},
+            "exception": e,
+            "usage": response_usage(None)
+        }
+
+    _count_request("stream", "ok")
+    with stage("parse"):
+        parsed = _parsed(parser.result(), "stream")
+    return {
+        "raw": "".join(parts),
+        "parsed": parsed,
+        "exception": None,
+        "usage": response_usage(chunk)
+    }
+
+
+def _bounded_map(fn, items, max_workers):
+    """Yield (key, fn(arg)) for (key, arg) items as each call completes.
+
+    At most ``max_workers`` calls are in flight at any time, so ``items`` can
+    be any iterable, including a lazy generator over a large corpus.
+    """
+    max_workers = max(1, int(max_workers))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        for key, arg in items:
+            pending[executor.submit(fn, arg)] = key
+            if len(pending) >= max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        # Closing the generator early (e.g. st.stop()) drops queued work
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_analyses(articles, model, max_workers=DEFAULT_MAX_WORKERS):
+    """Yield (index, result) pairs as soon as each article finishes."""
+    return _bounded_map(lambda art: analyze_article(model, art), enumerate(articles), max_workers)
+
+
+def pack_articles(articles, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """Greedily group (index, text) pairs into batches under a token budget.
+
+    Short items share a prompt; an article that alone exceeds the budget gets
+    a batch of its own and is sent through the single-article prompt.
+    """
+    group, group_tokens = [], 0
+    for idx, art in enumerate(articles):
+        tokens = estimate_tokens(art)
+        if group and (group_tokens + tokens > max_batch_tokens or len(group) >= max_batch_size):
+            yield group
+            group, group_tokens = [], 0
+        group.append((idx, art))
+        group_tokens += tokens
+    if group:
+        yield group
+
+
+def analyze_packed(model, group):
+    """Analyze several articles with one request; return [(index, result)].
+
+    Articles the batch response does not cover are retried one at a time.
+    If the request itself fails (including a daily quota error), every
+    article gets that request failure instead; retrying them singly would
+    only repeat it. The request's token usage is attributed to the first
+    article.
+    """
+    if len(group) == 1:
+        idx, art = group[0]
+        return [(idx, analyze_article(model, art))]
+
+    try:
+        with stage("prompt"):
+            prompt = get_batch_bias_prompt(group)
+        with stage("generate_batch"):
+            response = model.generate_content(prompt)
+            text = response.text
+    except Exception as e:
+        _count_request("batch", "error")
+        return [(idx, {
+            "raw": None,
+            "parsed": {"error": "Request failed", "details": str(e)},
+            "exception": e,
+            "usage": response_usage(None)
+        }) for idx, _ in group]
+
+    _count_request("batch", "ok")
+    with stage("parse"):
+        parsed = parse_batch_response(text, [idx for idx, _ in group])
+    usage = response_usage(response)
+
+    results = []
+    for idx, art in group:
+        item = parsed[str(idx)]
+        if "error" in item:
+            metrics.inc("narrativelens_parse_failures_total", prompt="batch")
+            results.append((idx, analyze_article(model, art)))
+            continue
+        results.append((idx, {
+            "raw": json.dumps(item, indent=2),
+            "parsed": item,
+            "exception": None,
+            "usage": usage
+        }))
+        usage = response_usage(None)
+    return results
+
+
+def iter_packed_analyses(articles, model, max_workers=DEFAULT_MAX_WORKERS,
+                         max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """Like iter_analyses, but packs short articles into shared prompts."""
+    groups = pack_articles(articles, max_batch_tokens, max_batch_size)
+    for _, results in _bounded_map(lambda g: analyze_packed(model, g), enumerate(groups), max_workers):
+        yield from results
+
+
+def analyze_batch(articles, model, max_workers=DEFAULT_MAX_WORKERS, on_result=None):
+    """Analyze articles concurrently and return results in input order.
+
+    ``on_result(index, result)`` is called from the calling thread as each
+    article completes, which keeps it safe to use for Streamlit rendering.
+    """
+    articles = list(articles)
+    results = [None] * len(articles)
+    for idx, result in iter_analyses(articles, model, max_workers=max_workers):
+        results[idx] = result
+        if on_result is not None:
+            on_result(idx, result)
+    return results
@@ -0,0 +1,149 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from metrics import metrics
+
+DEFAULT_CACHE_PATH = "llm_cache.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially reformatted copies share a cache entry."""
+    return " ".join(text.split())
+
+
+def make_cache_key(model_name, prompt):
+    """Hash the model name and the normalized prompt.
+
+    Prompts are built by substituting the article into a template, so the key
+    covers the article text, the template wording and the model together.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with TTL and LRU eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.max_entries is None:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+class CachedResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class CachedModel:
+    """Wrap a model client so repeated prompts are served from ``cache``.
+
+    When ``validate(prompt, text)`` is given, a fresh response is stored only
+    if it returns true, so an unparseable reply is not replayed for the
+    whole TTL.
+    """
+
+    def __init__(self, model, cache, model_name, validate=None):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name
+        self.validate = validate
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        key = make_cache_key(self.model_name, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.inc("narrativelens_cache_requests_total", result="hit")
+            response = CachedResponse(cached)
+            return [response] if stream else response
+
+        metrics.inc("narrativelens_cache_requests_total", result="miss")
+        if stream:
+            return self._stream_and_store(key, prompt, self.model.generate_content(prompt, stream=True, **kwargs))
+        response = self.model.generate_content(prompt, **kwargs)
+        self._store(key, prompt, response.text)
+        return response
+
+    def _store(self, key, prompt, text):
+        if self.validate is None or self.validate(prompt, text):
+            self.cache.set(key, text)
+        else:
+            metrics.inc("narrativelens_cache_rejected_total")
+
+    def _stream_and_store(self, key, prompt, chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk.text)
+            yield chunk
+        # Only complete streams are cached
+        self._store(key, prompt, "".join(parts))
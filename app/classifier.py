@@ -0,0 +1,278 @@
+"""Local bias/emotion/framing classifier trained on past LLM analyses.
+
+Usage:
+    python app/classifier.py                 # retrain from the history and print the report
+    python app/classifier.py --report-only   # print the report of the saved model
+
+Each label gets a logistic-regression head on the MiniLM embeddings that
+related coverage already stores in the vector index, with the labels taken
+from the matching history records. Only articles every head is confident
+about are labelled locally; everything else still goes to Gemini through the
+regular bias prompt.
+"""
+import argparse
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from clustering import embed_articles
+from metrics import metrics, stage
+
+DEFAULT_CLASSIFIER_PATH = "local_classifier.pkl"
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+TARGETS = ("bias", "emotion", "framing")
+# Labels seen fewer times than this are pooled into OTHER_LABEL, which is never accepted
+MIN_CLASS_EXAMPLES = 20
+MIN_TRAINING_ROWS = 200
+OTHER_LABEL = "__other__"
+REPORT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99)
+LOCAL_OMISSIONS = "Not assessed (labelled by the local classifier)"
+
+
+def normalize_label(target, value):
+    value = str(value or "").strip().lower()
+    if target == "emotion":
+        return ", ".join(sorted({e.strip() for e in value.split(",") if e.strip()}))
+    return value
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class LocalClassifier:
+    """Softmax heads stored as plain arrays, so predicting needs only numpy.
+
+    ``heads`` maps each target to (classes, weights, intercepts). ``report``
+    is the held-out agreement with the LLM measured when it was trained.
+    """
+
+    def __init__(self, heads, report=None, trained_rows=0):
+        self.heads = heads
+        self.report = report or []
+        self.trained_rows = trained_rows
+        self.version = time.strftime("%Y%m%d-%H%M%S")
+
+    def predict(self, vectors):
+        """Return (labels, confidence) per row; confidence is the weakest head's top probability."""
+        x = _normalize(vectors)
+        labels = [{} for _ in range(len(x))]
+        confidence = np.ones(len(x), dtype=np.float32)
+        for target, (classes, weights, intercepts) in self.heads.items():
+            logits = x @ weights.T + intercepts
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            best = probs.argmax(axis=1)
+            top = probs[np.arange(len(x)), best]
+            top[classes[best] == OTHER_LABEL] = 0.0
+            confidence = np.minimum(confidence, top)
+            for row, label in zip(labels, classes[best]):
+                row[target] = str(label)
+        return list(zip(labels, confidence.tolist()))
+
+    def analyze(self, articles, threshold=DEFAULT_CONFIDENCE_THRESHOLD):
+        """Label the articles the classifier is confident about.
+
+        Returns {index: result} shaped like batch.analyze_article's results,
+        for only those articles; the rest need an LLM call.
+        """
+        candidates = [i for i, text in enumerate(articles) if text and len(text.strip()) > 5]
+        if not candidates:
+            return {}
+        vectors = embed_articles([articles[i] for i in candidates])
+        with stage("local_classifier"):
+            predictions = self.predict(vectors)
+        results = {}
+        for i, (labels, confidence) in zip(candidates, predictions):
+            if confidence < threshold:
+                continue
+            parsed = dict(
+                labels,
+                omissions=LOCAL_OMISSIONS,
+                source="Unknown",
+                classifier=self.version,
+                confidence=round(confidence, 3)
+            )
+            results[i] = {
+                "raw": json.dumps(parsed, indent=2),
+                "parsed": parsed,
+                "exception": None,
+                "usage": {"prompt_tokens": 0, "output_tokens": 0}
+            }
+        metrics.inc("narrativelens_local_labels_total", len(results))
+        return results
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+_loaded = {}  # path -> (mtime, classifier)
+_load_lock = threading.Lock()
+
+
+def current_classifier(path=DEFAULT_CLASSIFIER_PATH):
+    """The saved classifier at ``path``, reloaded after offline retraining; None if untrained."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    entry = _loaded.get(path)
+    if entry is None or entry[0] != mtime:
+        with _load_lock:
+            entry = _loaded.get(path)
+            if entry is None or entry[0] != mtime:
+                entry = _loaded[path] = (mtime, LocalClassifier.load(path))
+    return entry[1]
+
+
+def training_data(history_store, vector_index):
+    """Embeddings and LLM labels for every indexed analysis.
+
+    Results the classifier produced itself are skipped so it never learns
+    from its own output.
+    """
+    ids, vectors = vector_index.items()
+    records = history_store.get_many(ids.tolist())
+    keep, labels = [], []
+    for row, record_id in enumerate(ids.tolist()):
+        record = records.get(record_id)
+        if not record or "error" in record or "classifier" in record:
+            continue
+        if not all(record.get(target) for target in TARGETS):
+            continue
+        keep.append(row)
+        labels.append({target: normalize_label(target, record[target]) for target in TARGETS})
+    return vectors[keep], labels
+
+
+def _fit_head(x, y):
+    from sklearn.linear_model import LogisticRegression
+
+    classes, counts = np.unique(y, return_counts=True)
+    rare = set(classes[counts < MIN_CLASS_EXAMPLES])
+    y = np.array([OTHER_LABEL if label in rare else label for label in y], dtype=object)
+    classes = np.unique(y)
+    if len(classes) == 1:
+        # Nothing to separate: a constant head that always predicts the one label
+        return classes, np.zeros((1, x.shape[1]), dtype=np.float32), np.zeros(1, dtype=np.float32)
+    model = LogisticRegression(max_iter=1000).fit(x, y)
+    weights, intercepts = model.coef_, model.intercept_
+    if len(model.classes_) == 2:
+        # Binary heads have one logit; split it into two so predict() can always use a softmax
+        weights = np.vstack([-weights / 2, weights / 2])
+        intercepts = np.concatenate([-intercepts / 2, intercepts / 2])
+    return model.classes_, weights.astype(np.float32), intercepts.astype(np.float32)
+
+
+def _fit(x, labels):
+    return LocalClassifier(
+        {target: _fit_head(x, [row[target] for row in labels]) for target in TARGETS},
+        trained_rows=len(labels)
+    )
+
+
+def agreement_report(classifier, x, labels, thresholds=REPORT_THRESHOLDS):
+    """Per threshold: share of articles labelled locally (LLM calls saved) and agreement on those."""
+    predictions = classifier.predict(x)
+    report = []
+    for threshold in thresholds:
+        accepted = [(pred, truth) for (pred, conf), truth in zip(predictions, labels) if conf >= threshold]
+        report.append({
+            "threshold": threshold,
+            "calls_saved": len(accepted) / max(len(labels), 1),
+            "agreement": (
+                sum(all(pred[t] == truth[t] for t in TARGETS) for pred, truth in accepted) / len(accepted)
+                if accepted else None
+            ),
+            **{
+                f"{target}_agreement": (
+                    sum(pred[target] == truth[target] for pred, truth in accepted) / len(accepted)
+                    if accepted else None
+                )
+                for target in TARGETS
+            }
+        })
+    return report
+
+
+def train(history_store, vector_index, holdout=0.2, seed=0):
+    """Fit a classifier on the history, reporting agreement on a held-out split.
+
+    The report comes from a model trained without the held-out rows; the
+    returned classifier is then refit on everything.
+    """
+    x, labels = training_data(history_store, vector_index)
+    if len(labels) < MIN_TRAINING_ROWS:
+        return {
+            "error": "Not enough training data",
+            "details": f"{len(labels)} indexed LLM analyses; at least {MIN_TRAINING_ROWS} are needed"
+        }
+    order = np.random.default_rng(seed).permutation(len(labels))
+    cut = int(len(labels) * (1 - holdout))
+    train_rows, test_rows = order[:cut], order[cut:]
+    evaluation = _fit(x[train_rows], [labels[i] for i in train_rows])
+    report = agreement_report(evaluation, x[test_rows], [labels[i] for i in test_rows])
+
+    classifier = _fit(x, labels)
+    classifier.report = report
+    return classifier
+
+
+def format_report(report):
+    lines = [f"{'threshold':>9}  {'calls saved':>11}  {'agreement':>9}  " + "  ".join(f"{t:>8}" for t in TARGETS)]
+    for row in report:
+        cells = [row["agreement"]] + [row[f"{t}_agreement"] for t in TARGETS]
+        shown = ["-" if v is None else f"{v:.1%}" for v in cells]
+        lines.append(
+            f"{row['threshold']:>9.2f}  {row['calls_saved']:>11.1%}  {shown[0]:>9}  "
+            + "  ".join(f"{v:>8}" for v in shown[1:])
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from history import DEFAULT_HISTORY_PATH, HistoryStore
+    from vector_index import DEFAULT_INDEX_DIR, VectorIndex
+
+    parser = argparse.ArgumentParser(description="Retrain the local classifier from the analysis history.")
+    parser.add_argument("--history", default=os.getenv("NARRATIVELENS_HISTORY_PATH", DEFAULT_HISTORY_PATH))
+    parser.add_argument("--index", default=os.getenv("NARRATIVELENS_VECTOR_INDEX_PATH", DEFAULT_INDEX_DIR))
+    parser.add_argument("-o", "--output", default=os.getenv("NARRATIVELENS_CLASSIFIER_PATH", DEFAULT_CLASSIFIER_PATH))
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of rows held out for the report")
+    parser.add_argument("--report-only", action="store_true", help="print the saved model's report and exit")
+    args = parser.parse_args(argv)
+
+    if args.report_only:
+        classifier = current_classifier(args.output)
+        if classifier is None:
+            parser.exit(1, f"No classifier at {args.output}\n")
+        print(f"Trained on {classifier.trained_rows} analyses (version {classifier.version})")
+        print(format_report(classifier.report))
+        return
+
+    start = time.perf_counter()
+    classifier = train(HistoryStore(args.history, legacy_json=None), VectorIndex(args.index), holdout=args.holdout)
+    if isinstance(classifier, dict):
+        parser.exit(1, f"{classifier['error']}: {classifier['details']}\n")
+    classifier.save(args.output)
+    print(f"Trained on {classifier.trained_rows} analyses in {time.perf_counter() - start:.1f}s -> {args.output}")
+    print(format_report(classifier.report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Headless batch analysis of article corpora.
+
+Usage:
+    python app/cli.py corpus.jsonl -o results.jsonl --workers 8
+    python app/cli.py --query "climate change" --query elections --pages 5
+
+The corpus may be JSONL, CSV or a JSON array of article objects in the shape
+of data/articles_sample.json (title / summary / link / published). Results
+are appended to the output JSONL as they finish, so an interrupted run can
+be resumed with the same command: articles that already have a result are
+skipped. Failed articles go to ``<output>.errors.jsonl`` and are retried on
+the next run.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from batch import DEFAULT_MAX_WORKERS, iter_analyses
+from dedup import NearDuplicateIndex
+from metrics import metrics
+
+TEXT_FIELDS = ("summary", "description", "text", "content", "body", "title")
+
+
+def article_id(record, text):
+    for field in ("id", "link", "url"):
+        if record.get(field):
+            return str(record[field])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_record(record):
+    text = next((record[f] for f in TEXT_FIELDS if record.get(f)), "")
+    return {
+        "id": article_id(record, text),
+        "title": record.get("title"),
+        "link": record.get("link") or record.get("url"),
+        "published": record.get("published") or record.get("publishedAt"),
+        "text": text.strip()
+    }
+
+
+def read_corpus(path):
+    """Yield normalized article records one at a time."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                yield normalize_record(record)
+    elif path.endswith(".json"):
+        # A JSON array has to be parsed whole; prefer JSONL for large corpora
+        with open(path, encoding="utf-8") as f:
+            for record in json.load(f):
+                yield normalize_record(record)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield normalize_record(json.loads(line))
+
+
+def load_done_ids(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    # A line cut short by an interrupted run; re-analyze it
+                    continue
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def run(corpus, output, model, workers=DEFAULT_MAX_WORKERS, limit=None, dedupe=False, log=None):
+    """Analyze ``corpus`` (a file path or an iterable of normalized records).
+
+    With ``dedupe``, near-duplicates of an article already sent to the model
+    reuse its result instead of costing another call. ``log(message)``
+    receives progress updates; the command line passes ``print``.
+    """
+    records = read_corpus(corpus) if isinstance(corpus, str) else corpus
+    done = load_done_ids(output)
+    in_flight = {}
+    waiting = {}   # representative id -> duplicate records awaiting its result
+    finished = {}  # representative id -> parsed result, or the error dict if it failed
+    index = NearDuplicateIndex() if dedupe else None
+    stats = {"analyzed": 0, "skipped": 0, "failed": 0, "deduplicated": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+    start = time.perf_counter()
+    with open(output, "a", encoding="utf-8") as out, \
+            open(output + ".errors.jsonl", "a", encoding="utf-8") as errors:
+        if out.tell() and not _ends_with_newline(output):
+            out.write("\n")  # terminate a line cut short by an interrupted run
+
+        def write(record, parsed, raw=None):
+            row = {k: record[k] for k in ("id", "title", "link", "published")}
+            row.update(parsed)
+            if "error" in parsed:
+                stats["failed"] += 1
+                row["raw"] = raw
+                errors.write(json.dumps(row) + "\n")
+                errors.flush()
+                return
+            stats["analyzed"] += 1
+            out.write(json.dumps(row) + "\n")
+            # Each line is a checkpoint: flush so a crash loses at most in-flight work
+            out.flush()
+            if stats["analyzed"] % 100 == 0:
+                os.fsync(out.fileno())
+                if log is not None:
+                    log(f"{stats['analyzed']} analyzed, {stats['failed']} failed")
+
+        def write_duplicate(record, representative, parsed):
+            # A failed representative's duplicates go to the errors file and are retried next run
+            write(record, dict(parsed, duplicate_of=representative))
+            if "error" not in parsed:
+                stats["deduplicated"] += 1
+
+        def pending_texts():
+            # Indices match the enumeration order used by iter_analyses
+            submitted = 0
+            for record in records:
+                if limit is not None and submitted >= limit:
+                    return
+                if record["id"] in done or not record["text"]:
+                    stats["skipped"] += 1
+                    continue
+                done.add(record["id"])  # also drops duplicates within the corpus
+                if index is not None:
+                    representative = index.add(record["id"], record["text"])
+                    if representative is not None:
+                        if representative in finished:
+                            write_duplicate(record, representative, finished[representative])
+                        else:
+                            waiting.setdefault(representative, []).append(record)
+                        continue
+                in_flight[submitted] = record
+                submitted += 1
+                yield record["text"]
+
+        for idx, result in iter_analyses(pending_texts(), model, max_workers=workers):
+            record = in_flight.pop(idx)
+            stats["prompt_tokens"] += result["usage"]["prompt_tokens"]
+            stats["output_tokens"] += result["usage"]["output_tokens"]
+            parsed = result["parsed"]
+            write(record, parsed, result["raw"])
+
+            if index is not None:
+                finished[record["id"]] = parsed
+            for duplicate in waiting.pop(record["id"], []):
+                write_duplicate(duplicate, record["id"], parsed)
+
+        # Every representative has landed by now; anything still waiting would otherwise be lost
+        for representative, duplicates in waiting.items():
+            for duplicate in duplicates:
+                write_duplicate(duplicate, representative, {
+                    "error": "Representative not analyzed",
+                    "details": f"near-duplicate of {representative}, which has no result"
+                })
+
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze an article corpus without the Streamlit UI.")
+    parser.add_argument("corpus", nargs="?", help="JSONL, CSV or JSON file of articles")
+    parser.add_argument("-q", "--query", action="append", help="fetch articles from NewsAPI instead (repeatable)")
+    parser.add_argument("--pages", type=int, default=1, help="NewsAPI result pages per query")
+    parser.add_argument("-o", "--output", default="narrative_lens_results.jsonl")
+    parser.add_argument("-w", "--workers", type=int,
+                        default=int(os.getenv("NARRATIVELENS_MAX_CONCURRENCY", DEFAULT_MAX_WORKERS)))
+    parser.add_argument("--limit", type=int, help="analyze at most this many new articles")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="analyze near-duplicate articles (e.g. wire copy) only once")
+    parser.add_argument("--fake", action="store_true", help="use the offline fake model (no API calls)")
+    parser.add_argument("--metrics", default=os.getenv("NARRATIVELENS_METRICS_PATH"),
+                        help="write Prometheus-format stage timings and counters here when done")
+    args = parser.parse_args(argv)
+    if not args.corpus and not args.query:
+        parser.error("give a corpus file or at least one --query")
+
+    load_dotenv()
+    # Skipped NewsAPI pages and similar warnings from the library modules
+    logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.WARNING)
+    if args.fake:
+        from fake_llm import FakeModel
+        model = FakeModel(latency=0.05)
+    else:
+        from llm import create_model
+        model = create_model()
+
+    if args.query:
+        from scraper import MAX_PAGE_SIZE, iter_articles
+        corpus = (normalize_record(a) for a in iter_articles(args.query, max_pages=args.pages, page_size=MAX_PAGE_SIZE))
+    else:
+        corpus = args.corpus
+
+    stats = run(corpus, args.output, model, workers=args.workers, limit=args.limit, dedupe=args.dedupe, log=print)
+
+    rate = stats["analyzed"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"Analyzed {stats['analyzed']} articles in {stats['seconds']:.1f}s ({rate:.2f} articles/sec); "
+        f"{stats['skipped']} skipped, {stats['failed']} failed."
+    )
+    if args.dedupe:
+        print(f"Near-duplicate detection saved {stats['deduplicated']} LLM calls.")
+    print(f"Tokens: {stats['prompt_tokens']} prompt, {stats['output_tokens']} output.")
+    cache = getattr(model, "cache", None)
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses.")
+    if args.metrics:
+        metrics.write(args.metrics)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,339 @@
-import umap
+import hashlib
+import importlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.decomposition import PCA
+
+from metrics import metrics, stage, timed
+
+# umap, sentence_transformers (torch) and sklearn take seconds to import, so
+# they are imported where they are first used; prewarm() loads them early.
+# sentence_transformers is left to load_model(), which prewarm() only runs on request
+HEAVY_MODULES = (
+    "umap",
+    "sklearn.cluster",
+    "sklearn.decomposition",
+    "sklearn.neighbors",
+)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_EMBEDDING_STORE = "embeddings.db"
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAP_DIR = "semantic_maps"
+# Least recently used maps are deleted once the directory grows past this
+DEFAULT_MAX_MAP_BYTES = 512 * 1024 * 1024
+# Above these sizes UMAP uses approximate neighbours and clustering uses MiniBatchKMeans
+APPROXIMATE_NN_MIN_POINTS = 4096
+HDBSCAN_MAX_POINTS = 5000
+MAX_CLUSTERS = 20
+
+_model = None
+_model_lock = threading.Lock()
+_active_encodes = 0
+_applied_threads = None
+_threads_lock = threading.Lock()
+_prewarm_thread = None
+
 
 def load_model():
-    return SentenceTransformer("all-MiniLM-L6-v2")
+    """Return the process-wide SentenceTransformer, loading it on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def _apply_threads():
+    """Give each running encode an equal share of the cores (call with _threads_lock held)."""
+    global _applied_threads
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    total = os.cpu_count() or 1
+    n = max(1, total // max(1, _active_encodes))
+    if n != _applied_threads:
+        torch.set_num_threads(n)
+        _applied_threads = n
+
+
+@contextmanager
+def _encoding():
+    """Track concurrent encodes so they split the cores only while they overlap.
+
+    torch's thread count is process-wide; a lone encode (a single job or the
+    inline single-article path) gets every core.
+    """
+    global _active_encodes
+    with _threads_lock:
+        _active_encodes += 1
+        _apply_threads()
+    try:
+        yield
+    finally:
+        with _threads_lock:
+            _active_encodes -= 1
+            _apply_threads()
+
+
+def prewarm(modules=HEAVY_MODULES, load_embedding_model=False):
+    """Import the heavy dependencies (and optionally load the model) on a background thread.
+
+    Safe to call repeatedly; only the first call starts the thread. Code
+    that needs one of the modules meanwhile waits on Python's import lock
+    rather than importing it twice.
+    """
+    global _prewarm_thread
+
+    def warm():
+        try:
+            for name in modules:
+                importlib.import_module(name)
+            if load_embedding_model:
+                load_model()
+        except Exception:
+            pass  # whatever failed is loaded (and reports its error) on first real use
+
+    with _model_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = threading.Thread(target=warm, name="narrativelens-prewarm", daemon=True)
+            _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def text_hash(text):
+    return hashlib.sha256(f"{MODEL_NAME}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Persistent float32 embeddings keyed by text hash, stored as SQLite blobs."""
+
+    def __init__(self, path=DEFAULT_EMBEDDING_STORE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes):
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", chunk
+                )
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+                [(h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in items]
+            )
+            self._conn.commit()
+
+
+_store = None
 
-def embed_articles(texts):
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+
+def get_embedding_store():
+    global _store
+    if _store is None:
+        _store = EmbeddingStore(os.getenv("NARRATIVELENS_EMBEDDING_STORE", DEFAULT_EMBEDDING_STORE))
+    return _store
+
+
+@timed("embedding")
+def embed_articles(texts, batch_size=DEFAULT_BATCH_SIZE, store=None):
     clean_texts = [t.strip() for t in texts if t and len(t.strip()) > 5]
     if not clean_texts:
         return None
-    embeddings = model.encode(clean_texts)
+
+    store = store or get_embedding_store()
+    hashes = [text_hash(t) for t in clean_texts]
+    cached = store.get_many(list(dict.fromkeys(hashes)))
+
+    # Only encode texts the store has never seen
+    missing = {}
+    for h, t in zip(hashes, clean_texts):
+        if h not in cached and h not in missing:
+            missing[h] = t
+    if missing:
+        model = load_model()
+        with _encoding():
+            encoded = model.encode(
+                list(missing.values()), batch_size=batch_size, convert_to_numpy=True
+            ).astype(np.float32)
+        new_items = list(zip(missing.keys(), encoded))
+        store.put_many(new_items)
+        cached.update(new_items)
+
+    metrics.inc("narrativelens_embeddings_total", len(missing), source="model")
+    metrics.inc("narrativelens_embeddings_total", len(hashes) - len(missing), source="cache")
+    embeddings = np.vstack([cached[h] for h in hashes])
     return embeddings
 
 
+def corpus_key(embeddings, n_neighbors=5, min_dist=0.3):
+    """Stable identifier for a corpus (and map settings) used to cache fitted maps."""
+    digest = hashlib.sha256(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    digest.update(f"{n_neighbors}:{min_dist}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+class SemanticMap:
+    """A fitted 2-D projection with cluster labels.
+
+    Fit once on a corpus, then ``transform`` places new articles on the same
+    layout without refitting. UMAP switches to approximate nearest neighbours
+    for large corpora; clusters come from HDBSCAN, or MiniBatchKMeans when the
+    corpus is too large for HDBSCAN to stay interactive.
+    """
+
+    def __init__(self, n_neighbors=5, min_dist=0.3):
+        self.n_neighbors = n_neighbors
+        self.min_dist = min_dist
+        self.reducer = None
+        self.coords = None
+        self.labels = None
+        self._assigner = None
+        self._fitted_labels = None
+
+    @timed("semantic_map_fit")
+    def fit(self, embeddings):
+        n = embeddings.shape[0]
+        if n < 5:
+            from sklearn.decomposition import PCA
+
+            # Not enough data for UMAP — fallback to PCA
+            self.reducer = PCA(n_components=2)
+        else:
+            import umap
+
+            self.reducer = umap.UMAP(
+                n_neighbors=min(self.n_neighbors, n - 1),
+                min_dist=self.min_dist,
+                metric="cosine",
+                low_memory=True,
+                force_approximation_algorithm=n > APPROXIMATE_NN_MIN_POINTS
+            )
+        self.coords = self.reducer.fit_transform(embeddings)
+        self.labels = self._fit_clusters(self.coords)
+        return self
+
+    def _fit_clusters(self, coords):
+        from sklearn.cluster import HDBSCAN, MiniBatchKMeans
+        from sklearn.neighbors import NearestNeighbors
+
+        n = coords.shape[0]
+        if n < 3:
+            self._assigner = None
+            return np.zeros(n, dtype=int)
+        if n <= HDBSCAN_MAX_POINTS:
+            labels = HDBSCAN(min_cluster_size=max(2, n // 20)).fit_predict(coords)
+            # HDBSCAN cannot label unseen points; new points take their nearest neighbour's label
+            self._assigner = NearestNeighbors(n_neighbors=1).fit(coords)
+            self._fitted_labels = labels
+            return labels
+        kmeans = MiniBatchKMeans(n_clusters=min(MAX_CLUSTERS, int(np.sqrt(n / 2))), n_init=3, batch_size=4096)
+        labels = kmeans.fit_predict(coords)
+        self._assigner = kmeans
+        return labels
+
+    def transform(self, embeddings):
+        """Place new embeddings on the fitted map; returns (coords, labels)."""
+        with stage("semantic_map_transform"):
+            coords = self.reducer.transform(embeddings)
+        if self._assigner is None:
+            labels = np.zeros(coords.shape[0], dtype=int)
+        elif hasattr(self._assigner, "kneighbors"):  # NearestNeighbors over HDBSCAN's points
+            nearest = self._assigner.kneighbors(coords, return_distance=False)[:, 0]
+            labels = self._fitted_labels[nearest]
+        else:
+            labels = self._assigner.predict(coords)
+        return coords, labels
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def _map_dir(map_dir):
+    return map_dir or os.getenv("NARRATIVELENS_MAP_DIR", DEFAULT_MAP_DIR)
+
+
+def evict_semantic_maps(map_dir=None, max_bytes=DEFAULT_MAX_MAP_BYTES, keep=None):
+    """Delete the least recently used maps until ``map_dir`` fits in ``max_bytes``.
+
+    ``keep`` (a path) is never deleted, so a single oversized map survives.
+    """
+    if max_bytes is None:
+        return
+    map_dir = _map_dir(map_dir)
+    maps = []
+    try:
+        with os.scandir(map_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pkl") and entry.is_file():
+                    info = entry.stat()
+                    maps.append((info.st_mtime, info.st_size, entry.path))
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in maps)
+    for _, size, path in sorted(maps):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # another process evicted it first
+        total -= size
+
+
+def get_semantic_map(embeddings, n_neighbors=5, min_dist=0.3, map_dir=None, max_bytes=DEFAULT_MAX_MAP_BYTES):
+    """Return the fitted map for this corpus, loading it from disk when cached.
+
+    ``map_dir`` defaults to $NARRATIVELENS_MAP_DIR, then ``semantic_maps``.
+    """
+    map_dir = _map_dir(map_dir)
+    path = os.path.join(map_dir, f"{corpus_key(embeddings, n_neighbors, min_dist)}.pkl")
+    if os.path.exists(path):
+        try:
+            semantic_map = SemanticMap.load(path)
+            os.utime(path)  # the modification time doubles as the LRU timestamp
+            return semantic_map
+        except Exception:
+            pass  # corrupt or from an incompatible version; refit below
+    semantic_map = SemanticMap(n_neighbors, min_dist).fit(embeddings)
+    semantic_map.save(path)
+    evict_semantic_maps(map_dir, max_bytes, keep=path)
+    return semantic_map
 
 
-def reduce_dimensions(embeddings, n_neighbors=5, min_dist=0.3):
-    if embeddings.shape[0] < 5:
-        # Not enough data for UMAP — fallback to PCA
-        reducer = PCA(n_components=2)
-        embedding_2d = reducer.fit_transform(embeddings)
-        return embedding_2d
-    else:
-        reducer = umap.UMAP(n_neighbors=n_neighbors, min_dist=min_dist, metric="cosine")
-        embedding_2d = reducer.fit_transform(embeddings)
-        return embedding_2d
+def reduce_dimensions(embeddings, n_neighbors=5, min_dist=0.3, map_dir=None, max_bytes=DEFAULT_MAX_MAP_BYTES):
+    return get_semantic_map(embeddings, n_neighbors, min_dist, map_dir, max_bytes).coords
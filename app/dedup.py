@@ -0,0 +1,95 @@
+import re
+import zlib
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+SHINGLE_SIZE = 3
+
+_SHIFT = np.uint64(32)
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hash the word n-grams of ``text`` to 32-bit integers."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in set(grams)), dtype=np.uint64)
+
+
+class MinHasher:
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        # Multiply-shift hashing: (a * x + b) mod 2**64, keep the high 32 bits
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if hashes.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = (np.outer(hashes, self.a) + self.b) >> _SHIFT
+        return values.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Streaming MinHash/LSH index that maps each text to a group representative.
+
+    Signatures are split into ``bands``; texts sharing any band land in the
+    same bucket and only those candidates are compared, so adding N texts
+    costs roughly O(N) instead of O(N^2) pairwise comparisons.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm, seed)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def _band_keys(self, signature):
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def add(self, key, text):
+        """Register ``text`` under ``key``.
+
+        Returns the key of an earlier near-duplicate representative, or None
+        when ``text`` starts a new group (and becomes its representative).
+        """
+        signature = self.hasher.signature(text)
+        band_keys = self._band_keys(signature)
+
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(band_key, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            similarity = np.mean(self._signatures[candidate] == signature)
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            return best
+
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, band_keys):
+            bucket.setdefault(band_key, []).append(key)
+        return None
+
+
+def group_near_duplicates(texts, threshold=DEFAULT_THRESHOLD):
+    """Return, for each text, the index of its group's representative."""
+    index = NearDuplicateIndex(threshold)
+    groups = []
+    for idx, text in enumerate(texts):
+        representative = index.add(idx, text)
+        groups.append(idx if representative is None else representative)
+    return groups
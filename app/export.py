@@ -1,25 +1,161 @@
-from fpdf import FPDF
+"""Report and data exports for analysis results.
 
-def create_pdf_report(analysis_results, filename="narrative_lens_report.pdf"):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
+Every writer takes an iterable of result dicts and a binary file object and
+consumes the results one at a time. The JSON, JSONL and CSV writers write
+each result as it arrives and Parquet buffers one row group, so those exports
+of the whole history never hold it in memory; fpdf keeps the whole PDF in
+memory until it is output. ``export_file`` writes to a fresh temp file per
+call and ``export_bytes`` to an in-memory buffer; nothing is written to a
+shared path in the working directory.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
 
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "NarrativeLens Analysis Report", ln=True, align="C")
+from metrics import stage
 
-    pdf.set_font("Arial", "", 12)
-    pdf.ln(10)
+EXPORT_FIELDS = ("title", "link", "published", "bias", "emotion", "framing", "source", "omissions")
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "pdf": (".pdf", "application/pdf"),
+    "json": (".json", "application/json"),
+    "jsonl": (".jsonl", "application/jsonl"),
+    "csv": (".csv", "text/csv"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+PARQUET_BATCH_ROWS = 5000
 
-    for idx, result in enumerate(analysis_results):
-        pdf.set_font("Arial", "B", 14)
-        pdf.cell(0, 10, f"Article {idx+1}", ln=True)
 
-        pdf.set_font("Arial", "", 12)
-        pdf.multi_cell(0, 8, f"Political Bias: {result.get('bias','')}")
-        pdf.multi_cell(0, 8, f"Emotional Tone: {result.get('emotion','')}")
-        pdf.multi_cell(0, 8, f"Framing Style: {result.get('framing','')}")
-        pdf.multi_cell(0, 8, f"Omitted Perspectives:\n{result.get('omissions','')}")
-        pdf.ln(5)
+def _export_record(result):
+    return {field: result.get(field) for field in EXPORT_FIELDS}
 
-    pdf.output(filename)
+
+def write_jsonl(results, f):
+    for result in results:
+        f.write(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+        f.write(b"\n")
+
+
+def write_json(results, f):
+    """A compact JSON array, written element by element."""
+    f.write(b"[")
+    for n, result in enumerate(results):
+        if n:
+            f.write(b",\n")
+        f.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    f.write(b"]\n")
+
+
+def write_csv(results, f):
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="", write_through=True)
+    try:
+        writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(_export_record(result))
+    finally:
+        text.detach()  # leave ``f`` open for the caller
+
+
+def write_parquet(results, f, batch_rows=PARQUET_BATCH_ROWS):
+    """Parquet in row groups of ``batch_rows``; needs pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.string()) for field in EXPORT_FIELDS])
+    with pq.ParquetWriter(f, schema) as writer:
+        batch = []
+        for result in results:
+            batch.append(_export_record(result))
+            if len(batch) >= batch_rows:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+
+def write_pdf(results, f, font_path=None):
+    # fpdf is only imported once a PDF is actually requested
+    from pdf_report import write_pdf as write
+
+    write(results, f, font_path)
+
+
+WRITERS = {
+    "pdf": write_pdf,
+    "json": write_json,
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def write_export(results, fmt, f):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(WRITERS)}")
+    with stage(f"export_{fmt}"):
+        WRITERS[fmt](results, f)
+
+
+def export_bytes(results, fmt):
+    buffer = io.BytesIO()
+    write_export(results, fmt, buffer)
+    return buffer.getvalue()
+
+
+def export_file(results, fmt, directory=None):
+    """Write the export to a new temp file and return its path; the caller removes it."""
+    extension, _ = EXPORT_FORMATS[fmt]
+    fd, path = tempfile.mkstemp(prefix="narrativelens-", suffix=extension, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_export(results, fmt, f)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def create_pdf_report(analysis_results, filename=None):
+    """Write a PDF report to ``filename`` (a new temp file if omitted) and return the path."""
+    if filename is None:
+        return export_file(analysis_results, "pdf")
+    with open(filename, "wb") as f:
+        write_pdf(analysis_results, f)
+    return filename
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    from history import DEFAULT_HISTORY_PATH, HistoryStore
+
+    parser = argparse.ArgumentParser(description="Export saved analyses as PDF, JSON, JSONL, CSV or Parquet.")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("-o", "--output", required=True, help="output path, or - for stdout")
+    parser.add_argument("--input", help="results JSONL (e.g. from cli.py) instead of the history database")
+    parser.add_argument("--history", default=os.getenv("NARRATIVELENS_HISTORY_PATH", DEFAULT_HISTORY_PATH))
+    args = parser.parse_args(argv)
+
+    if args.input:
+        results = read_jsonl(args.input)
+    else:
+        results = HistoryStore(args.history, legacy_json=None).iter_records()
+    if args.output == "-":
+        write_export(results, args.format, sys.stdout.buffer)
+    else:
+        with open(args.output, "wb") as f:
+            write_export(results, args.format, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+
+
+FAKE_ANALYSIS = {
+    "bias": "center",
+    "emotion": "neutral",
+    "framing": "neutral",
+    "source": "Unknown",
+    "omissions": "None found"
+}
+
+
+# Responses the parser has to reject; FakeModel returns one at ``malformed_rate``
+MALFORMED_OUTPUTS = (
+    '```json\n{\n  "bias": "left",\n  "emotion": "anger",\n  "framing": "confl',
+    "I'm sorry, I can't analyze this article.",
+    '{"bias": "right", "emotion": "fear", "source": "Unknown"}',
+    "",
+    "{'bias': 'center', 'emotion': 'neutral', 'framing': 'neutral', 'omissions': 'None'}",
+)
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the 429 ResourceExhausted error raised by the Gemini SDK."""
+
+    code = 429
+
+
+class FakeServerError(Exception):
+    """Mimics a transient 503 from the Gemini API."""
+
+    code = 503
+
+
+_BATCH_ID = re.compile(r"^\[id=([^\]]+)\]$", re.MULTILINE)
+
+
+class FakeUsage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = max(1, len(prompt) // 4)
+        self.candidates_token_count = max(1, len(text) // 4)
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, prompt=""):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+
+
+class FakeModel:
+    """Offline stand-in for genai.GenerativeModel.
+
+    ``latency`` adds a fixed delay per call and ``token_latency`` a further
+    delay per generated token. When ``requests_per_period`` is
+    set, calls beyond that many per sliding ``period`` seconds raise
+    FakeRateLimitError, like a quota-limited Gemini key.
+
+    ``error_rate`` and ``malformed_rate`` make that share of prompts raise
+    FakeServerError or answer with one of MALFORMED_OUTPUTS. Which prompts
+    are affected depends only on the prompt text and ``seed``, not on call
+    order, so concurrent runs are reproducible.
+    """
+
+    def __init__(self, latency=0.2, analysis=None, requests_per_period=None, period=60.0, token_latency=0.0,
+                 error_rate=0.0, malformed_rate=0.0, seed=0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.analysis = analysis or FAKE_ANALYSIS
+        self.requests_per_period = requests_per_period
+        self.period = period
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.malformed = 0
+        self._lock = threading.Lock()
+        self._recent = deque()
+
+    def _check_quota(self):
+        if self.requests_per_period is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > self.period:
+                self._recent.popleft()
+            if len(self._recent) >= self.requests_per_period:
+                self.rate_limited += 1
+                raise FakeRateLimitError(
+                    "429 Resource has been exhausted (e.g. check quota). "
+                    "quota_id: GenerateRequestsPerMinutePerProjectPerModel"
+                )
+            self._recent.append(now)
+
+    def _roll(self, prompt):
+        """A uniform [0, 1) draw fixed by the prompt and seed."""
+        digest = hashlib.blake2b(f"{self.seed}:{prompt}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") / 2 ** 64
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        self._check_quota()
+        roll = self._roll(prompt) if self.error_rate or self.malformed_rate else 1.0
+        if roll < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise FakeServerError("503 The model is overloaded. Please try again later.")
+        if roll < self.error_rate + self.malformed_rate:
+            with self._lock:
+                self.malformed += 1
+            text = MALFORMED_OUTPUTS[int(roll * 1e6) % len(MALFORMED_OUTPUTS)]
+        else:
+            batch_ids = _BATCH_ID.findall(prompt)
+            if batch_ids:
+                # Batched prompt: answer with an ID-tagged array
+                payload = [dict(self.analysis, id=i) for i in batch_ids]
+            else:
+                payload = self.analysis
+            text = "```json\n" + json.dumps(payload, indent=2) + "\n```"
+        response = FakeResponse(text, prompt)
+        delay = self.latency + self.token_latency * response.usage_metadata.candidates_token_count
+        if stream:
+            return self._stream(response, delay)
+        if delay:
+            time.sleep(delay)
+        return response
+
+    def _stream(self, response, delay, chunk_size=16):
+        text = response.text
+        chunks = [FakeResponse(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)] or [FakeResponse("")]
+        # Like Gemini, the final chunk carries the usage for the whole response
+        chunks[-1].usage_metadata = response.usage_metadata
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay / len(chunks))
+            yield chunk
@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = "analysis_history.db"
+LEGACY_HISTORY_PATH = "analysis_history.json"
+
+
+class HistoryStore:
+    """Append-only analysis history in SQLite (WAL mode).
+
+    Rows are indexed by insertion time, so "last N" and time-range queries
+    never scan the whole history, and WAL lets concurrent sessions append
+    without overwriting each other.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, legacy_json=LEGACY_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, "
+            "published TEXT, bias TEXT, emotion TEXT, framing TEXT, source TEXT, "
+            "record TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if legacy_json:
+            self.migrate_json(legacy_json)
+
+    @staticmethod
+    def _row(result, created):
+        return (
+            created,
+            result.get("published"),
+            result.get("bias"),
+            result.get("emotion"),
+            result.get("framing"),
+            result.get("source"),
+            json.dumps(result)
+        )
+
+    def append(self, results, created=None):
+        """Append analysis results and return their row ids."""
+        created = time.time() if created is None else created
+        ids = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for result in results:
+                    cursor = self._conn.execute(
+                        "INSERT INTO analyses (created, published, bias, emotion, framing, source, record) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        self._row(result, created)
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def latest(self, n=5):
+        """Return the ``n`` most recent results, newest first."""
+        return self._query("SELECT record FROM analyses ORDER BY id DESC LIMIT ?", (n,))
+
+    def between(self, start, end):
+        """Return results saved between two Unix timestamps, oldest first."""
+        return self._query(
+            "SELECT record FROM analyses WHERE created >= ? AND created < ? ORDER BY created",
+            (start, end)
+        )
+
+    def iter_records(self, batch_size=1000):
+        """Yield every result, oldest first, reading ``batch_size`` rows at a time."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, record FROM analyses WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for _, record in rows:
+                yield json.loads(record)
+
+    def get_many(self, ids):
+        """Return {id: result} for the given row ids."""
+        found = {}
+        ids = list(ids)
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT id, record FROM analyses WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((row_id, json.loads(record)) for row_id, record in rows)
+        return found
+
+    def columns_since(self, last_id=0):
+        """Return the indexed columns of rows with id > ``last_id``, oldest first.
+
+        Rows come back as (id, created, published, bias, emotion, framing,
+        source) tuples without decoding the JSON records.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, created, published, bias, emotion, framing, source "
+                "FROM analyses WHERE id > ? ORDER BY id",
+                (last_id,)
+            ).fetchall()
+
+    def max_id(self):
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM analyses").fetchone()
+        return n
+
+    def count(self):
+        with self._lock:
+            (n,) = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()
+        return n
+
+    def migrate_json(self, path):
+        """Import a legacy analysis_history.json once; later calls are no-ops."""
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                done = self._conn.execute(
+                    "SELECT value FROM meta WHERE key = 'migrated_json'"
+                ).fetchone()
+                if done:
+                    self._conn.execute("COMMIT")
+                    return 0
+                try:
+                    with open(path, "r") as f:
+                        legacy = json.load(f)
+                except ValueError:
+                    legacy = []
+                created = os.path.getmtime(path)
+                self._conn.executemany(
+                    "INSERT INTO analyses (created, published, bias, emotion, framing, source, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [self._row(result, created) for result in legacy if isinstance(result, dict)]
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (os.path.abspath(path),)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(legacy)
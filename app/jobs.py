@@ -0,0 +1,380 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from batch import DEFAULT_MAX_WORKERS, iter_analyses, iter_packed_analyses
+from classifier import DEFAULT_CONFIDENCE_THRESHOLD, current_classifier
+from clustering import embed_articles
+from dedup import group_near_duplicates
+from ratelimit import is_daily_quota_error
+from vector_index import related_coverage
+
+DEFAULT_JOBS_PATH = "jobs.db"
+DEFAULT_JOB_WORKERS = 2
+POLL_INTERVAL = 0.5
+
+# Job states: queued -> running -> done | cancelled; retry puts a job back in the queue
+FINISHED_STATES = ("done", "cancelled")
+
+
+class JobQueue:
+    """Analysis jobs and their per-article items in SQLite (WAL mode).
+
+    Every finished item gets an increasing ``seq`` within its job, so a page
+    polling for progress only fetches items that changed since its last poll.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, created REAL NOT NULL, updated REAL NOT NULL, "
+            "status TEXT NOT NULL, options TEXT NOT NULL, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, article TEXT NOT NULL, published TEXT, "
+            "status TEXT NOT NULL, result TEXT, seq INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (job_id, idx))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_items_seq ON job_items (job_id, seq)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        # history_id: the item's row in the analysis history; indexed: added to the vector index
+        if "history_id" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN history_id INTEGER")
+        if "indexed" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN indexed INTEGER NOT NULL DEFAULT 0")
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self._conn)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return value
+
+    def submit(self, articles, published=None, options=None):
+        """Queue a batch of articles and return the new job id."""
+        job_id = uuid.uuid4().hex[:12]
+        published = published or [None] * len(articles)
+        now = time.time()
+
+        def insert(conn):
+            conn.execute(
+                "INSERT INTO jobs (id, created, updated, status, options) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, now, now, json.dumps(options or {}))
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, idx, article, published, status) VALUES (?, ?, ?, ?, 'queued')",
+                [(job_id, idx, article, date) for idx, (article, date) in enumerate(zip(articles, published))]
+            )
+
+        self._transaction(insert)
+        return job_id
+
+    def claim(self):
+        """Mark the oldest queued job as running and return (job_id, options), or None."""
+        def take(conn):
+            row = conn.execute(
+                "SELECT id, options FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (time.time(), row[0]))
+            return row[0], json.loads(row[1])
+
+        return self._transaction(take)
+
+    def pending_items(self, job_id):
+        """Return [(idx, article, published)] for items that still need a result."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT idx, article, published FROM job_items WHERE job_id = ? AND status = 'queued' ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+
+    def finish_item(self, job_id, idx, status, result, history_id=None):
+        """Store an item's result ('done' or 'failed'); also used to update it later.
+
+        ``history_id`` records the history row the result was saved as; an
+        update without one keeps the stored id.
+        """
+        def update(conn):
+            conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, history_id = COALESCE(?, history_id), "
+                "seq = (SELECT COALESCE(MAX(seq), 0) + 1 FROM job_items WHERE job_id = ?) "
+                "WHERE job_id = ? AND idx = ?",
+                (status, json.dumps(result), history_id, job_id, job_id, idx)
+            )
+            conn.execute("UPDATE jobs SET updated = ? WHERE id = ?", (time.time(), job_id))
+
+        self._transaction(update)
+
+    def unindexed_items(self, job_id):
+        """Return [(idx, article, history_id, result)] for saved items not yet in the vector index."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, article, history_id, result FROM job_items "
+                "WHERE job_id = ? AND status = 'done' AND history_id IS NOT NULL AND indexed = 0 ORDER BY idx",
+                (job_id,)
+            ).fetchall()
+        return [(idx, article, history_id, json.loads(result)) for idx, article, history_id, result in rows]
+
+    def mark_indexed(self, job_id, idxs):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE job_items SET indexed = 1 WHERE job_id = ? AND idx = ?", [(job_id, idx) for idx in idxs]
+            )
+
+    def finish(self, job_id, error=None):
+        """Mark a running job done; a job cancelled meanwhile stays cancelled."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', error = ?, updated = ? WHERE id = ? AND status = 'running'",
+                (error, time.time(), job_id)
+            )
+
+    def cancel(self, job_id):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+
+    def is_cancelled(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and row[0] == "cancelled"
+
+    def retry(self, job_id):
+        """Re-queue a finished job's failed and unfinished items; returns how many."""
+        def requeue(conn):
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[0] not in FINISHED_STATES:
+                return 0
+            conn.execute("UPDATE job_items SET status = 'queued' WHERE job_id = ? AND status = 'failed'", (job_id,))
+            (n,) = conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status = 'queued'", (job_id,)
+            ).fetchone()
+            if n:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = NULL, updated = ? WHERE id = ?", (time.time(), job_id)
+                )
+            return n
+
+        return self._transaction(requeue)
+
+    def requeue_running(self):
+        """Put jobs left 'running' by a stopped process back in the queue."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated = ? WHERE status = 'running'", (time.time(),)
+            ).rowcount
+
+    def status(self, job_id):
+        """Return {id, status, created, updated, error, options, total, done, failed}, or None."""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT id, status, created, updated, error, options FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        info = dict(zip(("id", "status", "created", "updated", "error"), job[:5]), options=json.loads(job[5]))
+        info.update(
+            total=sum(counts.values()),
+            done=counts.get("done", 0),
+            failed=counts.get("failed", 0)
+        )
+        return info
+
+    def results(self, job_id, after=0):
+        """Return (last_seq, {idx: result}) for items finished or updated after ``after``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, result, seq FROM job_items WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after)
+            ).fetchall()
+        if not rows:
+            return after, {}
+        return rows[-1][2], {idx: json.loads(result) for idx, result, _ in rows}
+
+    def articles(self, job_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT article FROM job_items WHERE job_id = ? ORDER BY idx", (job_id,)
+            ).fetchall()
+        return [article for (article,) in rows]
+
+    def recent(self, n=5):
+        """The ``n`` most recently submitted jobs, newest first."""
+        with self._lock:
+            ids = [job_id for (job_id,) in self._conn.execute(
+                "SELECT id FROM jobs ORDER BY created DESC LIMIT ?", (n,)
+            ).fetchall()]
+        return [self.status(job_id) for job_id in ids]
+
+
+def stored_result(result, published):
+    """JSON-safe form of an analyze_article result for a job item.
+
+    A response that could not be parsed is stored like a failed request
+    (``parsed`` None, ``error`` set), so it is retried and never saved.
+    """
+    e = result["exception"]
+    parsed = result["parsed"]
+    unparsed = e is None and "error" in parsed
+    if e is not None:
+        error = str(e)
+    elif unparsed:
+        error = f"{parsed['error']}: {parsed.get('details', '')}"
+    else:
+        error = None
+    return {
+        "raw": result["raw"],
+        "parsed": None if error is not None else dict(parsed, published=published),
+        "error": error,
+        "quota": e is not None and is_daily_quota_error(e),
+        "unparsed": unparsed,
+        "duplicate_of": None,
+        "related": []
+    }
+
+
+class WorkerPool:
+    """Background threads that run queued jobs through the analysis pipeline.
+
+    Runs in the app's server process, so a job keeps going after its tab is
+    closed or the page reruns. Each job is deduplicated, labelled by the local
+    classifier where it is confident (when ``classifier_path`` holds a trained
+    model and the job asks for it), analyzed with up to ``max_concurrency``
+    Gemini requests in flight, and (when the job asks for related coverage)
+    embedded into the vector index. Each result is appended to the history
+    and written back to its item as it lands, so progress can be polled and
+    a job interrupted by a restart loses none of the finished work.
+    """
+
+    def __init__(self, queue, model, history_store, vector_index=None, workers=DEFAULT_JOB_WORKERS,
+                 max_concurrency=DEFAULT_MAX_WORKERS, poll_interval=POLL_INTERVAL, classifier_path=None):
+        self.queue = queue
+        self.model = model
+        self.history_store = history_store
+        self.vector_index = vector_index
+        self.workers = max(1, int(workers))
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self.classifier_path = classifier_path
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.queue.requeue_running()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"narrativelens-job-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            job_id, options = job
+            try:
+                self.run_job(job_id, options)
+                self.queue.finish(job_id)
+            except Exception as e:
+                self.queue.finish(job_id, error=str(e))
+
+    def run_job(self, job_id, options):
+        items = self.queue.pending_items(job_id)
+        texts = [article for _, article, _ in items]
+        if options.get("dedupe", True) and len(texts) > 1:
+            group_of = group_near_duplicates(texts)
+        else:
+            group_of = list(range(len(texts)))
+        unique = [i for i, rep in enumerate(group_of) if rep == i]
+        duplicates = {}
+        for i, rep in enumerate(group_of):
+            if rep != i:
+                duplicates.setdefault(rep, []).append(i)
+
+        local = {}
+        classifier = current_classifier(self.classifier_path) if self.classifier_path else None
+        if classifier is not None and options.get("local"):
+            local = classifier.analyze(
+                [texts[i] for i in unique], options.get("confidence", DEFAULT_CONFIDENCE_THRESHOLD)
+            )
+        to_llm = [pos for pos in range(len(unique)) if pos not in local]
+
+        iterate = iter_packed_analyses if options.get("pack") else iter_analyses
+        analyses = iterate([texts[unique[pos]] for pos in to_llm], self.model, max_workers=self.max_concurrency)
+
+        def land(i, result):
+            stored = {i: stored_result(result, items[i][2])}
+            rep_parsed = stored[i]["parsed"]
+            for d in duplicates.get(i, []):
+                stored[d] = dict(
+                    stored[i],
+                    raw=None,
+                    parsed=dict(rep_parsed, published=items[d][2], duplicate_of=items[i][0]) if rep_parsed else None,
+                    duplicate_of=items[i][0]
+                )
+            if rep_parsed is None:
+                for j, item in stored.items():
+                    self.queue.finish_item(job_id, items[j][0], "failed", item)
+                return
+            # Saved before the item is marked done, so a restart can never skip its history row
+            history_ids = self.history_store.append([item["parsed"] for item in stored.values()])
+            for (j, item), history_id in zip(stored.items(), history_ids):
+                self.queue.finish_item(job_id, items[j][0], "done", item, history_id=history_id)
+
+        try:
+            for pos, result in local.items():
+                land(unique[pos], result)
+            for n, result in analyses:
+                land(unique[to_llm[n]], result)
+                if self.queue.is_cancelled(job_id):
+                    break  # what already finished is still indexed below
+        finally:
+            analyses.close()
+
+        if options.get("related") and self.vector_index is not None:
+            self._index(job_id)
+
+    def _index(self, job_id):
+        """Add the job's saved, not yet indexed items to the vector index with their related coverage.
+
+        Also picks up items saved by a run that stopped before this step.
+        """
+        pending = self.queue.unindexed_items(job_id)
+        indexable = [row for row in pending if len(row[1].strip()) > 5]
+        if indexable:
+            vectors = embed_articles([article for _, article, _, _ in indexable])
+            for (idx, _, _, result), vector in zip(indexable, vectors):
+                # Query before inserting so an article never matches itself
+                related = related_coverage(self.vector_index, self.history_store, vector)
+                if related:
+                    result["related"] = related
+                    self.queue.finish_item(job_id, idx, "done", result)
+            self.vector_index.add([history_id for _, _, history_id, _ in indexable], vectors)
+        self.queue.mark_indexed(job_id, [idx for idx, _, _, _ in pending])
@@ -0,0 +1,55 @@
+import os
+import threading
+
+from batch import cacheable_response
+from cache import CachedModel, ResponseCache, DEFAULT_CACHE_PATH
+from ratelimit import AdaptiveRateLimiter, RateLimitedModel, DEFAULT_REQUESTS_PER_MINUTE
+
+MODEL_NAME = "models/gemini-1.5-flash"
+
+
+class GeminiModel:
+    """``genai.GenerativeModel``, created on the first request.
+
+    Importing the Gemini SDK takes most of a second, which would otherwise
+    be paid by every process start before the first page could render.
+    """
+
+    def __init__(self, model_name=MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_content(self, prompt, **kwargs):
+        return self._client().generate_content(prompt, **kwargs)
+
+
+def create_model(model_name=MODEL_NAME, cache_path=None, requests_per_minute=None):
+    """Build the Gemini client used by the app and the CLI.
+
+    The cache sits outermost so cached responses never consume rate-limit
+    budget. The returned CachedModel exposes ``.cache`` and, through
+    ``.model.limiter``, the rate limiter for stats.
+    """
+    cache_path = cache_path or os.getenv("NARRATIVELENS_CACHE_PATH", DEFAULT_CACHE_PATH)
+    requests_per_minute = requests_per_minute or float(
+        os.getenv("NARRATIVELENS_RPM", DEFAULT_REQUESTS_PER_MINUTE)
+    )
+
+    limiter = AdaptiveRateLimiter(requests_per_minute=requests_per_minute)
+    return CachedModel(
+        RateLimitedModel(GeminiModel(model_name), limiter),
+        ResponseCache(cache_path),
+        model_name,
+        validate=cacheable_response
+    )
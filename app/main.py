@@ -1,24 +1,116 @@
 import streamlit as st
 import os
-import json
-import requests
-import pandas as pd
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
-import google.generativeai as genai
-from clustering import embed_articles, reduce_dimensions
-import plotly.express as px
-from prompts import get_bias_prompt, get_reframe_prompt
-from utils import parse_llm_response
-from visualize import bias_gauge, emotion_bar
-from export import create_pdf_report
-
+from history import HistoryStore, DEFAULT_HISTORY_PATH
+from analytics import (
+    HistoryFrame, DEFAULT_SNAPSHOT_PATH, daily_aggregates, source_aggregates, tone_score, weighted_tone
+)
+from vector_index import VectorIndex, DEFAULT_INDEX_DIR, related_coverage
+from llm import create_model
+from ratelimit import is_daily_quota_error
+from clustering import HEAVY_MODULES, embed_articles, get_semantic_map, prewarm
+from reframe import iter_reframes, reframe_key
+from scraper import fetch_articles_newsapi
+from batch import analyze_article_stream
+from classifier import DEFAULT_CLASSIFIER_PATH, DEFAULT_CONFIDENCE_THRESHOLD, current_classifier
+from jobs import JobQueue, WorkerPool, DEFAULT_JOBS_PATH, DEFAULT_JOB_WORKERS
+from visualize import bias_emotion_heatmap, bias_gauge, bias_over_time, emotion_bar, semantic_scatter
+from export import EXPORT_FORMATS, export_bytes
+from metrics import DEFAULT_EXPORT_INTERVAL, export_periodically, metrics, serve, stage
+
+
+script_start = time.perf_counter()
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini client
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("models/gemini-1.5-flash")
+QUOTA_ERROR_MESSAGE = (
+    "🚫 You have exceeded your Gemini API quota for today.\n\n"
+    "👉 Please wait until your daily limit resets or enable billing to continue.\n\n"
+    "[Learn more about Gemini quotas](https://ai.google.dev/gemini-api/docs/rate-limits)"
+)
+
+# Number of Gemini requests allowed in flight during a batch analysis
+MAX_CONCURRENT_REQUESTS = int(os.getenv("NARRATIVELENS_MAX_CONCURRENCY", "4"))
+# Background job workers; multi-article batches run there instead of in the script thread
+JOB_WORKERS = int(os.getenv("NARRATIVELENS_JOB_WORKERS", DEFAULT_JOB_WORKERS))
+CLASSIFIER_PATH = os.getenv("NARRATIVELENS_CLASSIFIER_PATH", DEFAULT_CLASSIFIER_PATH)
+LOCAL_CONFIDENCE = float(os.getenv("NARRATIVELENS_LOCAL_CONFIDENCE", DEFAULT_CONFIDENCE_THRESHOLD))
+# Import clustering/plotting/Gemini dependencies in the background once the first page is out;
+# "model" also loads the embedding model, which imports torch and holds it in memory
+PREWARM = os.getenv("NARRATIVELENS_PREWARM", "1")
+PREWARM_MODULES = HEAVY_MODULES + ("plotly.express", "google.generativeai", "fpdf")
+JOB_POLL_SECONDS = 1.0
+# Prometheus metrics: served on this port and/or written to this file when set
+METRICS_PORT = os.getenv("NARRATIVELENS_METRICS_PORT")
+METRICS_PATH = os.getenv("NARRATIVELENS_METRICS_PATH")
+METRICS_INTERVAL = float(os.getenv("NARRATIVELENS_METRICS_INTERVAL", DEFAULT_EXPORT_INTERVAL))
+SHOW_DIAGNOSTICS = os.getenv("NARRATIVELENS_DIAGNOSTICS", "1") != "0"
+
+# (stage, seconds) for the diagnostics panel at the bottom of the sidebar
+rerun_timings = []
+
+
+@contextmanager
+def timed_stage(name):
+    timer = stage(f"page_{name}")
+    try:
+        with timer:
+            yield
+    finally:
+        rerun_timings.append((name, timer.elapsed))
+
+
+# Long-lived objects are built once per server process and shared by every session and rerun
+@st.cache_resource(show_spinner=False)
+def get_model():
+    """Gemini client with response cache and adaptive rate limiting."""
+    return create_model()
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store(path):
+    return HistoryStore(path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_vector_index(path):
+    return VectorIndex(path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_frame(path, snapshot_path):
+    return HistoryFrame(get_history_store(path), snapshot_path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue(path):
+    return JobQueue(path)
+
+
+@st.cache_resource(show_spinner=False)
+def start_job_workers(jobs_path, history_path, index_path):
+    """Start the background worker pool once per server process."""
+    return WorkerPool(
+        get_job_queue(jobs_path),
+        get_model(),
+        get_history_store(history_path),
+        get_vector_index(index_path),
+        workers=JOB_WORKERS,
+        max_concurrency=MAX_CONCURRENT_REQUESTS,
+        classifier_path=CLASSIFIER_PATH
+    ).start()
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_exporters(port, path, interval):
+    """Start the /metrics endpoint and the metrics file writer once per server process."""
+    server = serve(port) if port else None
+    stop = export_periodically(path, interval) if path else None
+    return server, stop
+
 
 st.set_page_config(page_title="NarrativeLens", page_icon="🧠")
 st.title("🧠 NarrativeLens: Media Bias Analyzer")
@@ -57,26 +149,51 @@ for emotion in EMOTIONS:
 st.sidebar.markdown("---")
 st.sidebar.header("🕒 Analysis History")
 
-if os.path.exists("analysis_history.json"):
-    with open("analysis_history.json", "r") as f:
-        history = json.load(f)
-
-    if history:
-        for idx, entry in enumerate(history[-5:][::-1]):  # show last 5
-            st.sidebar.markdown(f"**{idx+1}. {entry.get('bias','Unknown').capitalize()} Bias**")
-            snippet = entry.get("omissions","").strip()
-            st.sidebar.caption(snippet[:60] + "...")
-    else:
-        st.sidebar.caption("No analyses yet.")
+with timed_stage("resources"):
+    model = get_model()
+    response_cache = model.cache
+    history_path = os.getenv("NARRATIVELENS_HISTORY_PATH", DEFAULT_HISTORY_PATH)
+    history_store = get_history_store(history_path)
+    index_path = os.getenv("NARRATIVELENS_VECTOR_INDEX_PATH", DEFAULT_INDEX_DIR)
+    vector_index = get_vector_index(index_path)
+    history_frame = get_history_frame(
+        history_path, os.getenv("NARRATIVELENS_ANALYTICS_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    )
+    jobs_path = os.getenv("NARRATIVELENS_JOBS_PATH", DEFAULT_JOBS_PATH)
+    job_queue = get_job_queue(jobs_path)
+    if JOB_WORKERS > 0:
+        start_job_workers(jobs_path, history_path, index_path)
+
+with timed_stage("history"):
+    # Picks up analyses saved by any session; a no-op query when nothing changed
+    history_frame.refresh()
+    if st.session_state.get("sidebar_history_id") != history_frame.last_id:
+        st.session_state.sidebar_history = history_store.latest(5)
+        st.session_state.sidebar_history_id = history_frame.last_id
+    history = st.session_state.sidebar_history
+
+if history:
+    for idx, entry in enumerate(history):  # newest first
+        st.sidebar.markdown(f"**{idx+1}. {(entry.get('bias') or 'Unknown').capitalize()} Bias**")
+        snippet = (entry.get("omissions") or "").strip()
+        st.sidebar.caption(snippet[:60] + "...")
 else:
     st.sidebar.caption("No analyses yet.")
 
-# Bias score mapping
-BIAS_SCORES = {
-    "left": -1,
-    "center": 0,
-    "right": 1
-}
+st.sidebar.markdown("---")
+st.sidebar.header("🧵 Background Jobs")
+recent_jobs = job_queue.recent(5)
+if recent_jobs:
+    for job in recent_jobs:
+        st.sidebar.caption(
+            f"`{job['id']}` · {job['status']} · {job['done'] + job['failed']}/{job['total']} articles"
+            + (f" · {job['failed']} failed" if job["failed"] else "")
+        )
+        if st.sidebar.button("Open", key=f"open_job_{job['id']}"):
+            st.session_state.active_job = {"id": job["id"], "seq": 0, "entries": {}}
+            st.session_state.pop("analysis", None)
+else:
+    st.sidebar.caption("No jobs yet.")
 
 # Input mode
 input_mode = st.radio("Choose input mode:", ["Single Article", "Multiple Articles"])
@@ -87,6 +204,24 @@ if input_mode == "Single Article":
 else:
     user_input = st.text_area("Paste multiple articles separated by --- (3 dashes):")
 
+pack_short_articles = st.checkbox(
+    "⚡ Pack short articles into shared requests (fewer API calls for tweets and headlines)"
+)
+keep_map_layout = st.checkbox(
+    "📌 Place new articles on the previous semantic map instead of re-fitting it",
+    disabled="semantic_map" not in st.session_state
+)
+skip_near_duplicates = st.checkbox("🧬 Analyze near-duplicate articles (e.g. syndicated wire copy) only once", value=True)
+find_related_coverage = st.checkbox("🔗 Show related coverage from past analyses", value=True)
+# Trained offline with `python app/classifier.py`; reloaded here when the file changes
+classifier = current_classifier(CLASSIFIER_PATH)
+use_local_classifier = classifier is not None and st.checkbox(
+    "🤖 Label articles the local classifier is confident about without calling Gemini", value=True
+)
+local_confidence = LOCAL_CONFIDENCE
+if use_local_classifier:
+    local_confidence = st.slider("Local classifier confidence threshold", 0.0, 1.0, LOCAL_CONFIDENCE, 0.01)
+
 # NewsAPI search
 st.markdown("Or fetch recent news articles:")
 
@@ -95,27 +230,13 @@ fetch_articles_button = st.button("Fetch Articles")
 
 # NewsAPI fetch logic
 if fetch_articles_button and search_query:
-    api_key = os.getenv("NEWSAPI_KEY")
-    url = (
-        f"https://newsapi.org/v2/everything?"
-        f"q={search_query}&language=en&pageSize=5&sortBy=publishedAt&apiKey={api_key}"
-    )
     with st.spinner("Fetching articles..."):
-        response = requests.get(url)
-        data = response.json()
+        fetched = fetch_articles_newsapi(search_query)
 
-    if "articles" not in data:
-        st.error(f"Error fetching articles: {data.get('message', 'Unknown error.')}")
+    if isinstance(fetched, dict) and "error" in fetched:
+        st.error(f"Error fetching articles: {fetched['error']}")
     else:
-        st.session_state.fetched_articles = [
-            {
-                "title": a["title"],
-                "summary": a["description"],
-                "link": a["url"],
-                "published": a["publishedAt"]
-            }
-            for a in data["articles"]
-        ]
+        st.session_state.fetched_articles = fetched
 
 # Display fetched articles for selection
 selected_articles = []
@@ -129,210 +250,506 @@ if "fetched_articles" in st.session_state:
                 selected_articles.append(art["summary"])
 
 
-all_results = []
-
-# Analyze button
-if st.button("Analyze"):
-    articles = []
-
+def published_date(idx):
+    """Publication date for article ``idx`` when it came from a NewsAPI fetch."""
     if "fetched_articles" in st.session_state and selected_articles:
-        articles = selected_articles
-    elif user_input:
-        if input_mode == "Single Article":
-            articles = [user_input]
+        return st.session_state.fetched_articles[idx]["published"]
+    return None
+
+
+def render_weighted_tone(emotion):
+    """The only per-article view that depends on the tone sliders."""
+    emotion_labels = [e.strip() for e in emotion.split(",")]
+    weighted_scores = {e: emotion_weights.get(e.lower(), 1.0) for e in emotion_labels}
+
+    st.markdown("**Weighted Tone Emphasis:**")
+    for e, w in weighted_scores.items():
+        st.write(f"- {e.capitalize()}: Weight x{w}")
+    st.markdown(f"**Weighted Tone Score:** {tone_score(emotion, emotion_weights):.2f}")
+
+
+def render_charts(idx, parsed):
+    # Gauge and bar figures are cached per label in visualize, so repeats are free
+    st.plotly_chart(bias_gauge(parsed["bias"]), key=f"bias_{idx}")
+    st.plotly_chart(emotion_bar(parsed["emotion"]), key=f"emotion_{idx}")
+
+
+def render_entry(idx, entry, lazy_charts=False):
+    """Draw one article's analysis from what the Analyze run stored for it.
+
+    With ``lazy_charts`` the per-article charts sit in an expander and are
+    only built and sent to the browser while it is open.
+    """
+    if entry["kind"] == "failed":
+        st.error(entry["message"])
+        return
+    if entry["kind"] == "duplicate":
+        st.info(f"🧬 Near-duplicate of Article {entry['duplicate_of']+1}; reusing its analysis.")
+        return
+
+    parsed = entry["parsed"]
+    st.subheader("🔬 Bias Telemetry")
+    if parsed.get("classifier"):
+        st.caption(f"🤖 Labelled by the local classifier (confidence {parsed['confidence']:.2f})")
+    st.code(entry["raw"], language="json")
+
+    if "error" in parsed:
+        st.error(parsed["details"])
+        return
+    st.markdown(f"**Political Bias:** {parsed['bias']}")
+    st.markdown(f"**Emotional Tone:** {parsed['emotion']}")
+    st.markdown(f"**Framing Style:** {parsed['framing']}")
+    st.markdown(f"**Predicted Source:** {parsed.get('source', 'Unknown')}")
+    st.markdown("**Omitted Perspectives:**")
+    st.write(parsed["omissions"])
+
+    if lazy_charts:
+        with st.expander("📊 Bias gauge and emotion chart", key=f"charts_{idx}", on_change="rerun") as charts:
+            if charts.open:
+                render_charts(idx, parsed)
+    else:
+        render_charts(idx, parsed)
+
+    # 🎚️ Weighted tone display
+    render_weighted_tone(parsed["emotion"])
+
+
+def render_related(entry):
+    related = entry.get("related")
+    if related:
+        with st.expander(f"🔗 Related coverage ({len(related)} past analyses)"):
+            for record, score in related:
+                st.markdown(
+                    f"- **{(record.get('bias') or 'Unknown').capitalize()}** bias · "
+                    f"{record.get('framing', 'Unknown')} · similarity {score:.2f}  \n"
+                    f"  _{(record.get('omissions') or '')[:80]}..._"
+                )
+
+
+def analysis_entry(result, published):
+    if result["exception"] is not None:
+        e = result["exception"]
+        message = QUOTA_ERROR_MESSAGE if is_daily_quota_error(e) else f"🚫 Request failed after retries: {str(e)}"
+        return {"kind": "failed", "message": message, "parsed": None}
+    parsed = dict(result["parsed"], published=published)
+    return {"kind": "analyzed", "raw": result["raw"], "parsed": parsed}
+
+
+def job_entry(item):
+    """Turn a job item's stored result into the same entry an inline analysis produces."""
+    if item["error"] is not None:
+        if item["quota"]:
+            message = QUOTA_ERROR_MESSAGE
+        elif item.get("unparsed"):
+            message = f"🚫 Could not parse the model's response: {item['error']}"
         else:
-            articles = [a.strip() for a in user_input.split("---") if a.strip()]
-
-    if not articles:
-        st.warning("Please input or select at least one article to analyze.")
-        st.stop()
-
-    with st.spinner("Initiating semantic breakdown..."):
-        for idx, art in enumerate(articles):
-            st.markdown(f"### 🌎🚨 Article {idx+1}")
-
-            prompt = get_bias_prompt(art)
-            try:
-                response = model.generate_content(prompt)
-                raw_result = response.text
-            except Exception as e:
-                if "429" in str(e) and "quota" in str(e).lower():
-                    st.error(
-                        "🚫 You have exceeded your Gemini API quota for today.\n\n"
-                        "👉 Please wait until your daily limit resets or enable billing to continue.\n\n"
-                        "[Learn more about Gemini quotas](https://ai.google.dev/gemini-api/docs/rate-limits)"
-                    )
-                else:
-                    st.error(f"🚫 An unexpected error occurred: {str(e)}")
-                st.stop()
-
-
-            st.subheader("🔬 Bias Telemetry")
-            st.code(raw_result, language="json")
+            message = f"🚫 Request failed after retries: {item['error']}"
+        if item["duplicate_of"] is not None:
+            message += f" (near-duplicate of Article {item['duplicate_of'] + 1})"
+        entry = {"kind": "failed", "message": message, "parsed": None}
+    elif item["duplicate_of"] is not None:
+        entry = {"kind": "duplicate", "duplicate_of": item["duplicate_of"], "parsed": item["parsed"]}
+    else:
+        entry = analysis_entry(
+            {"exception": None, "raw": item["raw"], "parsed": item["parsed"]}, item["parsed"].get("published")
+        )
+    entry["related"] = item["related"]
+    return entry
 
-            parsed = parse_llm_response(raw_result)
 
-            if "error" in parsed:
-                st.error(parsed["details"])
-            else:
-                st.markdown(f"**Political Bias:** {parsed['bias']}")
-                st.markdown(f"**Emotional Tone:** {parsed['emotion']}")
-                st.markdown(f"**Framing Style:** {parsed['framing']}")
-                st.markdown(f"**Predicted Source:** {parsed.get('source', 'Unknown')}")
-                st.markdown("**Omitted Perspectives:**")
-                st.write(parsed["omissions"])
-
-                st.plotly_chart(bias_gauge(parsed['bias']), key=f"bias_{idx}")
-                st.plotly_chart(emotion_bar(parsed['emotion']), key=f"emotion_{idx}")
-
-                # 🎚️ Weighted tone display
-                emotion_labels = [e.strip() for e in parsed['emotion'].split(",")]
-                weighted_scores = {e: emotion_weights.get(e, 1.0) for e in emotion_labels}
-
-                st.markdown("**Weighted Tone Emphasis:**")
-                for e, w in weighted_scores.items():
-                    st.write(f"- {e.capitalize()}: Weight x{w}")
-
-                if st.button(f"Reframe Article {idx+1} Neutrally"):
-                    reframe_prompt = get_reframe_prompt(art)
-                    try:
-                        reframe_response = model.generate_content(reframe_prompt)
-                        reframe_text = reframe_response.text
-                    except Exception as e:
-                        if "429" in str(e) and "quota" in str(e).lower():
-                            st.error(
-                                "🚫 You have exceeded your Gemini API quota for today.\n\n"
-                                "👉 Please wait until your daily limit resets or enable billing to continue.\n\n"
-                                "[Learn more about Gemini quotas](https://ai.google.dev/gemini-api/docs/rate-limits)"
-                            )
-                        else:
-                            st.error(f"🚫 An unexpected error occurred: {str(e)}")
-                        st.stop()
-
-
-                    st.markdown("**Neutral Rephrasing:**")
-                    st.write(reframe_text)
-
-            # Attach date info
-            if "fetched_articles" in st.session_state and selected_articles:
-                published_date = st.session_state.fetched_articles[idx]["published"]
-            else:
-                published_date = None
-            parsed["published"] = published_date
+def semantic_map_figure(articles):
+    """Return (figure, warning) for the semantic similarity map of ``articles``."""
+    clean_articles = [a.strip() for a in articles if a and len(a.strip()) > 5]
+    if len(clean_articles) < 3:
+        return None, "Need at least 3 valid articles with text to generate clustering."
 
-            all_results.append(parsed)
+    embeddings = embed_articles(clean_articles)
+    if embeddings is None or embeddings.shape[0] < 3:
+        return None, "Not enough valid embeddings to generate clustering."
 
-    # Append to history.json
-    if all_results:
-        try:
-            with open("analysis_history.json", "r") as f:
-                existing = json.load(f)
-        except FileNotFoundError:
-            existing = []
+    previous_map = st.session_state.get("semantic_map")
+    if previous_map is not None and keep_map_layout:
+        # Place this batch on the existing layout instead of refitting
+        embedding_2d, cluster_labels = previous_map.transform(embeddings)
+    else:
+        semantic_map = get_semantic_map(embeddings)
+        st.session_state.semantic_map = semantic_map
+        embedding_2d, cluster_labels = semantic_map.coords, semantic_map.labels
 
-        existing.extend(all_results)
+    fig = semantic_scatter(embedding_2d, cluster_labels, clean_articles)
+    return fig, None
 
-        with open("analysis_history.json", "w") as f:
-            json.dump(existing, f, indent=2)
-        
 
-    # Clustering
+def finish_job_analysis(job, info):
+    """Build the stored analysis view for a job that has stopped running."""
+    articles = job_queue.articles(job["id"])
+    if info["error"]:
+        unfinished = f"🚫 Not analyzed: the job stopped with an error: {info['error']}"
+    elif info["status"] == "cancelled":
+        unfinished = "⏹️ Not analyzed: the job was cancelled first."
+    else:
+        unfinished = "⏹️ Not analyzed."
+    entries = {}
+    for idx in range(len(articles)):
+        entries[idx] = job["entries"].get(idx) or {"kind": "failed", "message": unfinished, "parsed": None}
+    result_idx = [idx for idx in sorted(entries) if entries[idx]["parsed"] is not None]
+    analysis = {
+        "job_id": job["id"],
+        "job_error": info["error"],
+        "count": len(articles),
+        "entries": entries,
+        "results": [entries[idx]["parsed"] for idx in result_idx],
+        "saved_calls": sum(entry["kind"] == "duplicate" for entry in entries.values()),
+        "local_count": sum(
+            entry["kind"] == "analyzed" and "classifier" in entry["parsed"] for entry in entries.values()
+        ),
+        "failed_count": sum(entry["kind"] == "failed" for entry in entries.values()),
+        "cache_stats": response_cache.stats(),
+        "heatmap_figure": None,
+        "map_figure": None,
+        "map_warning": None
+    }
+    if analysis["results"]:
+        # One aggregate figure instead of two per article; its size does not grow with the batch
+        analysis["heatmap_figure"] = bias_emotion_heatmap(analysis["results"])
     if len(articles) >= 3:
-        st.markdown("## 🧭 Semantic Similarity Map")
         with st.spinner("Generating embeddings and dimensionality reduction..."):
-            clean_articles = [a.strip() for a in articles if a and len(a.strip()) > 5]
+            analysis["map_figure"], analysis["map_warning"] = semantic_map_figure(articles)
+    st.session_state.reframe_articles = [
+        (idx, articles[idx]) for idx in result_idx if "error" not in entries[idx]["parsed"]
+    ]
+    return analysis
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_panel():
+    """Poll the active background job and show its results as they land."""
+    job = st.session_state.get("active_job")
+    if job is None:
+        return
+    info = job_queue.status(job["id"])
+    if info is None:
+        st.session_state.pop("active_job")
+        return
+
+    job["seq"], changed = job_queue.results(job["id"], job["seq"])
+    for idx, item in changed.items():
+        job["entries"][idx] = job_entry(item)
+
+    finished = info["done"] + info["failed"]
+    st.markdown(f"### 🧵 Job `{info['id']}`")
+    st.progress(
+        finished / max(info["total"], 1),
+        text=f"{info['status'].capitalize()}: {finished}/{info['total']} articles"
+             + (f" ({info['failed']} failed)" if info["failed"] else "")
+    )
+    if info["status"] in ("queued", "running"):
+        if st.button("⏹️ Cancel job"):
+            job_queue.cancel(job["id"])
+        landed = [
+            {
+                "Article": idx + 1,
+                "Bias": entry["parsed"].get("bias") if entry["parsed"] else None,
+                "Emotion": entry["parsed"].get("emotion") if entry["parsed"] else None,
+                "Framing": entry["parsed"].get("framing") if entry["parsed"] else None,
+                "Status": entry["kind"]
+            }
+            for idx, entry in sorted(job["entries"].items())
+        ]
+        if landed:
+            st.dataframe(landed, hide_index=True)
+        return
+
+    # Finished or cancelled: hand over to the regular analysis view
+    st.session_state.analysis = finish_job_analysis(job, info)
+    st.session_state.pop("active_job")
+    st.rerun(scope="app")
 
-            if len(clean_articles) < 3:
-                st.warning("Need at least 3 valid articles with text to generate clustering.")
+
+# Analyze button
+analyze_clicked = st.button("Analyze")
+with timed_stage("analysis"):
+    if analyze_clicked:
+        articles = []
+
+        if "fetched_articles" in st.session_state and selected_articles:
+            articles = selected_articles
+        elif user_input:
+            if input_mode == "Single Article":
+                articles = [user_input]
             else:
-                embeddings = embed_articles(clean_articles)
-
-                if embeddings is None or embeddings.shape[0] < 3:
-                    st.warning("Not enough valid embeddings to generate clustering.")
-                    st.stop()
-                else:
-                    embedding_2d = reduce_dimensions(embeddings)
-                    fig = px.scatter(
-                        x=embedding_2d[:, 0],
-                        y=embedding_2d[:, 1],
-                        text=[a[:60] + "..." for a in clean_articles],
-                        labels={"x": "Topic Similarity (X)", "y": "Topic Similarity (Y)"},
-                        title="Semantic Clustering of Articles",
-                        width=800,
-                        height=500
-                    )
-                    fig.update_traces(
-                        marker=dict(size=12, color="LightSkyBlue", line=dict(width=2, color="DarkSlateGrey")),
-                        hovertemplate="<b>%{text}</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>"
+                articles = [a.strip() for a in user_input.split("---") if a.strip()]
+
+        if not articles:
+            st.warning("Please input or select at least one article to analyze.")
+            st.stop()
+
+        if len(articles) > 1:
+            # Batches run on the background workers, so closing the tab or touching a widget does not cancel them
+            job_id = job_queue.submit(
+                articles,
+                published=[published_date(idx) for idx in range(len(articles))],
+                options={
+                    "pack": pack_short_articles,
+                    "dedupe": skip_near_duplicates,
+                    "related": find_related_coverage,
+                    "local": use_local_classifier,
+                    "confidence": local_confidence
+                }
+            )
+            st.session_state.active_job = {"id": job_id, "seq": 0, "entries": {}}
+            st.session_state.pop("analysis", None)
+            if JOB_WORKERS <= 0:
+                st.info(f"Job `{job_id}` queued. No workers run in this process (NARRATIVELENS_JOB_WORKERS=0).")
+        else:
+            slot = st.container()
+            slot.markdown("### 🌎🚨 Article 1")
+            result = None
+            if use_local_classifier:
+                result = classifier.analyze(articles, local_confidence).get(0)
+            if result is None:
+                with st.spinner("Initiating semantic breakdown..."):
+                    # Stream a single article so fields show up before the response completes
+                    preview = slot.empty()
+                    result = analyze_article_stream(
+                        model,
+                        articles[0],
+                        on_fields=lambda fields: preview.markdown(
+                            "\n\n".join(f"**{k.capitalize()}:** {v}" for k, v in fields.items())
+                        )
                     )
-                    st.plotly_chart(fig, key="semantic_clustering")
-
-    # Bias over time chart
-    bias_data = []
-    for res in all_results:
-        if res.get("published") and res.get("bias"):
-            score = BIAS_SCORES.get(res["bias"].lower())
-            if score is not None:
-                bias_data.append({
-                    "date": res["published"],
-                    "bias_score": score,
-                    "bias_label": res["bias"].capitalize(),
-                    "snippet": res.get("omissions", "")[:80] + "..."
-                })
-
-    if bias_data:
-        st.markdown("## 📈 Bias Over Time")
-        df = (
-            pd.DataFrame(bias_data)
-            .sort_values("date")
-            .reset_index(drop=True)
-        )
+                    preview.empty()
+            entry = analysis_entry(result, published_date(0))
+            with slot:
+                render_entry(0, entry)
+
+            all_results = [entry["parsed"]] if entry["parsed"] is not None else []
+            analyzed = entry["kind"] == "analyzed" and "error" not in entry["parsed"]
+            # Remembered across reruns so the reframe buttons below survive a click
+            st.session_state.reframe_articles = [(0, articles[0])] if analyzed else []
+
+            # Append to analysis history
+            if all_results:
+                (row_id,) = history_store.append(all_results)
+                history_frame.refresh()
+
+                if find_related_coverage and analyzed and len(articles[0].strip()) > 5:
+                    with st.spinner("Looking up related coverage..."):
+                        vectors = embed_articles(articles)
+                        # Query before inserting so an article never matches itself
+                        entry["related"] = related_coverage(vector_index, history_store, vectors[0])
+                        with slot:
+                            render_related(entry)
+                        vector_index.add([row_id], vectors)
+
+            st.session_state.analysis = {
+                "count": 1,
+                "entries": {0: entry},
+                "results": all_results,
+                "saved_calls": 0,
+                "local_count": int(analyzed and "classifier" in entry["parsed"]),
+                "failed_count": int(entry["kind"] == "failed"),
+                "cache_stats": response_cache.stats(),
+                "heatmap_figure": None,
+                "map_figure": None,
+                "map_warning": None
+            }
 
-        fig = px.scatter(
-            df,
-            x="date",
-            y="bias_score",
-            color="bias_label",
-            color_discrete_map={
-                "Left": "red",
-                "Center": "gray",
-                "Right": "blue"
-            },
-            hover_data={
-                "bias_label": True,
-                "snippet": True,
-                "date": True,
-                "bias_score": False
-            },
-            title="Political Bias Over Time",
-            labels={"bias_score": "Bias (Left/Center/Right)"}
+    elif "analysis" in st.session_state:
+        # Any other widget change: redraw the stored analysis without calling Gemini or refitting the map
+        analysis = st.session_state.analysis
+        if analysis.get("job_id") and analysis["failed_count"]:
+            if st.button(f"🔁 Retry {analysis['failed_count']} failed article(s)"):
+                if job_queue.retry(analysis["job_id"]):
+                    st.session_state.active_job = {
+                        "id": analysis["job_id"],
+                        "seq": 0,
+                        "entries": {idx: e for idx, e in analysis["entries"].items() if e["kind"] != "failed"}
+                    }
+                    st.session_state.pop("analysis")
+                    st.rerun()
+        for idx in range(analysis["count"]):
+            with st.container():
+                st.markdown(f"### 🌎🚨 Article {idx+1}")
+                render_entry(idx, analysis["entries"][idx], lazy_charts=analysis["count"] > 1)
+                render_related(analysis["entries"][idx])
+
+    if "active_job" in st.session_state:
+        job_panel()
+
+    analysis = st.session_state.get("analysis")
+    if analysis:
+        if analysis["saved_calls"]:
+            st.caption(f"🧬 Near-duplicate detection saved {analysis['saved_calls']} LLM call(s).")
+        if analysis.get("local_count"):
+            st.caption(f"🤖 The local classifier labelled {analysis['local_count']} article(s) without an LLM call.")
+
+        if analysis.get("job_error"):
+            st.error(f"🚫 The background job failed: {analysis['job_error']}")
+        if analysis["failed_count"]:
+            st.warning(
+                f"⚠️ {analysis['failed_count']} article(s) could not be analyzed. Completed articles are cached, "
+                "so clicking Analyze again only re-sends the failed ones."
+            )
+
+        cache_stats = analysis["cache_stats"]
+        st.caption(
+            f"⚡ Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} stored responses)"
         )
 
-        fig.update_yaxes(
-            tickvals=[-1, 0, 1],
-            ticktext=["Left", "Center", "Right"]
-        )
+        if analysis.get("heatmap_figure") is not None:
+            st.markdown("## 🧮 Bias × Emotion Across the Batch")
+            st.plotly_chart(analysis["heatmap_figure"], key="bias_emotion_heatmap")
+
+        if analysis["count"] >= 3:
+            st.markdown("## 🧭 Semantic Similarity Map")
+            if analysis["map_warning"]:
+                st.warning(analysis["map_warning"])
+            if analysis["map_figure"] is not None:
+                st.plotly_chart(analysis["map_figure"], key="semantic_clustering")
+
+# Neutral reframes
+with timed_stage("reframes"):
+    reframe_articles = st.session_state.get("reframe_articles", [])
+    if reframe_articles:
+        st.markdown("## ✍️ Neutral Rephrasing")
+        reframes = st.session_state.setdefault("reframes", {})  # finished rewrites by reframe_key
+        reframe_all = len(reframe_articles) > 1 and st.button("Reframe All Articles Neutrally")
+
+        reframe_slots = {}
+        button_slots = {}
+        requested = {}
+        for idx, art in reframe_articles:
+            key = reframe_key(art)
+            st.markdown(f"**Article {idx+1}:** _{art[:80]}..._")
+            reframe_slots.setdefault(key, []).append(st.empty())
+            if key in reframes:
+                reframe_slots[key][-1].write(reframes[key])
+                continue
+            button_slots.setdefault(key, []).append(st.empty())
+            if button_slots[key][-1].button(f"Reframe Article {idx+1} Neutrally", key=f"reframe_{idx}") or reframe_all:
+                requested[key] = art
+
+        if requested:
+            # Stream every requested rewrite at once; chunks arrive here from worker threads
+            partial = {key: "" for key in requested}
+            for key, chunk, error in iter_reframes(model, list(requested.items()), MAX_CONCURRENT_REQUESTS):
+                if chunk is not None:
+                    partial[key] += chunk
+                elif error is None:
+                    reframes[key] = partial[key]
+                    for slot in button_slots[key]:
+                        slot.empty()
+                for slot in reframe_slots[key]:
+                    if error is not None:
+                        slot.error(QUOTA_ERROR_MESSAGE if is_daily_quota_error(error) else f"🚫 Reframe failed: {error}")
+                    else:
+                        slot.write(partial[key] if chunk is None else partial[key] + " ▌")
+
+# Bias over time, across the whole analysis history
+with timed_stage("dashboard"):
+    if not history_frame.frame.empty:
+        # Rebuilt only when new analyses were saved, not on every widget change
+        dashboard = st.session_state.get("bias_dashboard")
+        if dashboard is None or dashboard["last_id"] != history_frame.last_id:
+            frame = history_frame.frame
+            daily = daily_aggregates(frame).reset_index()
+
+            fig = bias_over_time(daily, len(frame))
+            dashboard = {
+                "last_id": history_frame.last_id,
+                "figure": fig,
+                "sources": source_aggregates(frame).head(20).round(2)
+            }
+            st.session_state.bias_dashboard = dashboard
 
-        fig.update_traces(mode="lines+markers")
+        st.markdown("## 📈 Bias Over Time")
+        st.plotly_chart(dashboard["figure"], key="bias_over_time")
+        st.caption(
+            f"🎚️ Mean weighted tone across all analyses: "
+            f"{weighted_tone(history_frame.frame, emotion_weights).mean():.2f}"
+        )
 
-        st.plotly_chart(fig, key="bias_over_time")
+        with st.expander("📰 Bias by source"):
+            st.dataframe(dashboard["sources"])
 
 # Download results
-if all_results:
-    st.download_button(
-        label="🧪 Download Results as JSON",
-        data=json.dumps(all_results, indent=2),
-        file_name="narrative_lens_results.json",
-        mime="application/json"
-    )
+with timed_stage("exports"):
+    all_results = analysis["results"] if analysis else []
+    if all_results:
+        st.markdown("## 📤 Export")
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS), format_func=str.upper, key="export_format")
+        extension, mime = EXPORT_FORMATS[export_format]
+        # Built on click in a background thread, into a per-request buffer
+        st.download_button(
+            label=f"⬇️ Download results as {export_format.upper()}",
+            data=lambda: export_bytes(all_results, export_format),
+            file_name=f"narrative_lens_results{extension}",
+            mime=mime,
+            on_click="ignore"
+        )
 
-if all_results:
-    if st.button("📄 Download PDF Report"):
-        create_pdf_report(all_results)
-        with open("narrative_lens_report.pdf", "rb") as f:
+    if history_store.count():
+        with st.expander("🗄️ Export full history"):
+            history_format = st.selectbox(
+                "Format", list(EXPORT_FORMATS), index=list(EXPORT_FORMATS).index("jsonl"),
+                format_func=str.upper, key="history_export_format"
+            )
+            extension, mime = EXPORT_FORMATS[history_format]
             st.download_button(
-                label="Download NarrativeLens_Report.pdf",
-                data=f,
-                file_name="narrative_lens_report.pdf",
-                mime="application/pdf"
-            )
\ No newline at end of file
+                label=f"⬇️ Download history as {history_format.upper()}",
+                data=lambda: export_bytes(history_store.iter_records(), history_format),
+                file_name=f"narrative_lens_history{extension}",
+                mime=mime,
+                on_click="ignore"
+            )
+            st.caption("For very large histories, `python app/export.py -f jsonl -o history.jsonl` streams to disk.")
+
+# 🩺 Where this rerun spent its time, plus process-wide pipeline metrics
+if SHOW_DIAGNOSTICS:
+    with st.sidebar.expander("🩺 Diagnostics"):
+        st.markdown("**This rerun**")
+        for name, seconds in rerun_timings:
+            st.caption(f"{name}: {seconds * 1000:.1f} ms")
+        st.caption(f"**total: {(time.perf_counter() - script_start) * 1000:.1f} ms**")
+
+        st.markdown("**Since server start**")
+        requests_ok = metrics.total("narrativelens_llm_requests_total", outcome="ok")
+        requests_failed = metrics.total("narrativelens_llm_requests_total", outcome="error")
+        st.caption(
+            f"Gemini requests: {requests_ok} ok, {requests_failed} failed · "
+            f"parse failures: {metrics.total('narrativelens_parse_failures_total')}"
+        )
+        st.caption(
+            f"Tokens: {metrics.total('narrativelens_llm_tokens_total', kind='prompt')} prompt, "
+            f"{metrics.total('narrativelens_llm_tokens_total', kind='output')} output"
+        )
+        st.caption(
+            f"Response cache: {metrics.total('narrativelens_cache_requests_total', result='hit')} hits, "
+            f"{metrics.total('narrativelens_cache_requests_total', result='miss')} misses · "
+            f"local labels: {metrics.total('narrativelens_local_labels_total')}"
+        )
+        limiter = getattr(getattr(model, "model", None), "limiter", None)
+        if limiter is not None:
+            limits = limiter.stats()
+            st.caption(
+                f"Rate limiter: {limits['requests_per_minute']} req/min, "
+                f"{limits['tokens_per_minute']} tokens/min, throttled {limits['throttled']}×"
+            )
+        summary = metrics.stage_summary()
+        if summary:
+            st.dataframe(
+                [
+                    {"stage": name, "runs": s["count"], "total s": round(s["total"], 3),
+                     "mean ms": round(s["mean"] * 1000, 1)}
+                    for name, s in sorted(summary.items(), key=lambda item: -item[1]["total"])
+                ],
+                hide_index=True
+            )
+
+if METRICS_PORT or METRICS_PATH:
+    start_metrics_exporters(METRICS_PORT, METRICS_PATH, METRICS_INTERVAL)
+
+if PREWARM != "0":
+    prewarm(PREWARM_MODULES, load_embedding_model=PREWARM == "model")
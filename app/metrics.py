@@ -0,0 +1,217 @@
+"""Process-wide counters and stage timers, exported in Prometheus text format.
+
+Instrumented code uses the module-level ``metrics`` registry:
+
+    with stage("embedding"):
+        ...
+    @timed("fetch")
+    def fetch(...): ...
+    metrics.inc("narrativelens_parse_failures_total", prompt="single")
+
+Recording is a dict lookup and a few additions under a lock, a few
+microseconds at most (see benchmarks/bench_metrics.py) against LLM calls
+that take hundreds of milliseconds, so it is safe on per-article paths. ``prometheus_text`` renders
+everything for a scrape; ``serve`` exposes it over HTTP and
+``export_periodically`` writes it to a file (e.g. for node_exporter's
+textfile collector).
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGE_METRIC = "narrativelens_stage_seconds"
+# Histogram bucket upper bounds (seconds) for stage durations
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_EXPORT_INTERVAL = 15.0
+
+HELP = {
+    STAGE_METRIC: "Time spent in each pipeline stage.",
+    "narrativelens_llm_requests_total": "Gemini requests by prompt type and outcome.",
+    "narrativelens_llm_tokens_total": "Tokens reported in Gemini usage metadata.",
+    "narrativelens_parse_failures_total": "LLM responses that could not be parsed into an analysis.",
+    "narrativelens_cache_requests_total": "Response cache lookups by result.",
+    "narrativelens_cache_rejected_total": "Fresh responses not cached because they failed to parse.",
+    "narrativelens_embeddings_total": "Article embeddings by source (cache or model).",
+    "narrativelens_local_labels_total": "Articles labelled by the local classifier instead of Gemini.",
+}
+
+
+def _key(name, labels):
+    items = tuple(labels.items())
+    return name, (items if len(items) < 2 else tuple(sorted(items)))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class _Timer:
+    """Context manager recording its duration; ``elapsed`` is set on exit."""
+
+    __slots__ = ("registry", "name", "labels", "start", "elapsed")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.elapsed = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        self.registry.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+class Metrics:
+    """Counters and fixed-bucket histograms keyed by name and labels."""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}  # key -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[slot] += 1
+            histogram[-1] += value
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    def stage(self, stage):
+        """Time a block as one run of pipeline stage ``stage``."""
+        return _Timer(self, STAGE_METRIC, {"stage": stage})
+
+    def timed(self, stage):
+        """Decorator form of ``stage``."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def counters(self, name):
+        """{labels dict as tuple of pairs: value} for one counter."""
+        with self._lock:
+            return {labels: value for (n, labels), value in self._counters.items() if n == name}
+
+    def total(self, name, **labels):
+        """Sum of a counter over every label set matching ``labels``."""
+        wanted = set(labels.items())
+        return sum(v for pairs, v in self.counters(name).items() if wanted <= set(pairs))
+
+    def stage_summary(self):
+        """{stage: {"count", "total", "mean"}} for the diagnostics panel."""
+        with self._lock:
+            items = [(dict(labels), h[:]) for (n, labels), h in self._histograms.items() if n == STAGE_METRIC]
+        summary = {}
+        for labels, histogram in items:
+            count = sum(histogram[:-1])
+            summary[labels.get("stage", "")] = {
+                "count": count, "total": histogram[-1], "mean": histogram[-1] / count if count else 0.0
+            }
+        return summary
+
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, h[:]) for k, h in self._histograms.items())
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-1]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        lines.append("# TYPE narrativelens_start_time_seconds gauge")
+        lines.append(f"narrativelens_start_time_seconds {self.started}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+metrics = Metrics()
+stage = metrics.stage
+timed = metrics.timed
+
+
+def serve(port, registry=metrics, host="0.0.0.0"):
+    """Serve ``/metrics`` in Prometheus text format from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # scrapes every few seconds would flood the app's log
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="narrativelens-metrics", daemon=True).start()
+    return server
+
+
+def export_periodically(path, interval=DEFAULT_EXPORT_INTERVAL, registry=metrics):
+    """Rewrite ``path`` with the current metrics every ``interval`` seconds from a daemon thread."""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            registry.write(path)
+
+    registry.write(path)
+    threading.Thread(target=loop, name="narrativelens-metrics-file", daemon=True).start()
+    return stop
@@ -0,0 +1,192 @@
+"""PDF reports: a summary page of aggregate charts, then one section per article."""
+import os
+from collections import Counter
+
+from fpdf import FPDF
+
+SUMMARY_TOP_N = 10
+
+# A TTF with wide Unicode coverage; the first one found is used for PDFs
+PDF_FONT_CANDIDATES = (
+    os.getenv("NARRATIVELENS_PDF_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+)
+BAR_COLORS = {
+    "left": (52, 101, 164),
+    "center": (136, 138, 133),
+    "right": (204, 0, 0),
+}
+DEFAULT_BAR_COLOR = (114, 159, 207)
+
+
+def find_pdf_font():
+    for path in PDF_FONT_CANDIDATES:
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+class ReportSummary:
+    """Label counts gathered while the article pages are being written."""
+
+    def __init__(self):
+        self.total = 0
+        self.bias = Counter()
+        self.emotion = Counter()
+        self.framing = Counter()
+        self.source = Counter()
+
+    def add(self, result):
+        self.total += 1
+        self.bias[str(result.get("bias") or "unknown").strip().lower()] += 1
+        for emotion in str(result.get("emotion") or "").lower().split(","):
+            if emotion.strip():
+                self.emotion[emotion.strip()] += 1
+        self.framing[str(result.get("framing") or "unknown").strip().lower()] += 1
+        self.source[str(result.get("source") or "Unknown").strip()] += 1
+
+
+class ReportPDF(FPDF):
+    """A4 report in a Unicode TTF font, falling back to core Helvetica.
+
+    Without a TTF the text is reduced to Latin-1, so characters the core
+    fonts cannot show become "?" instead of failing the whole export.
+    """
+
+    def __init__(self, font_path=None):
+        super().__init__()
+        self.set_auto_page_break(auto=True, margin=15)
+        self.set_compression(True)
+        font_path = font_path or find_pdf_font()
+        if font_path:
+            self.add_font("Report", "", font_path)
+            bold = font_path.replace(".ttf", "-Bold.ttf")
+            self.add_font("Report", "B", bold if os.path.isfile(bold) else font_path)
+            self.report_family = "Report"
+            self.report_unicode = True
+        else:
+            self.report_family = "helvetica"
+            self.report_unicode = False
+        self._widths = {}
+
+    def clean(self, value):
+        value = str(value)
+        if not self.report_unicode:
+            value = value.encode("latin-1", "replace").decode("latin-1")
+        return value
+
+    def use_font(self, style="", size=11):
+        self.set_font(self.report_family, style, size)
+
+    def _width(self, word):
+        key = (self.font_style, self.font_size_pt, word)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = self.get_string_width(word)
+        return width
+
+    def _wrap(self, text, width):
+        """Greedy word wrap using cached word widths.
+
+        ``multi_cell`` re-measures the growing line on every character, which
+        made long reports take minutes; words repeat heavily across articles,
+        so measuring each distinct word once is far cheaper.
+        """
+        space = self._width(" ")
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0.0
+            for word in paragraph.split():
+                word_width = self._width(word)
+                while word_width > width:  # a single word wider than the page
+                    cut = max(1, int(len(word) * width / word_width))
+                    if line:
+                        yield " ".join(line)
+                        line, line_width = [], 0.0
+                    yield word[:cut]
+                    word = word[cut:]
+                    word_width = self._width(word)
+                if line and line_width + space + word_width > width:
+                    yield " ".join(line)
+                    line, line_width = [], 0.0
+                line_width += word_width + (space if line else 0.0)
+                line.append(word)
+            yield " ".join(line)
+
+    def paragraph(self, text, h=6):
+        for line in self._wrap(self.clean(text), self.epw):
+            self.cell(0, h, line, new_x="LMARGIN", new_y="NEXT")
+
+    def footer(self):
+        self.set_y(-12)
+        self.use_font("", 8)
+        self.cell(0, 8, f"NarrativeLens report - page {self.page_no()}", align="C")
+
+    def bar_chart(self, title, counts, top_n=SUMMARY_TOP_N):
+        """Horizontal bars for the ``top_n`` most common labels."""
+        items = counts.most_common(top_n)
+        if not items:
+            return
+        self.use_font("B", 12)
+        self.cell(0, 8, self.clean(title), new_x="LMARGIN", new_y="NEXT")
+        label_w, count_w, row_h = 55, 18, 6
+        bar_w = self.epw - label_w - count_w
+        peak = items[0][1]
+        self.use_font("", 9)
+        for label, count in items:
+            x, y = self.l_margin, self.get_y()
+            self.cell(label_w, row_h, self.clean(label)[:40])
+            self.set_fill_color(*BAR_COLORS.get(label, DEFAULT_BAR_COLOR))
+            self.rect(x + label_w, y + 1, max(bar_w * count / peak, 0.5), row_h - 2, style="F")
+            self.set_x(x + label_w + bar_w)
+            self.cell(count_w, row_h, str(count), align="R", new_x="LMARGIN", new_y="NEXT")
+        self.ln(4)
+
+
+def _render_summary(summary):
+    def render(pdf, outline):
+        pdf.use_font("B", 16)
+        pdf.cell(0, 10, "NarrativeLens Analysis Report", align="C", new_x="LMARGIN", new_y="NEXT")
+        pdf.use_font("", 11)
+        pdf.cell(0, 8, f"{summary.total} articles analyzed", align="C", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(4)
+        pdf.bar_chart("Political bias", summary.bias)
+        pdf.bar_chart("Top emotional tones", summary.emotion)
+        pdf.bar_chart("Top framing styles", summary.framing)
+        pdf.bar_chart("Top predicted sources", summary.source)
+    return render
+
+
+def write_pdf(results, f, font_path=None):
+    """Summary page with aggregate charts, then one section per article.
+
+    The summary page is reserved up front and drawn at output time from
+    counts collected in the same pass, so ``results`` is only iterated once.
+    """
+    pdf = ReportPDF(font_path)
+    summary = ReportSummary()
+    pdf.add_page()
+    pdf.insert_toc_placeholder(_render_summary(summary), pages=1, allow_extra_pages=True)
+    for idx, result in enumerate(results):
+        summary.add(result)
+        pdf.use_font("B", 13)
+        pdf.cell(0, 9, f"Article {idx + 1}", new_x="LMARGIN", new_y="NEXT")
+        pdf.use_font("", 11)
+        for label, field in (
+            ("Title", "title"),
+            ("Published", "published"),
+            ("Political Bias", "bias"),
+            ("Emotional Tone", "emotion"),
+            ("Framing Style", "framing"),
+            ("Predicted Source", "source"),
+        ):
+            if result.get(field):
+                pdf.paragraph(f"{label}: {result[field]}")
+        pdf.paragraph(f"Omitted Perspectives:\n{result.get('omissions', '')}")
+        pdf.ln(4)
+    pdf.output(f)
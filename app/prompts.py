@@ -1,9 +1,101 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prompts")
+# How often (seconds) a template's file is re-checked for edits
+RELOAD_INTERVAL = 1.0
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_BATCH_ID = re.compile(r"^\[id=([^\]]+)\]$", re.MULTILINE)
+
+
+class PromptTemplate:
+    """A template pre-split around its ``{name}`` placeholders.
+
+    Rendering joins the literal chunks with the supplied values instead of
+    scanning the whole template for every article. Braces that are not a
+    bare ``{word}`` (e.g. JSON examples), and placeholders no value is given
+    for, are left as they are.
+    """
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        pieces = _PLACEHOLDER.split(text)
+        self._chunks = pieces[0::2]
+        self._fields = pieces[1::2]
+
+    def render(self, **values):
+        parts = [self._chunks[0]]
+        for field, chunk in zip(self._fields, self._chunks[1:]):
+            parts.append(values.get(field, f"{{{field}}}"))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def matches(self, text):
+        """Whether ``text`` could have been rendered from this template."""
+        head, tail = self._chunks[0], self._chunks[-1] if self._fields else ""
+        return len(text) >= len(head) + len(tail) and text.startswith(head) and text.endswith(tail)
+
+
+class PromptRegistry:
+    """Templates from ``prompts/``, loaded once and hot-reloaded on edit.
+
+    Paths resolve relative to the package, not the working directory. Each
+    template's ``version`` is a hash of its text, so it changes exactly when
+    the prompt does and can be stored next to results or used in cache keys.
+    """
+
+    def __init__(self, directory=PROMPTS_DIR, reload_interval=RELOAD_INTERVAL):
+        self.directory = os.path.abspath(directory)
+        self.reload_interval = reload_interval
+        self._templates = {}  # name -> (template, mtime, last_checked)
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def get(self, name):
+        now = time.monotonic()
+        entry = self._templates.get(name)
+        if entry is not None and now - entry[2] < self.reload_interval:
+            return entry[0]
+        with self._lock:
+            entry = self._templates.get(name)
+            mtime = os.stat(self._path(name)).st_mtime_ns
+            if entry is None or entry[1] != mtime:
+                with open(self._path(name), "r", encoding="utf-8") as f:
+                    template = PromptTemplate(name, f.read())
+            else:
+                template = entry[0]
+            self._templates[name] = (template, mtime, now)
+        return template
+
+    def render(self, name, **values):
+        return self.get(name).render(**values)
+
+    def version(self, name):
+        return self.get(name).version
+
+
+registry = PromptRegistry()
+
+
 def get_bias_prompt(article):
-    with open("prompts/bias_prompt.txt", "r") as f:
-        template = f.read()
-    return template.replace("{article}", article)
+    return registry.render("bias_prompt", article=article)
 
 def get_reframe_prompt(article):
-    with open("prompts/reframe_prompt.txt","r") as f:
-        template = f.read()
-    return template.replace("{article}", article)
+    return registry.render("reframe_prompt", article=article)
+
+def get_batch_bias_prompt(items):
+    """Build one prompt for several articles; ``items`` is a list of (id, text)."""
+    articles = "\n\n".join(f"[id={article_id}]\n{text}" for article_id, text in items)
+    return registry.render("batch_bias_prompt", articles=articles)
+
+def batch_prompt_ids(prompt):
+    """The article ids in a prompt built by get_batch_bias_prompt, in order."""
+    return _BATCH_ID.findall(prompt)
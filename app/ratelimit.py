@@ -0,0 +1,170 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+
+_RETRY_DELAY_PATTERNS = [
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry in\s*([\d.]+)\s*s", re.IGNORECASE),
+]
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for budgeting."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limit_error(exc):
+    return getattr(exc, "code", None) == 429 or "429" in str(exc)
+
+
+def is_daily_quota_error(exc):
+    """Daily quotas will not recover within a batch, so retrying is pointless."""
+    message = str(exc).lower()
+    return is_rate_limit_error(exc) and ("perday" in message or "per day" in message)
+
+
+def retry_delay_hint(exc):
+    """Extract the server-suggested retry delay in seconds, if any."""
+    message = str(exc)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` units per ``period`` seconds."""
+
+    def __init__(self, rate, period=60.0, capacity=None):
+        self.period = period
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, capacity)
+        self._tokens = self.capacity
+
+    def set_rate(self, rate, capacity=None):
+        with self._lock:
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.period)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Block until ``amount`` units are available; return seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= needed
+                    return waited
+                delay = (needed - self._tokens) * self.period / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AdaptiveRateLimiter:
+    """Requests- and tokens-per-period budgets that adapt to 429 responses.
+
+    On a 429 the budget that was exceeded is reset to just under the
+    successful throughput observed over the last period, which is the best
+    available estimate of the real quota. Successes then probe upwards by roughly
+    ``growth`` per period so the limiter converges on the highest throughput
+    the quota allows.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, period=60.0,
+                 min_requests=1, safety=0.9, growth=0.1):
+        self.period = period
+        self.growth = growth
+        self.min_requests = min_requests
+        self.safety = safety
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute, period)
+        self.tokens = TokenBucket(tokens_per_minute, period)
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._history = deque()
+
+    def _observed(self, now):
+        while self._history and now - self._history[0][0] > self.period:
+            self._history.popleft()
+        return len(self._history), sum(t for _, t in self._history)
+
+    def acquire(self, tokens=1):
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+    def on_success(self, tokens=1):
+        with self._lock:
+            self._history.append((time.monotonic(), tokens))
+            step = 1 + self.growth / self.requests_per_minute
+            self.requests_per_minute *= step
+            self.tokens_per_minute *= step
+            self.requests.set_rate(self.requests_per_minute)
+            self.tokens.set_rate(self.tokens_per_minute)
+
+    def on_throttle(self, exc):
+        with self._lock:
+            self.throttled += 1
+            observed_requests, observed_tokens = self._observed(time.monotonic())
+            if "token" in str(exc).lower() and observed_tokens:
+                self.tokens_per_minute = max(1.0, observed_tokens * self.safety)
+                self.tokens.set_rate(self.tokens_per_minute)
+            else:
+                ceiling = observed_requests or self.requests_per_minute / 2
+                self.requests_per_minute = max(self.min_requests, ceiling * self.safety)
+                self.requests.set_rate(self.requests_per_minute)
+
+    def stats(self):
+        return {
+            "requests_per_minute": round(self.requests_per_minute, 2),
+            "tokens_per_minute": round(self.tokens_per_minute),
+            "throttled": self.throttled
+        }
+
+
+class RateLimitedModel:
+    """Wrap a model client with client-side rate limiting and 429 retries.
+
+    Retries use exponential backoff with full jitter, never waiting less than
+    the delay the server suggests. Daily quota errors are raised immediately.
+    """
+
+    def __init__(self, model, limiter=None, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.model = model
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def generate_content(self, prompt, **kwargs):
+        attempt = 0
+        tokens = estimate_tokens(prompt)
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or is_daily_quota_error(e) or attempt >= self.max_retries:
+                    raise
+                self.limiter.on_throttle(e)
+                backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                time.sleep(max(backoff, retry_delay_hint(e) or 0))
+                attempt += 1
+                continue
+            self.limiter.on_success(tokens)
+            return response
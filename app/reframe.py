@@ -0,0 +1,54 @@
+import hashlib
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import stage
+from prompts import get_reframe_prompt, registry
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def reframe_key(article):
+    """Key a finished reframe by the article text and the reframe prompt version."""
+    digest = hashlib.sha256(f"{registry.version('reframe_prompt')}\0{article}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def stream_reframe(model, article):
+    """Yield the neutral rewrite of ``article`` as Gemini produces it."""
+    with stage("reframe"):
+        for chunk in model.generate_content(get_reframe_prompt(article), stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+def iter_reframes(model, articles, max_workers=DEFAULT_MAX_WORKERS):
+    """Stream several reframes at once from a thread pool.
+
+    ``articles`` is a list of (key, text). Yields (key, chunk, error) in the
+    calling thread as chunks arrive from any worker; ``chunk`` is None once
+    that reframe has finished, with ``error`` set if it failed.
+    """
+    events = queue.Queue()
+
+    def worker(key, article):
+        try:
+            for text in stream_reframe(model, article):
+                events.put((key, text, None))
+            events.put((key, None, None))
+        except Exception as e:
+            events.put((key, None, e))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+    try:
+        for key, article in articles:
+            executor.submit(worker, key, article)
+        remaining = len(articles)
+        while remaining:
+            event = events.get()
+            if event[1] is None:
+                remaining -= 1
+            yield event
+    finally:
+        # Streams already running finish in the background and still land in the response cache
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,24 +1,160 @@
-import requests
+import hashlib
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import timed
+
+# Override to point ingestion at a local stub server in tests
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2")
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_TTL = 300
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+_CACHE_MAX_ENTRIES = 256
+
+logger = logging.getLogger(__name__)
+
+
+class NewsAPIError(Exception):
+    pass
+
+
+_session = None
+_session_lock = threading.Lock()
+_cache = OrderedDict()  # least recently used first
+_cache_lock = threading.Lock()
+
+
+def get_session(pool_size=16):
+    """Return a shared, connection-pooled session with retries on 5xx."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                              allowed_methods=["GET"])
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def fetch_page(query, page=1, page_size=DEFAULT_PAGE_SIZE, base_url=None, api_key=None,
+               ttl=DEFAULT_CACHE_TTL, timeout=DEFAULT_TIMEOUT):
+    """Fetch one page of NewsAPI /everything results.
+
+    Responses are reused for ``ttl`` seconds; after that the request is
+    revalidated with the stored ETag so an unchanged page costs a 304.
+    """
+    base_url = (base_url or NEWSAPI_BASE_URL).rstrip("/")
+    params = {
+        "q": query,
+        "language": "en",
+        "sortBy": "publishedAt",
+        "pageSize": min(page_size, MAX_PAGE_SIZE),
+        "page": page
+    }
+    key = (base_url, tuple(sorted(params.items())))
+    now = time.time()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    if cached and now - cached["fetched"] < ttl:
+        return cached["data"]
+
+    headers = {"X-Api-Key": api_key or os.getenv("NEWSAPI_KEY") or ""}
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    response = get_session().get(f"{base_url}/everything", params=params, headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and cached:
+        data = cached["data"]
+    else:
+        data = response.json()
+        if "articles" not in data:
+            raise NewsAPIError(data.get("message", "Unknown error from NewsAPI."))
+
+    with _cache_lock:
+        _cache[key] = {"fetched": now, "etag": response.headers.get("ETag"), "data": data}
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return data
+
+
+def to_article(item):
+    return {
+        "title": item["title"],
+        "summary": item["description"],
+        "link": item["url"],
+        "published": item["publishedAt"]
+    }
+
+
+def content_hash(article):
+    text = f"{article.get('title') or ''}\n{article.get('summary') or ''}"
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+def iter_articles(queries, max_pages=1, page_size=DEFAULT_PAGE_SIZE, max_workers=4, base_url=None):
+    """Yield articles for one or more queries, fetching pages concurrently.
+
+    Page 1 of every query is fetched first to learn how many results exist;
+    the remaining pages are then requested in parallel. Articles are yielded
+    as soon as their page arrives, skipping repeats by URL or content hash.
+    A failed first page raises; a later page that fails (for example past
+    NewsAPI's result limit) is logged and skipped.
+    """
+    if isinstance(queries, str):
+        queries = [queries]
+    seen_urls, seen_hashes = set(), set()
+
+    def unseen(data):
+        for item in data["articles"]:
+            article = to_article(item)
+            digest = content_hash(article)
+            if article["link"] in seen_urls or digest in seen_hashes:
+                continue
+            seen_urls.add(article["link"])
+            seen_hashes.add(digest)
+            yield article
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        first_pages = {
+            executor.submit(fetch_page, q, 1, page_size, base_url): q for q in queries
+        }
+        more_pages = {}
+        for future in as_completed(first_pages):
+            data = future.result()
+            yield from unseen(data)
+            total_pages = -(-data.get("totalResults", 0) // min(page_size, MAX_PAGE_SIZE))
+            query = first_pages[future]
+            for page in range(2, min(max_pages, total_pages) + 1):
+                more_pages[executor.submit(fetch_page, query, page, page_size, base_url)] = (query, page)
+        for future in as_completed(more_pages):
+            try:
+                data = future.result()
+            except (NewsAPIError, requests.RequestException) as e:
+                query, page = more_pages[future]
+                logger.warning("Skipping page %d of %r: %s", page, query, e)
+                continue
+            yield from unseen(data)
+
 
+@timed("fetch")
 def fetch_articles_newsapi(query, max_articles=5):
-    api_key = os.getenv("NEWSAPI_KEY")
-    url = (
-        f"https://newsapi.org/v2/everything?"
-        f"q={query}&language=en&pageSize={max_articles}&sortBy=publishedAt&apiKey={api_key}"
-    )
-    response = requests.get(url)
-    data = response.json()
-
-    if "articles" not in data:
-        return {"error": data.get("message", "Unknown error from NewsAPI.")}
-
-    articles = []
-    for item in data["articles"]:
-        articles.append({
-            "title": item["title"],
-            "summary": item["description"],
-            "link": item["url"],
-            "published": item["publishedAt"]
-        })
-    return articles
+    try:
+        return list(iter_articles(query, max_pages=1, page_size=max_articles))
+    except (NewsAPIError, requests.RequestException) as e:
+        return {"error": str(e)}
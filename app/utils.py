@@ -1,17 +1,241 @@
 import json
+import re
+
+# Canonical analysis fields, their legacy aliases and the defaults for optional ones
+ANALYSIS_FIELDS = {
+    "bias": ("Political Bias",),
+    "emotion": ("Emotional Tone",),
+    "framing": ("Framing Style",),
+    "omissions": ("Omitted Viewpoints", "Omitted Perspectives"),
+    "source": ("Predicted Source",),
+}
+REQUIRED_FIELDS = ("bias", "emotion", "framing")
+OPTIONAL_DEFAULTS = {"omissions": "None found", "source": "Unknown"}
+BIAS_LABELS = {"left", "center", "right"}
+
+_ALIASES = {alias: field for field, aliases in ANALYSIS_FIELDS.items() for alias in aliases}
+_STRUCTURAL = re.compile(r'["{}\[\]:,]')
+_STRING_END = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class _JSONScanner:
+    """Single-pass, resumable scanner for the first balanced JSON value.
+
+    Tracks string literals and nesting depth so braces inside strings or
+    surrounding prose do not confuse it. For objects it also records each
+    top-level field as soon as its value is complete, which lets callers
+    render fields before the whole response has streamed in.
+    """
+
+    def __init__(self, opener="{"):
+        self.opener = opener
+        self.buffer = ""
+        self.pos = 0
+        self.start = None
+        self.end = None
+        self.depth = 0
+        self.in_string = False
+        self.string_start = None
+        self.expect_key = True
+        self.key = None
+        self.value_start = None
+        self.fields = {}
+
+    def feed(self, chunk):
+        """Add text and return the top-level fields completed by it."""
+        self.buffer += chunk
+        return self._scan()
+
+    def _complete(self, token, completed):
+        try:
+            value = json.loads(token)
+        except ValueError:
+            return
+        self.fields[self.key] = completed[self.key] = value
+
+    def _scan(self):
+        buf, i, n = self.buffer, self.pos, len(self.buffer)
+        completed = {}
+        while i < n and self.end is None:
+            if self.start is None:
+                i = buf.find(self.opener, i)
+                if i < 0:
+                    i = n
+                    break
+                self.start, self.depth, self.expect_key = i, 1, True
+                i += 1
+                continue
+
+            if self.in_string:
+                match = _STRING_END.search(buf, i)
+                if match is None:
+                    i = n
+                    break
+                if match.group() == "\\":
+                    i = match.start() + 2  # skip the escaped character
+                    continue
+                i = match.end()
+                self.in_string = False
+                if self.depth == 1 and self.opener == "{":
+                    token = buf[self.string_start:i]
+                    if self.expect_key:
+                        try:
+                            self.key = json.loads(token)
+                        except ValueError:
+                            self.key = None
+                    elif self.key is not None:
+                        self._complete(token, completed)
+                continue
+
+            match = _STRUCTURAL.search(buf, i)
+            if match is None:
+                i = n
+                break
+            ch, i = match.group(), match.end()
+            if ch == '"':
+                self.in_string, self.string_start = True, match.start()
+            elif ch in "{[":
+                self.depth += 1
+                if self.depth == 2 and not self.expect_key:
+                    self.value_start = match.start()
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = i
+                elif self.depth == 1 and self.value_start is not None:
+                    if self.key is not None:
+                        self._complete(buf[self.value_start:i], completed)
+                    self.value_start = None
+            elif self.depth == 1 and ch == ":":
+                self.expect_key = False
+            elif self.depth == 1 and ch == ",":
+                self.expect_key, self.key = True, None
+        self.pos = i
+        return completed
+
+    @property
+    def complete(self):
+        return self.end is not None
+
+    def text(self):
+        return self.buffer[self.start:self.end]
+
+
+def extract_json(text, opener="{"):
+    """Return the first balanced JSON object (or array) embedded in ``text``.
+
+    Code fences, leading and trailing prose and trailing commas are tolerated.
+    Raises ValueError when no parseable value is found.
+    """
+    stripped = text.strip()
+    if stripped.startswith(opener):
+        # Fast path: the response is nothing but the JSON value
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+
+    offset = 0
+    while True:
+        scanner = _JSONScanner(opener)
+        scanner.feed(text[offset:] if offset else text)
+        if scanner.start is None:
+            raise ValueError("No JSON found in response")
+        if not scanner.complete:
+            raise ValueError("Unterminated JSON in response")
+        candidate = scanner.text()
+        for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                continue
+        # Something brace-like in the prose; look for the next candidate
+        offset += scanner.start + 1
+
+
+def _canonical_fields(data):
+    fields = {}
+    for key, value in data.items():
+        field = key if key in ANALYSIS_FIELDS else _ALIASES.get(key)
+        if field is not None and field not in fields and value not in (None, ""):
+            fields[field] = value
+    return fields
+
+
+def _as_text(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v).strip() for v in value)
+    return str(value).strip()
+
+
+def validate_analysis(data):
+    """Check a decoded response against the analysis schema and normalize it."""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    fields = _canonical_fields(data)
+    missing = [f for f in REQUIRED_FIELDS if f not in fields]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    result = {field: _as_text(value) for field, value in fields.items()}
+    for field, default in OPTIONAL_DEFAULTS.items():
+        result.setdefault(field, default)
+    if result["bias"].lower() in BIAS_LABELS:
+        result["bias"] = result["bias"].lower()
+    return result
+
 
 def parse_llm_response(response_text):
     try:
-        # Remove wrapping backticks and optional 'json' label
-        cleaned = response_text.strip().strip("```").replace("json", "", 1).strip()
-        data = json.loads(cleaned)
+        return validate_analysis(extract_json(response_text))
+    except Exception as e:
+        return {"error": "Failed to parse response", "details": str(e)}
+
+
+class StreamingAnalysisParser:
+    """Parse a bias analysis incrementally from ``stream=True`` chunks.
 
-        return {
-            "bias": data.get("bias") or data.get("Political Bias", "Unknown"),
-            "emotion": data.get("emotion") or data.get("Emotional Tone", "Unknown"),
-            "framing": data.get("framing") or data.get("Framing Style", "Unknown"),
-            "omissions": data.get("omissions") or data.get("Omitted Viewpoints", "None found")
-        }
+    ``feed`` returns the fields completed by each chunk (keyed by canonical
+    name) so the UI can render them early; ``result`` gives the final,
+    validated analysis once the stream has ended.
+    """
 
+    def __init__(self):
+        self._scanner = _JSONScanner("{")
+        self._parts = []
+
+    def feed(self, chunk):
+        self._parts.append(chunk)
+        return {k: _as_text(v) for k, v in _canonical_fields(self._scanner.feed(chunk)).items()}
+
+    @property
+    def fields(self):
+        return {k: _as_text(v) for k, v in _canonical_fields(self._scanner.fields).items()}
+
+    def result(self):
+        return parse_llm_response("".join(self._parts))
+
+
+def parse_batch_response(response_text, ids):
+    """Parse an ID-tagged JSON array from a batched prompt.
+
+    Returns a dict mapping each requested id to a parsed analysis, or to an
+    error dict when the model skipped or mangled that article.
+    """
+    ids = [str(i) for i in ids]
+    results = {i: {"error": "Failed to parse response", "details": "Missing from batch response"} for i in ids}
+    try:
+        items = extract_json(response_text, opener="[")
     except Exception as e:
-        return {"error": "Failed to parse response", "details": str(e)}
+        for i in ids:
+            results[i] = {"error": "Failed to parse response", "details": str(e)}
+        return results
+
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and str(item.get("id")) in results:
+            try:
+                results[str(item["id"])] = validate_analysis(item)
+            except ValueError as e:
+                results[str(item["id"])] = {"error": "Failed to parse response", "details": str(e)}
+    return results
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = "vector_index"
+# Exact search stays in the low milliseconds up to roughly this many vectors
+BRUTE_FORCE_MAX = 50_000
+DEFAULT_NPROBE = 8
+_INITIAL_CAPACITY = 1024
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores, k):
+    k = min(k, scores.shape[0])
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class VectorIndex:
+    """Persistent cosine-similarity index over analyzed article embeddings.
+
+    Vectors live in a memory-mapped float32 .npy file next to an id map that
+    points each row at its analysis-history record. Small indexes are
+    searched exactly; once the index outgrows BRUTE_FORCE_MAX it trains an
+    IVF (inverted file) layer of k-means centroids and only scans the
+    ``nprobe`` closest lists per query. Inserts are incremental in both modes.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_DIR, dim=384):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            self.dim, self.count = meta["dim"], meta["count"]
+            self._vectors = np.load(self._file("vectors"), mmap_mode="r+")
+            self._ids = np.load(self._file("ids"), mmap_mode="r+")
+            self._assignments = np.load(self._file("assignments"), mmap_mode="r+")
+        else:
+            self.dim, self.count = dim, 0
+            self._allocate(_INITIAL_CAPACITY)
+        self._load_ivf()
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _allocate(self, capacity):
+        """Create (or grow into) memory-mapped arrays holding ``capacity`` rows."""
+        arrays = {}
+        for name, dtype, shape, fill in (
+            ("vectors", np.float32, (capacity, self.dim), 0),
+            ("ids", np.int64, (capacity,), -1),
+            ("assignments", np.int32, (capacity,), -1),
+        ):
+            tmp_path = self._file(name) + ".tmp"
+            array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+            array[:] = fill
+            if self.count:
+                array[:self.count] = getattr(self, f"_{name}")[:self.count]
+            array.flush()
+            del array
+            os.replace(tmp_path, self._file(name))
+            arrays[name] = np.load(self._file(name), mmap_mode="r+")
+        self._vectors, self._ids, self._assignments = arrays["vectors"], arrays["ids"], arrays["assignments"]
+
+    def _save_meta(self):
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "count": self.count}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def _load_ivf(self):
+        self._centroids = None
+        self._lists = None
+        self._trained_count = 0
+        centroid_path = self._file("centroids")
+        if os.path.exists(centroid_path):
+            self._centroids = np.load(centroid_path)
+            self._trained_count = self.count
+            self._build_lists()
+
+    def _build_lists(self):
+        assignments = np.asarray(self._assignments[:self.count])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self._centroids))]
+        self._extra = {}
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def add(self, ids, vectors):
+        """Append vectors for the given history record ids."""
+        vectors = _normalize(vectors)
+        with self._lock:
+            needed = self.count + len(vectors)
+            if needed > self._vectors.shape[0]:
+                self._allocate(max(needed, 2 * self._vectors.shape[0]))
+            rows = np.arange(self.count, needed)
+            self._vectors[rows] = vectors
+            self._ids[rows] = ids
+            if self._centroids is not None:
+                assigned = self._assign(vectors)
+                self._assignments[rows] = assigned
+                for row, c in zip(rows, assigned):
+                    self._extra.setdefault(int(c), []).append(row)
+            self._vectors.flush()
+            self._ids.flush()
+            self._assignments.flush()
+            self.count = needed
+            self._save_meta()
+            retrain = self.count > BRUTE_FORCE_MAX and self.count > 4 * max(self._trained_count, 1)
+        if retrain:
+            self.train()
+
+    def train(self, nlist=None, sample_size=100_000, iterations=10, seed=0):
+        """Fit IVF centroids with spherical k-means on a sample of the index."""
+        with self._lock:
+            n = self.count
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            sample = np.asarray(self._vectors[np.sort(rng.choice(n, min(n, sample_size), replace=False))])
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.bincount(labels, minlength=nlist) == 0
+                sums[empty] = centroids[empty]
+                centroids = _normalize(sums)
+            self._centroids = centroids
+            for start in range(0, n, 65536):
+                self._assignments[start:start + 65536] = self._assign(np.asarray(self._vectors[start:start + 65536]))
+            self._assignments.flush()
+            np.save(self._file("centroids"), centroids)
+            self._trained_count = n
+            self._build_lists()
+
+    def items(self):
+        """Return (record ids, normalized vectors) for everything indexed, as in-memory copies."""
+        with self._lock:
+            n = self.count
+            return np.array(self._ids[:n]), np.array(self._vectors[:n])
+
+    def search(self, query, k=5, nprobe=DEFAULT_NPROBE):
+        """Return up to ``k`` (record_id, cosine similarity) pairs, best first."""
+        query = _normalize(query)[0]
+        with self._lock:
+            n = self.count
+            if n == 0:
+                return []
+            if self._centroids is None or n <= BRUTE_FORCE_MAX:
+                scores = self._vectors[:n] @ query
+                rows = _top_k(scores, k)
+                return [(int(self._ids[r]), float(scores[r])) for r in rows]
+
+            probes = _top_k(self._centroids @ query, nprobe)
+            candidates = np.concatenate(
+                [self._lists[c] for c in probes] +
+                [np.asarray(self._extra.get(int(c), []), dtype=np.int64) for c in probes]
+            )
+            if candidates.size == 0:
+                return []
+            candidates.sort()  # sequential reads from the memory map
+            scores = self._vectors[candidates] @ query
+            best = _top_k(scores, k)
+            return [(int(self._ids[candidates[i]]), float(scores[i])) for i in best]
+
+
+def related_coverage(index, history_store, embedding, k=3, min_similarity=0.5):
+    """Top-k past analyses similar to ``embedding`` with their history records."""
+    matches = [(i, score) for i, score in index.search(embedding, k) if score >= min_similarity]
+    records = history_store.get_many([i for i, _ in matches])
+    return [(records[i], score) for i, score in matches if i in records]
@@ -1,14 +1,60 @@
-import plotly.graph_objects as go
-
-def bias_gauge(bias_label: str) -> go.Figure:
-    """Render a stylized gauge to visualize political bias positioning."""
-    
-    mapping = {
-        "left": -1,
-        "center": 0,
-        "right": 1
-    }
-    value = mapping.get(bias_label.lower(), 0)
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from metrics import timed
+
+# plotly is imported inside each function, so importing this module is free
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+BIAS_VALUES = {"left": -1, "center": 0, "right": 1}
+EMOTION_COLORS = {
+    "Joy": "#FFD93D",
+    "Anger": "#FF6B6B",
+    "Sadness": "#6A5ACD",
+    "Fear": "#964B00",
+    "Surprise": "#4D96FF",
+    "Disgust": "#6BCB77",
+    "Neutral": "#999999",
+    "Hope": "#00F5A0",
+}
+# Emotions outside EMOTION_COLORS get one of these, fixed by the name so reruns agree
+FALLBACK_COLORS = ("#FF6B6B", "#FFD93D", "#6BCB77", "#4D96FF", "#E96479", "#A084E8")
+# Distinct gauge and bar figures kept; labels repeat across a batch, so this covers most of them
+FIGURE_CACHE_SIZE = 256
+DARK_LAYOUT = dict(
+    plot_bgcolor="#121212",
+    paper_bgcolor="#0A0A0A",
+    font=dict(color="#FAFAFA", family="sans-serif"),
+)
+
+
+def emotion_color(emotion: str) -> str:
+    emotion = emotion.strip().capitalize()
+    if emotion in EMOTION_COLORS:
+        return EMOTION_COLORS[emotion]
+    return FALLBACK_COLORS[zlib.crc32(emotion.encode("utf-8")) % len(FALLBACK_COLORS)]
+
+
+def split_emotions(emotion_str: str) -> list:
+    return [e.strip().capitalize() for e in (emotion_str or "").split(",") if e.strip()]
+
+
+@timed("chart")
+def bias_gauge(bias_label: str) -> "go.Figure":
+    """Render a stylized gauge to visualize political bias positioning.
+
+    Figures are cached per label and shared, so treat the result as read-only.
+    """
+    return _bias_gauge(bias_label.strip().lower())
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _bias_gauge(bias_label: str) -> "go.Figure":
+    import plotly.graph_objects as go
+
+    value = BIAS_VALUES.get(bias_label, 0)
 
     fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
@@ -52,37 +98,27 @@ def bias_gauge(bias_label: str) -> go.Figure:
     return fig
 
 
-def emotion_bar(emotion_str: str) -> go.Figure:
-    """Render a bar chart to visualize detected emotional tones with punch and clarity."""
-    
-    import random
+@timed("chart")
+def emotion_bar(emotion_str: str) -> "go.Figure":
+    """Render a bar chart to visualize detected emotional tones with punch and clarity.
+
+    Figures are cached per set of emotions and shared, so treat the result as read-only.
+    """
+    emotions = split_emotions(emotion_str) or ["Neutral"]
+    return _emotion_bar(tuple(emotions))
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _emotion_bar(emotions: tuple) -> "go.Figure":
+    import plotly.graph_objects as go
 
-    # Process input emotions
-    emotions = [e.strip().capitalize() for e in emotion_str.split(",") if e.strip()]
-    if not emotions:
-        emotions = ["Neutral"]
-    
     unique_emotions = list(dict.fromkeys(emotions))  # maintain order
     counts = {e: emotions.count(e) for e in unique_emotions}
 
-    # Generate visually distinct colors for each bar (optional: make consistent for known emotions)
-    color_palette = {
-        "Joy": "#FFD93D",
-        "Anger": "#FF6B6B",
-        "Sadness": "#6A5ACD",
-        "Fear": "#964B00",
-        "Surprise": "#4D96FF",
-        "Disgust": "#6BCB77",
-        "Neutral": "#999999"
-    }
-    default_colors = ['#FF6B6B', '#FFD93D', '#6BCB77', '#4D96FF', '#E96479', '#A084E8']
-    bar_colors = [color_palette.get(e, random.choice(default_colors)) for e in unique_emotions]
-
-    # Create figure
     fig = go.Figure(go.Bar(
         x=list(counts.keys()),
         y=list(counts.values()),
-        marker=dict(color=bar_colors, line=dict(color="#FAFAFA", width=1.2)),
+        marker=dict(color=[emotion_color(e) for e in unique_emotions], line=dict(color="#FAFAFA", width=1.2)),
         text=[f"{v}×" for v in counts.values()],
         textposition="outside",
         hoverinfo="x+y"
@@ -98,7 +134,6 @@ def emotion_bar(emotion_str: str) -> go.Figure:
         },
         xaxis=dict(
             title="Detected Emotions",
-            
             showgrid=False
         ),
         yaxis=dict(
@@ -106,11 +141,118 @@ def emotion_bar(emotion_str: str) -> go.Figure:
             showgrid=True,
             gridcolor="#333"
         ),
-        plot_bgcolor="#121212",
-        paper_bgcolor="#0A0A0A",
-        font=dict(color="#FAFAFA", family="sans-serif"),
         margin=dict(t=60, b=60),
-        bargap=0.35
+        bargap=0.35,
+        **DARK_LAYOUT
     )
 
     return fig
+
+
+@timed("chart")
+def bias_emotion_heatmap(results) -> "go.Figure":
+    """Articles per bias × emotion across a batch, as one heatmap.
+
+    An article with several emotions counts once under each. The figure's
+    size depends on the number of distinct labels, not on the batch size.
+    """
+    import plotly.graph_objects as go
+
+    counts = {}
+    for parsed in results:
+        if not parsed or "error" in parsed:
+            continue
+        bias = (parsed.get("bias") or "Unknown").strip().capitalize()
+        for emotion in dict.fromkeys(split_emotions(parsed.get("emotion")) or ["Neutral"]):
+            counts[bias, emotion] = counts.get((bias, emotion), 0) + 1
+
+    known = [b.capitalize() for b in BIAS_VALUES]
+    biases = known + sorted({b for b, _ in counts} - set(known))
+    emotions = sorted({e for _, e in counts}, key=lambda e: -sum(v for (_, em), v in counts.items() if em == e))
+    z = [[counts.get((b, e), 0) for e in emotions] for b in biases]
+
+    fig = go.Figure(go.Heatmap(
+        x=emotions,
+        y=biases,
+        z=z,
+        text=z,
+        texttemplate="%{text}",
+        colorscale=[[0, "#121212"], [1, "#00F5A0"]],
+        hovertemplate="<b>%{y}</b> · %{x}: %{z} article(s)<extra></extra>",
+        showscale=False,
+        xgap=2,
+        ygap=2
+    ))
+    fig.update_layout(
+        title={'text': "<b>Bias × Emotion</b>", 'x': 0.5, 'xanchor': 'center'},
+        xaxis=dict(title="Emotion", side="bottom"),
+        yaxis=dict(title="Political Bias", autorange="reversed"),
+        height=220 + 30 * len(biases),
+        margin=dict(t=60, b=40),
+        **DARK_LAYOUT
+    )
+    return fig
+
+
+@timed("chart")
+def semantic_scatter(coords, cluster_labels, texts) -> "go.Figure":
+    """Scatter of articles on the 2-D semantic map, coloured by cluster.
+
+    Uses WebGL (Scattergl) with one trace per cluster, so large batches stay
+    responsive in the browser; article text is shown on hover only.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+
+    cluster_labels = np.asarray(cluster_labels)
+    hover = np.array([a[:60] + "..." for a in texts], dtype=object)
+    fig = go.Figure()
+    for label in sorted(set(cluster_labels.tolist())):
+        members = cluster_labels == label
+        fig.add_trace(go.Scattergl(
+            x=coords[members, 0],
+            y=coords[members, 1],
+            mode="markers",
+            name=f"Cluster {label + 1}" if label >= 0 else "Unclustered",
+            hovertext=hover[members],
+            marker=dict(size=10, line=dict(width=1, color="DarkSlateGrey")),
+            hovertemplate="<b>%{hovertext}</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>"
+        ))
+    fig.update_layout(
+        title="Semantic Clustering of Articles",
+        xaxis_title="Topic Similarity (X)",
+        yaxis_title="Topic Similarity (Y)",
+        legend_title="Cluster",
+        width=800,
+        height=500
+    )
+    return fig
+
+
+@timed("chart")
+def bias_over_time(daily, total) -> "go.Figure":
+    """Daily mean and rolling bias from analytics.daily_aggregates (reset to a ``day`` column)."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure([
+        go.Scattergl(
+            x=daily["day"],
+            y=daily[column],
+            mode="lines+markers",
+            name=name,
+            customdata=daily["analyses"],
+            hovertemplate="%{x|%Y-%m-%d}: %{y:.2f} (%{customdata} analyses)<extra>" + name + "</extra>"
+        )
+        for column, name in (("mean_bias", "Daily mean"), ("rolling_bias", "7-day average"))
+    ])
+    fig.update_layout(
+        title=f"Political Bias Over Time ({total:,} analyses)",
+        xaxis_title="Date",
+        yaxis_title="Bias (Left/Center/Right)"
+    )
+    fig.update_yaxes(
+        range=[-1.05, 1.05],
+        tickvals=[-1, 0, 1],
+        ticktext=["Left", "Center", "Right"]
+    )
+    return fig
@@ -0,0 +1,53 @@
+"""Compare single-article and batched (packed) bias prompts offline.
+
+Reports model calls, prompt/output tokens and wall time for the same corpus
+of short, tweet-sized articles run through both paths against FakeModel.
+"""
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from batch import iter_analyses, iter_packed_analyses  # noqa: E402
+from fake_llm import FakeModel  # noqa: E402
+
+
+def run(label, iterate, articles, **kwargs):
+    model = FakeModel(latency=kwargs.pop("latency"), token_latency=kwargs.pop("token_latency"))
+    prompt_tokens = output_tokens = parsed = 0
+    start = time.perf_counter()
+    for _, result in iterate(articles, model, **kwargs):
+        prompt_tokens += result["usage"]["prompt_tokens"]
+        output_tokens += result["usage"]["output_tokens"]
+        parsed += "error" not in result["parsed"]
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} calls={model.calls:>5}  prompt_tokens={prompt_tokens:>8}  "
+        f"output_tokens={output_tokens:>7}  wall={elapsed:6.2f}s  parsed={parsed}/{len(articles)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed seconds per call")
+    parser.add_argument("--token-latency", type=float, default=0.0005, help="seconds per output token")
+    args = parser.parse_args()
+
+    # Prompt templates are resolved relative to the repo root
+    os.chdir(os.path.join(APP_DIR, ".."))
+    articles = [
+        f"Breaking: council votes {i} to approve the new transit levy, critics call it a tax grab."
+        for i in range(args.articles)
+    ]
+    common = dict(max_workers=args.workers, latency=args.latency, token_latency=args.token_latency)
+    run("single", iter_analyses, articles, **common)
+    run("batched", iter_packed_analyses, articles, **common)
+
+
+if __name__ == "__main__":
+    main()
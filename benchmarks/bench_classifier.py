@@ -0,0 +1,75 @@
+"""Train the local classifier on a synthetic history and time predictions.
+
+Embeddings are drawn around one centre per (bias, framing, emotion)
+combination with some label noise, standing in for MiniLM vectors of past
+analyses. They are written to a temporary history and vector index and
+trained through the same path as ``python app/classifier.py``. The script
+prints the held-out agreement vs. calls-saved report and the prediction
+throughput. Embedding the article text with MiniLM, which happens before
+prediction in the app, is not part of the timing.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from classifier import format_report, train  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from vector_index import VectorIndex  # noqa: E402
+
+BIAS = ["left", "center", "right"]
+FRAMING = ["conflict", "economic", "human interest", "moral"]
+EMOTION = ["anger", "fear", "hope", "neutral", "anger, fear"]
+
+
+def synthetic_history(n, dim=384, noise=0.3, label_noise=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = {
+        (b, f, e): rng.normal(size=dim)
+        for b in BIAS for f in FRAMING for e in EMOTION
+    }
+    keys = list(centres)
+    picks = rng.integers(len(keys), size=n)
+    vectors = np.stack([centres[keys[p]] for p in picks]) + rng.normal(scale=noise * np.sqrt(dim / 8), size=(n, dim))
+    records = []
+    for p in picks:
+        bias, framing, emotion = keys[p]
+        if rng.random() < label_noise:  # the LLM does not always agree with itself either
+            bias = BIAS[rng.integers(len(BIAS))]
+        records.append({"bias": bias, "framing": framing, "emotion": emotion, "omissions": "", "source": "Unknown"})
+    return vectors.astype(np.float32), records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", type=int, default=20_000, help="labelled analyses to train on")
+    parser.add_argument("--predict", type=int, default=100_000, help="vectors to classify for the timing")
+    args = parser.parse_args()
+
+    vectors, records = synthetic_history(args.history)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"), legacy_json=None)
+        index = VectorIndex(os.path.join(tmp, "index"))
+        index.add(store.append(records), vectors)
+
+        start = time.perf_counter()
+        classifier = train(store, index)
+        print(f"trained on {classifier.trained_rows} analyses in {time.perf_counter() - start:.1f}s")
+        print(format_report(classifier.report))
+
+    queries, _ = synthetic_history(args.predict, seed=1)
+    classifier.predict(queries[:1000])  # warm up
+    start = time.perf_counter()
+    classifier.predict(queries)
+    elapsed = time.perf_counter() - start
+    print(f"predict: {args.predict} articles in {elapsed * 1000:.0f}ms ({args.predict / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time each export format and measure its peak memory.
+
+Every format runs in its own subprocess so peak RSS is not inflated by the
+previous one. Results are synthetic and generated lazily, as they are when
+exporting from the history database, and the export is written to a temp
+file. ``import`` is the RSS of a process that only loads the exporter, so
+the difference is what the export itself costs.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "app"))
+
+from synthetic import synthetic_results  # noqa: E402
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(fmt, n):
+    from export import export_file
+
+    if fmt == "import":
+        print(f"0 0 {peak_rss_mb():.1f}")
+        return
+    start = time.perf_counter()
+    path = export_file(synthetic_results(n), fmt, directory=tempfile.gettempdir())
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    os.remove(path)
+    print(f"{elapsed:.3f} {size} {peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--formats", nargs="+", default=["pdf", "json", "jsonl", "csv", "parquet"])
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_one(args.worker, args.articles)
+        return
+
+    print(f"{args.articles} articles")
+    for fmt in ["import"] + args.formats:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", fmt, "--articles", str(args.articles)],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        elapsed, size, rss = float(out[0]), int(out[1]), float(out[2])
+        if fmt == "import":
+            print(f"{fmt:<8} peak_rss={rss:7.1f}MB")
+        else:
+            print(f"{fmt:<8} time={elapsed * 1000:9.1f}ms  size={size / 1e6:7.2f}MB  peak_rss={rss:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
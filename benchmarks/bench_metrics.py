@@ -0,0 +1,65 @@
+"""Per-call overhead of the metrics layer on the hot path.
+
+Times ``metrics.inc``, a ``stage`` block and a ``@timed`` function against
+an empty loop and a bare function call, so the difference is what
+instrumentation adds to each article.
+"""
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from metrics import Metrics  # noqa: E402
+
+
+def per_call(fn, n):
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=500_000)
+    args = parser.parse_args()
+    registry = Metrics()
+
+    def noop():
+        pass
+
+    timed_noop = registry.timed("bench")(noop)
+
+    def empty(n):
+        for _ in range(n):
+            pass
+
+    def call(n):
+        for _ in range(n):
+            noop()
+
+    def inc(n):
+        for _ in range(n):
+            registry.inc("bench_total", prompt="single", outcome="ok")
+
+    def stage(n):
+        for _ in range(n):
+            with registry.stage("bench"):
+                pass
+
+    def decorated(n):
+        for _ in range(n):
+            timed_noop()
+
+    loop = per_call(empty, args.n)
+    bare = per_call(call, args.n)
+    print(f"inc            {(per_call(inc, args.n) - loop) * 1e9:7.0f}ns")
+    print(f"stage block    {(per_call(stage, args.n) - loop) * 1e9:7.0f}ns")
+    print(f"@timed call    {(per_call(decorated, args.n) - bare) * 1e9:7.0f}ns")
+    print(f"prometheus_text with {len(registry.prometheus_text().splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Micro-benchmark and fuzz check for parse_llm_response.
+
+Runs the current parser and the original strip-and-replace parser over the
+fuzz corpus in benchmarks/data/malformed_outputs.json, reporting outcomes
+that differ from the expected one and the time per parse.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "app"))
+
+from utils import StreamingAnalysisParser, parse_llm_response  # noqa: E402
+
+
+def legacy_parse(response_text):
+    """The parser this module replaced, kept for comparison."""
+    try:
+        cleaned = response_text.strip().strip("```").replace("json", "", 1).strip()
+        data = json.loads(cleaned)
+        return {
+            "bias": data.get("bias") or data.get("Political Bias", "Unknown"),
+            "emotion": data.get("emotion") or data.get("Emotional Tone", "Unknown"),
+            "framing": data.get("framing") or data.get("Framing Style", "Unknown"),
+            "omissions": data.get("omissions") or data.get("Omitted Viewpoints", "None found")
+        }
+    except Exception as e:
+        return {"error": "Failed to parse response", "details": str(e)}
+
+
+def stream_parse(text, chunk_size=7):
+    parser = StreamingAnalysisParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    return parser.result()
+
+
+def mutate(text, rng):
+    """Random damage that must never raise, only return an error dict."""
+    ops = [
+        lambda t: t[:rng.randrange(len(t) + 1)],
+        lambda t: t.replace('"', "", 1),
+        lambda t: t.replace("}", "", 1),
+        lambda t: "{" + t,
+        lambda t: t + "}" * rng.randrange(3),
+        lambda t: t.replace(",", ",,", 1),
+    ]
+    return rng.choice(ops)(text) if text else text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000, help="parses per timing sample")
+    parser.add_argument("--mutations", type=int, default=5000)
+    args = parser.parse_args()
+
+    with open(os.path.join(HERE, "data", "malformed_outputs.json"), encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    for label, parse in (("legacy", legacy_parse), ("current", parse_llm_response), ("streamed", stream_parse)):
+        mismatches = [
+            case["name"] for case in corpus
+            if ("error" in parse(case["text"])) != (case["expect"] == "error")
+        ]
+        seconds = timeit.timeit(lambda: [parse(c["text"]) for c in corpus], number=max(1, args.number // len(corpus)))
+        per_parse = seconds / (max(1, args.number // len(corpus)) * len(corpus)) * 1e6
+        print(f"{label:<9} {len(corpus) - len(mismatches)}/{len(corpus)} as expected  {per_parse:7.1f} us/parse")
+        for name in mismatches:
+            print(f"    unexpected outcome: {name}")
+
+    rng = random.Random(0)
+    for _ in range(args.mutations):
+        text = mutate(rng.choice(corpus)["text"], rng)
+        result = parse_llm_response(text)
+        assert "error" in result or set(result) >= {"bias", "emotion", "framing", "omissions", "source"}, text
+        streamed = stream_parse(text, chunk_size=rng.randrange(1, 20))
+        assert streamed == result, text
+    print(f"fuzz: {args.mutations} mutated inputs parsed without exceptions; streamed == whole-text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Time prompt rendering for a corpus of articles.
+
+Compares the original read-the-file-and-replace approach with the prompt
+registry (templates loaded once, pre-split, rendered with a join), for the
+single-article, reframe and batched templates, and checks both produce the
+same prompts.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from prompts import PROMPTS_DIR, get_batch_bias_prompt, get_bias_prompt, get_reframe_prompt  # noqa: E402
+
+WORDS = "the council voted to approve new transit levy critics warn families tax economy climate".split()
+
+
+def legacy_prompt(name, placeholder, value):
+    with open(os.path.join(PROMPTS_DIR, f"{name}.txt"), "r") as f:
+        template = f.read()
+    return template.replace(placeholder, value)
+
+
+def legacy_batch_prompt(items):
+    articles = "\n\n".join(f"[id={article_id}]\n{text}" for article_id, text in items)
+    return legacy_prompt("batch_bias_prompt", "{articles}", articles)
+
+
+def timed(fn, inputs):
+    start = time.perf_counter()
+    outputs = [fn(x) for x in inputs]
+    return time.perf_counter() - start, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=10_000)
+    parser.add_argument("--words", type=int, default=400, help="words per article")
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    articles = [" ".join(rng.choices(WORDS, k=args.words)) for _ in range(args.articles)]
+    groups = [
+        list(enumerate(articles[i:i + args.batch_size]))
+        for i in range(0, len(articles), args.batch_size)
+    ]
+    cases = [
+        ("bias", articles, lambda a: legacy_prompt("bias_prompt", "{article}", a), get_bias_prompt),
+        ("reframe", articles, lambda a: legacy_prompt("reframe_prompt", "{article}", a), get_reframe_prompt),
+        ("batch", groups, legacy_batch_prompt, get_batch_bias_prompt),
+    ]
+
+    print(f"{args.articles} articles of {args.words} words")
+    for label, inputs, legacy, current in cases:
+        legacy_time, expected = timed(legacy, inputs)
+        current_time, rendered = timed(current, inputs)
+        same = "identical" if rendered == expected else "MISMATCH"
+        print(
+            f"{label:<8} prompts={len(inputs):>6}  legacy={legacy_time * 1000:8.1f}ms  "
+            f"registry={current_time * 1000:8.1f}ms  speedup={legacy_time / current_time:5.1f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Offline benchmark of the adaptive rate limiter against a quota-limited fake.
+
+Time is compressed: the fake quota and the limiter budgets use a short
+``--period`` instead of a real minute so a run finishes in seconds.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from batch import analyze_batch  # noqa: E402
+from fake_llm import FakeModel  # noqa: E402
+from ratelimit import AdaptiveRateLimiter, RateLimitedModel  # noqa: E402
+
+
+def run(label, model, fake, articles, workers):
+    start = time.perf_counter()
+    results = analyze_batch(articles, model, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for r in results if r["exception"] is None)
+    print(
+        f"{label:<14} {succeeded:>4}/{len(articles)} ok  {elapsed:6.2f}s  "
+        f"{succeeded / elapsed:6.2f} articles/s  {fake.rate_limited:>4} x 429"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=20, help="requests allowed per period by the fake")
+    parser.add_argument("--initial-budget", type=int, default=60, help="limiter's starting guess per period")
+    parser.add_argument("--period", type=float, default=2.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    articles = [f"Synthetic article number {i} about local elections." for i in range(args.articles)]
+
+    fake = FakeModel(latency=args.latency, requests_per_period=args.quota, period=args.period)
+    run("no limiter", fake, fake, articles, args.workers)
+
+    fake = FakeModel(latency=args.latency, requests_per_period=args.quota, period=args.period)
+    limiter = AdaptiveRateLimiter(requests_per_minute=args.initial_budget, period=args.period)
+    limited = RateLimitedModel(fake, limiter, max_retries=8, base_delay=args.period / 20, max_delay=args.period)
+    run("adaptive", limited, fake, articles, args.workers)
+    print(f"learned budget: {limiter.stats()}  (true quota {args.quota}/period)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Measure app startup: import time of app/main.py's dependencies and time to first render.
+
+Import cost comes from ``python -X importtime`` on exactly the modules
+main.py imports at the top level, parsed from its source so the list stays
+current. Time to first render is a fresh process running the first script
+run of main.py through Streamlit's AppTest, with every data path pointed
+at an empty temp directory and the background prewarm disabled. Streamlit
+itself is already imported and initialised, as it is in a running server,
+and the AppTest harness's fixed per-run cost (measured on a one-line app) is
+subtracted, so the figure is what the first visitor waits for.
+
+With ``--record`` the result is appended to benchmarks/data/startup_history.jsonl
+together with the commit it was measured on, so regressions show up as the
+history grows. ``--check`` exits non-zero when first render exceeds
+``--target`` seconds.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_DIR = os.path.join(ROOT, "app")
+MAIN = os.path.join(APP_DIR, "main.py")
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "startup_history.jsonl")
+TARGET_SECONDS = 1.0
+
+FIRST_RENDER = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+# A throwaway app first, so Streamlit's one-off runtime setup (component
+# discovery) is not counted, just as a running server has already done it
+AppTest.from_string("import streamlit as st\\nst.write('warm')").run()
+# The harness's own per-run cost, measured on a trivial app and subtracted
+start = time.perf_counter()
+AppTest.from_string("import streamlit as st\\nst.write('baseline')").run()
+baseline = time.perf_counter() - start
+at = AppTest.from_file({main!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    sys.exit("first run raised: " + at.exception[0].message)
+print(elapsed - baseline)
+"""
+
+
+def main_imports():
+    """Top-level modules main.py imports, in order."""
+    with open(MAIN, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+def import_times(modules):
+    """Cumulative import seconds per module, from ``-X importtime``."""
+    code = f"import sys; sys.path.insert(0, {APP_DIR!r})\n" + "\n".join(f"import {m}" for m in modules)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  ") and name.strip() in modules:
+            # An unindented entry is imported directly by the script, not by another module
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def first_render_seconds():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            NARRATIVELENS_CACHE_PATH=os.path.join(tmp, "llm_cache.db"),
+            NARRATIVELENS_HISTORY_PATH=os.path.join(tmp, "analysis_history.db"),
+            NARRATIVELENS_VECTOR_INDEX_PATH=os.path.join(tmp, "vector_index"),
+            NARRATIVELENS_ANALYTICS_SNAPSHOT_PATH=os.path.join(tmp, "analytics_snapshot.pkl"),
+            NARRATIVELENS_JOBS_PATH=os.path.join(tmp, "jobs.db"),
+            NARRATIVELENS_CLASSIFIER_PATH=os.path.join(tmp, "local_classifier.pkl"),
+            NARRATIVELENS_PREWARM="0",
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", FIRST_RENDER.format(main=MAIN)],
+            capture_output=True, text=True, check=True, cwd=tmp, env=env
+        ).stdout
+    return float(out.split()[-1])
+
+
+def git_commit():
+    """Short HEAD hash, with ``+dirty`` when measured on uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}+dirty" if dirty else commit
+
+
+def previous_entry():
+    if not os.path.exists(HISTORY_FILE):
+        return None
+    with open(HISTORY_FILE, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3, help="first-render runs; the median is reported")
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS)
+    parser.add_argument("--record", action="store_true", help="append the result to the startup history")
+    parser.add_argument("--check", action="store_true", help="exit 1 if first render misses the target")
+    args = parser.parse_args()
+
+    modules = main_imports()
+    imports = import_times(modules)
+    renders = sorted(first_render_seconds() for _ in range(args.runs))
+    first_render = renders[len(renders) // 2]
+
+    print("main.py imports (cumulative, slowest first):")
+    for name, seconds in sorted(imports.items(), key=lambda item: -item[1]):
+        print(f"  {name:<28} {seconds * 1000:8.1f}ms")
+    print(f"  {'total':<28} {sum(imports.values()) * 1000:8.1f}ms")
+    print(f"first render: {first_render * 1000:.0f}ms (median of {args.runs}; target {args.target * 1000:.0f}ms)")
+
+    previous = previous_entry()
+    if previous:
+        print(
+            f"previous ({previous['commit']}, {previous['date']}): first render "
+            f"{previous['first_render'] * 1000:.0f}ms, imports {previous['import_total'] * 1000:.0f}ms"
+        )
+    if args.record:
+        os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "commit": git_commit(),
+                "python": sys.version.split()[0],
+                "first_render": round(first_render, 4),
+                "import_total": round(sum(imports.values()), 4),
+                "imports": {name: round(seconds, 4) for name, seconds in imports.items()},
+            }) + "\n")
+    if args.check and first_render > args.target:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Offline benchmark suite: run the pipeline on synthetic data and compare against a baseline.
+
+Usage:
+    python benchmarks/run.py                      # sizes 10, 100, 1000
+    python benchmarks/run.py --sizes 10 1000 100000 --only parse history
+    python benchmarks/run.py --check              # exit 1 on a regression vs. the baseline
+    python benchmarks/run.py --update-baseline    # store this run as the new baseline
+
+Nothing touches the network. The analysis loop runs against FakeModel with
+configurable latency, error rate and malformed-output rate. Embeddings use a
+deterministic hashing encoder unless ``--encoder minilm`` is given, so
+``embed_cold`` measures the embedding store and batching rather than the
+model. Every run writes a JSON file to benchmarks/results/. Timings from
+different machines are not comparable, so regenerate the baseline when the
+benchmark machine changes.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+import clustering  # noqa: E402
+from batch import iter_analyses  # noqa: E402
+from bench_startup import git_commit  # noqa: E402
+from export import create_pdf_report  # noqa: E402
+from fake_llm import FakeModel  # noqa: E402
+from history import HistoryStore  # noqa: E402
+from synthetic import HashingEncoder, synthetic_articles, synthetic_results  # noqa: E402
+from utils import parse_llm_response  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "data", "baseline.json")
+RESULTS_DIR = os.path.join(HERE, "results")
+MALFORMED_PATH = os.path.join(HERE, "data", "malformed_outputs.json")
+DEFAULT_SIZES = (10, 100, 1000)
+# Runs slower than baseline * (1 + tolerance) and by more than MIN_DELTA seconds are regressions
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA = 0.005
+# Sizes at or above this run once instead of --repeat times
+SINGLE_RUN_SIZE = 10_000
+HISTORY_BATCH = 100
+
+
+def article_texts(n, seed=0):
+    return [a["summary"] for a in synthetic_articles(n, seed=seed)]
+
+
+def clustered_embeddings(n, dim=384, clusters=12, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=n)] + rng.normal(scale=0.5, size=(n, dim))
+    return vectors.astype(np.float32)
+
+
+# Each benchmark is (setup(n, args, tmp) -> state, run(state) -> extra fields, max size).
+# Only run() is timed.
+
+def setup_analysis(n, args, tmp):
+    model = FakeModel(
+        latency=args.latency, error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed
+    )
+    return model, article_texts(n, seed=args.seed)
+
+
+def run_analysis(state, args):
+    model, texts = state
+    failed = parse_failures = 0
+    for _, result in iter_analyses(texts, model, max_workers=args.workers):
+        if result["exception"] is not None:
+            failed += 1
+        elif "error" in result["parsed"]:
+            parse_failures += 1
+    return {"calls": model.calls, "request_errors": failed, "parse_failures": parse_failures}
+
+
+def setup_parse(n, args, tmp):
+    model = FakeModel(latency=0, malformed_rate=args.malformed_rate, seed=args.seed)
+    texts = [model.generate_content(t).text for t in article_texts(n, seed=args.seed)]
+    with open(MALFORMED_PATH, encoding="utf-8") as f:
+        corpus = [case["text"] for case in json.load(f)]
+    # Mix in the fuzz corpus's tricky-but-valid and broken cases
+    for i in range(0, n, 10):
+        texts[i] = corpus[i // 10 % len(corpus)]
+    return texts
+
+
+def run_parse(texts, args):
+    return {"parse_failures": sum("error" in parse_llm_response(text) for text in texts)}
+
+
+def setup_embed(n, args, tmp):
+    store = clustering.EmbeddingStore(os.path.join(tmp, f"embeddings-{n}-{time.perf_counter_ns()}.db"))
+    return store, article_texts(n, seed=args.seed)
+
+
+def run_embed(state, args):
+    store, texts = state
+    return {"dim": int(clustering.embed_articles(texts, store=store).shape[1])}
+
+
+def setup_embed_warm(n, args, tmp):
+    store, texts = setup_embed(n, args, tmp)
+    clustering.embed_articles(texts, store=store)
+    return store, texts
+
+
+def setup_reduce(n, args, tmp):
+    return clustered_embeddings(n, seed=args.seed), os.path.join(tmp, f"maps-{time.perf_counter_ns()}")
+
+
+def run_reduce(state, args):
+    embeddings, map_dir = state
+    coords = clustering.reduce_dimensions(embeddings, map_dir=map_dir)
+    return {"points": len(coords)}
+
+
+def setup_history(n, args, tmp):
+    store = HistoryStore(os.path.join(tmp, f"history-{n}-{time.perf_counter_ns()}.db"), legacy_json=None)
+    return store, list(synthetic_results(n, seed=args.seed))
+
+
+def run_history(state, args):
+    store, results = state
+    for start in range(0, len(results), HISTORY_BATCH):
+        store.append(results[start:start + HISTORY_BATCH])
+    return {"rows": store.count()}
+
+
+def setup_pdf(n, args, tmp):
+    return n, os.path.join(tmp, "report.pdf"), args.seed
+
+
+def run_pdf(state, args):
+    n, path, seed = state
+    create_pdf_report(synthetic_results(n, seed=seed), path)
+    return {"bytes": os.path.getsize(path)}
+
+
+BENCHMARKS = {
+    "analysis": (setup_analysis, run_analysis, 10_000),
+    "parse": (setup_parse, run_parse, 100_000),
+    "embed_cold": (setup_embed, run_embed, 100_000),
+    "embed_warm": (setup_embed_warm, run_embed, 100_000),
+    "reduce": (setup_reduce, run_reduce, 10_000),
+    "history": (setup_history, run_history, 100_000),
+    "pdf": (setup_pdf, run_pdf, 10_000),
+}
+
+
+def measure(name, n, args, tmp):
+    setup, run, _ = BENCHMARKS[name]
+    best, extra = None, {}
+    for _ in range(1 if n >= SINGLE_RUN_SIZE else args.repeat):
+        state = setup(n, args, tmp)
+        start = time.perf_counter()
+        extra = run(state, args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "benchmark": name,
+        "n": n,
+        "seconds": round(best, 6),
+        "per_item_us": round(best / n * 1e6, 3),
+        "items_per_second": round(n / best, 1) if best else None,
+        **extra,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(result, baseline seconds, ratio, regressed) for every result the baseline also has."""
+    previous = {(r["benchmark"], r["n"]): r["seconds"] for r in baseline.get("results", [])}
+    rows = []
+    for result in results:
+        before = previous.get((result["benchmark"], result["n"]))
+        if before is None:
+            continue
+        ratio = result["seconds"] / before if before else float("inf")
+        regressed = result["seconds"] > before * (1 + tolerance) and result["seconds"] - before > MIN_DELTA
+        rows.append((result, before, ratio, regressed))
+    return rows
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run just these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement below 10k items; best is kept")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent requests in the analysis loop")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model seconds per call")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="share of fake calls that raise")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="share of fake responses that are malformed")
+    parser.add_argument("--encoder", choices=["hash", "minilm"], default="hash")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 if anything regressed vs. the baseline")
+    args = parser.parse_args()
+
+    # Prompt templates are resolved relative to the repo root
+    os.chdir(ROOT)
+    # umap warns about n_jobs and spectral init on every small fit
+    warnings.filterwarnings("ignore", module="umap")
+    if args.encoder == "hash":
+        clustering._model = HashingEncoder()
+
+    results, skipped = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.only or BENCHMARKS:
+            for n in sorted(args.sizes):
+                if n > BENCHMARKS[name][2]:
+                    skipped.append(f"{name}@{n}")
+                    continue
+                result = measure(name, n, args, tmp)
+                results.append(result)
+                print(
+                    f"{name:<11} n={n:>6}  {result['seconds'] * 1000:10.1f}ms  "
+                    f"{result['per_item_us']:10.1f}us/item", flush=True
+                )
+    if skipped:
+        print(f"skipped (above the benchmark's size limit): {', '.join(skipped)}")
+
+    run = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "settings": {
+                k: getattr(args, k)
+                for k in ("repeat", "workers", "latency", "error_rate", "malformed_rate", "encoder", "seed")
+            },
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    write_json(output, run)
+    print(f"results: {output}")
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    if baseline:
+        print(f"vs. baseline ({baseline['meta']['commit']}, {baseline['meta']['date']}):")
+        for result, before, ratio, regressed in compare(results, baseline, args.tolerance):
+            if regressed:
+                regressions.append(result)
+            print(
+                f"  {result['benchmark']:<11} n={result['n']:>6}  {before * 1000:10.1f}ms -> "
+                f"{result['seconds'] * 1000:10.1f}ms  x{ratio:5.2f}{'  REGRESSION' if regressed else ''}"
+            )
+    if args.update_baseline:
+        write_json(args.baseline, run)
+        print(f"baseline updated: {args.baseline}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Deterministic synthetic articles, analysis results and embeddings for the benchmarks.
+
+Both generators are lazy, so 100k-item corpora cost no more memory than
+the consumer keeps. Articles have the shape of data/articles_sample.json
+(title / summary / link / published / source) and results the shape of a
+parsed bias analysis as stored in the history. HashingEncoder stands in
+for the embedding model. The test suite shares these helpers.
+"""
+import hashlib
+import random
+
+import numpy as np
+
+WORDS = (
+    "the council voted to approve new transit levy critics warn families tax economy climate "
+    "minister election border policy health union strike court ruling market inflation energy "
+    "protest reform school budget police housing vaccine trade deal senator governor report"
+).split()
+EMOTIONS = ["anger", "fear", "hope", "neutral", "joy", "sadness", "concern"]
+FRAMINGS = ["conflict", "economic", "human interest", "moral", "neutral"]
+SOURCES = ["Fox News", "CNN", "Reuters", "BBC", "Le Monde", "Der Spiegel", "NHK"]
+
+
+def _date(rng):
+    return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def synthetic_articles(n, seed=0, min_words=40, max_words=120):
+    rng = random.Random(seed)
+    for i in range(n):
+        words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+        yield {
+            "title": f"Article {i}: {' '.join(rng.choices(WORDS, k=6)).capitalize()}",
+            "summary": " ".join(words).capitalize() + ".",
+            "link": f"https://news.example.com/{seed}/{i}",
+            "published": _date(rng),
+            "source": rng.choice(SOURCES),
+        }
+
+
+def synthetic_results(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            "title": f"Article {i} — {' '.join(rng.choices(WORDS, k=6))}",
+            "published": _date(rng),
+            "bias": rng.choice(["left", "center", "right"]),
+            "emotion": ", ".join(rng.sample(EMOTIONS, 2)),
+            "framing": rng.choice(FRAMINGS),
+            "source": rng.choice(SOURCES),
+            "omissions": " ".join(rng.choices(WORDS, k=rng.randint(20, 60))) + " — naïve café coverage",
+        }
+
+
+class HashingEncoder:
+    """Stand-in for the SentenceTransformer: a fixed unit vector per text."""
+
+    dim = 384
+
+    def encode(self, texts, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+            out[row] = np.random.default_rng(seed).standard_normal(self.dim)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "app"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from synthetic import HashingEncoder, synthetic_articles  # noqa: E402
+
+MALFORMED_PATH = os.path.join(ROOT, "benchmarks", "data", "malformed_outputs.json")
+
+
+def make_articles(n, seed=0):
+    """Distinct article texts that the near-duplicate detector keeps apart."""
+    return [article["summary"] for article in synthetic_articles(n, seed=seed)]
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory so default store paths never touch the repo."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def hashing_encoder(monkeypatch):
+    import clustering
+
+    monkeypatch.setattr(clustering, "_model", HashingEncoder())
+    monkeypatch.setattr(clustering, "_store", None)  # a fresh embeddings.db in the test directory
+    return clustering._model
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from analytics import HistoryFrame, daily_aggregates, source_aggregates, tone_score
+from history import HistoryStore
+
+
+def result(bias, emotion="neutral", source="Reuters", published="2024-03-01", framing="neutral"):
+    return {"bias": bias, "emotion": emotion, "framing": framing, "source": source, "published": published}
+
+
+@pytest.fixture
+def store(workdir):
+    return HistoryStore(str(workdir / "history.db"), legacy_json=None)
+
+
+def test_labels_are_normalised_once_per_category(store):
+    store.append([result(" Left"), result("LEFT", emotion="Anger ,Fear"), result("centre", source=" CNN ")])
+    frame = HistoryFrame(store)
+    frame.refresh()
+    assert frame.frame["bias"].tolist() == ["left", "left", "centre"]
+    assert frame.frame["emotion"].tolist()[1] == "anger, fear"
+    assert frame.frame["source"].tolist()[2] == "CNN"
+    assert frame.frame["bias_score"].tolist()[:2] == [-1.0, -1.0]
+    assert np.isnan(frame.frame["bias_score"].iloc[2])
+
+
+def test_date_falls_back_to_analysis_time(store):
+    store.append([result("left", published="not a date"), result("left", published="2024-03-05T10:00:00Z")],
+                 created=0.0)
+    frame = HistoryFrame(store)
+    frame.refresh()
+    assert frame.frame["date"].tolist() == [pd.Timestamp(0, unit="s", tz="UTC"),
+                                            pd.Timestamp("2024-03-05T10:00:00Z")]
+
+
+def test_refresh_only_reads_new_rows_and_keeps_categories(store):
+    store.append([result("left"), result("right")])
+    frame = HistoryFrame(store)
+    assert frame.refresh() == 2
+    assert frame.refresh() == 0
+    store.append([result("center", source="BBC")])
+    assert frame.refresh() == 1
+    assert frame.frame["bias"].tolist() == ["left", "right", "center"]
+    assert frame.frame["source"].cat.categories.dtype == object
+
+
+def test_snapshot_lets_a_new_process_skip_old_rows(store, workdir, monkeypatch):
+    monkeypatch.setattr(analytics, "SNAPSHOT_MIN_ROWS", 2)
+    snapshot = str(workdir / "snapshot.pkl")
+    store.append([result("left"), result("right")])
+    HistoryFrame(store, snapshot).refresh()
+    store.append([result("center")])
+
+    reloaded = HistoryFrame(store, snapshot)
+    assert reloaded.last_id == 2
+    assert reloaded.refresh() == 1
+    assert reloaded.frame["bias"].tolist() == ["left", "right", "center"]
+
+
+def test_corrupt_snapshot_reloads_from_sqlite(store, workdir):
+    snapshot = workdir / "snapshot.pkl"
+    snapshot.write_bytes(b"garbage")
+    store.append([result("left")])
+    frame = HistoryFrame(store, str(snapshot))
+    assert frame.last_id == 0 and frame.refresh() == 1
+
+
+def test_tone_score_averages_weights():
+    assert tone_score("anger, fear", {"anger": 2.0, "fear": 4.0}) == 3.0
+    assert tone_score("unknown", {}) == 1.0
+    assert np.isnan(tone_score("", {}))
+
+
+def test_daily_aggregates(store):
+    store.append([
+        result("left", emotion="anger", published="2024-03-01"),
+        result("right", published="2024-03-01"),
+        result("center", published="2024-03-02"),
+        result("unknown", published="2024-03-02"),
+    ])
+    frame = HistoryFrame(store)
+    frame.refresh()
+    daily = daily_aggregates(frame.frame, weights={"anger": 3.0, "neutral": 1.0})
+    assert daily["analyses"].tolist() == [2, 2]
+    assert daily["scored"].tolist() == [2, 1]
+    assert daily["mean_bias"].tolist() == [0.0, 0.0]
+    assert daily["mean_tone"].tolist() == [2.0, 1.0]
+
+
+def test_source_aggregates(store):
+    store.append([result("left", source="A"), result("left", source="A"), result("right", source="A"),
+                  result("center", source="B")])
+    frame = HistoryFrame(store)
+    frame.refresh()
+    summary = source_aggregates(frame.frame)
+    assert summary.index.tolist() == ["A", "B"]
+    assert summary.loc["A", "analyses"] == 3
+    assert summary.loc["A", "left_share"] == pytest.approx(2 / 3)
+    assert summary.loc["B", "center_share"] == 1.0
+    assert summary.loc["A", "mean_bias"] == pytest.approx(-1 / 3)
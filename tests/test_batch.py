@@ -0,0 +1,180 @@
+import json
+import threading
+import time
+
+import pytest
+
+from batch import (
+    _bounded_map, analyze_article, analyze_article_stream, analyze_batch, analyze_packed, iter_analyses,
+    iter_packed_analyses, pack_articles
+)
+from conftest import make_articles
+from fake_llm import FakeModel, FakeRateLimitError, FakeResponse, FakeServerError
+from metrics import metrics
+from prompts import batch_prompt_ids
+from ratelimit import AdaptiveRateLimiter, RateLimitedModel
+from utils import parse_batch_response
+
+
+def test_analyze_article_returns_parsed_result_and_usage():
+    result = analyze_article(FakeModel(latency=0), make_articles(1)[0])
+    assert result["exception"] is None
+    assert result["parsed"]["bias"] == "center"
+    assert result["usage"]["prompt_tokens"] > 0 and result["usage"]["output_tokens"] > 0
+
+
+def test_analyze_article_captures_request_errors():
+    result = analyze_article(FakeModel(latency=0, error_rate=1.0), "Some article text")
+    assert result["raw"] is None
+    assert result["parsed"]["error"] == "Request failed"
+    assert result["exception"].code == 503
+
+
+def test_iter_analyses_yields_every_index_once():
+    texts = make_articles(25)
+    model = FakeModel(latency=0.002)
+    indices = [idx for idx, _ in iter_analyses(texts, model, max_workers=4)]
+    assert sorted(indices) == list(range(25))
+    assert model.calls == 25
+
+
+def test_analyze_batch_keeps_input_order_and_reports_progress():
+    texts = make_articles(10)
+    seen = []
+    results = analyze_batch(texts, FakeModel(latency=0), max_workers=3, on_result=lambda i, r: seen.append(i))
+    assert len(results) == 10 and all(r["parsed"]["bias"] == "center" for r in results)
+    assert sorted(seen) == list(range(10))
+
+
+def test_bounded_map_limits_calls_in_flight():
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def work(x):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.005)
+        with lock:
+            state["active"] -= 1
+        return x * 2
+
+    results = dict(_bounded_map(work, ((i, i) for i in range(20)), max_workers=3))
+    assert results == {i: i * 2 for i in range(20)}
+    assert state["peak"] <= 3
+
+
+def test_bounded_map_consumes_its_input_lazily():
+    pulled = []
+
+    def items():
+        for i in range(1000):
+            pulled.append(i)
+            yield i, i
+
+    results = _bounded_map(lambda x: x, items(), max_workers=2)
+    next(results)
+    results.close()
+    assert len(pulled) <= 3
+
+
+def test_bounded_map_reraises_worker_errors():
+    def work(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        list(_bounded_map(work, [(0, 0)], max_workers=1))
+
+
+class StrictModel(FakeModel):
+    """Accepts only what genai.GenerativeModel.generate_content does here."""
+
+    def generate_content(self, prompt, stream=False):
+        return super().generate_content(prompt, stream=stream)
+
+
+def test_uncached_rate_limited_chain_works_with_every_analysis_path():
+    model = RateLimitedModel(StrictModel(latency=0), AdaptiveRateLimiter(requests_per_minute=10_000))
+    texts = make_articles(3)
+    assert "error" not in analyze_article(model, texts[0])["parsed"]
+    assert "error" not in analyze_article_stream(model, texts[0])["parsed"]
+    results = analyze_packed(model, list(enumerate(texts)))
+    assert [idx for idx, _ in results] == [0, 1, 2]
+    assert all("error" not in result["parsed"] for _, result in results)
+
+
+def parse_failures():
+    return metrics.total("narrativelens_parse_failures_total", prompt="batch")
+
+
+class ScriptedBatchModel(FakeModel):
+    """Answers batched prompts with ``batch_text`` (or raises ``batch_error``)."""
+
+    def __init__(self, batch_text=None, batch_error=None):
+        super().__init__(latency=0)
+        self.batch_text = batch_text
+        self.batch_error = batch_error
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.prompts.append(prompt)
+        if batch_prompt_ids(prompt):
+            if self.batch_error is not None:
+                raise self.batch_error
+            return FakeResponse(self.batch_text, prompt)
+        return super().generate_content(prompt, stream=stream)
+
+
+def test_pack_articles_respects_token_and_size_budgets():
+    articles = ["x" * 400] * 5 + ["y" * 10_000] + ["z" * 40] * 3
+    groups = list(pack_articles(articles, max_batch_tokens=250, max_batch_size=2))
+    assert [[idx for idx, _ in g] for g in groups] == [[0, 1], [2, 3], [4], [5], [6, 7], [8]]
+
+
+def test_packed_analyses_use_one_request_per_group():
+    texts = make_articles(12)
+    model = FakeModel(latency=0)
+    results = dict(iter_packed_analyses(texts, model, max_batch_tokens=10_000, max_batch_size=5))
+    assert sorted(results) == list(range(12))
+    assert all("error" not in r["parsed"] for r in results.values())
+    assert model.calls == 3
+
+
+def test_articles_missing_from_the_reply_are_retried_singly():
+    item = {"bias": "left", "emotion": "calm", "framing": "neutral"}
+    model = ScriptedBatchModel(batch_text=json.dumps([dict(item, id=0), {"id": 2, "bias": "left"}]))
+    before = parse_failures()
+    results = dict(analyze_packed(model, list(enumerate(make_articles(3)))))
+    assert results[0]["parsed"]["bias"] == "left"
+    assert all("error" not in results[i]["parsed"] for i in (1, 2))
+    assert len(model.prompts) == 3  # the batch, then articles 1 and 2 alone
+    assert parse_failures() - before == 2
+
+
+@pytest.mark.parametrize("error", [
+    FakeServerError("503 The model is overloaded."),
+    FakeRateLimitError("429 Quota exceeded. quota_id: GenerateRequestsPerDayPerProjectPerModel"),
+])
+def test_a_failed_batch_request_fails_the_group_without_retries(error):
+    model = ScriptedBatchModel(batch_error=error)
+    before = parse_failures()
+    results = dict(analyze_packed(model, list(enumerate(make_articles(4)))))
+    assert len(model.prompts) == 1
+    assert parse_failures() == before
+    assert all(r["exception"] is error and r["parsed"]["error"] == "Request failed" for r in results.values())
+
+
+def test_parse_batch_response_maps_each_id():
+    ok = {"bias": "left", "emotion": "calm", "framing": "neutral"}
+    text = "```json\n" + json.dumps([dict(ok, id=0), dict(ok, id="2"), {"id": 5, "bias": "left"}]) + "\n```"
+    results = parse_batch_response(text, [0, 1, 2, 5])
+    assert results["0"]["bias"] == "left" and results["2"]["bias"] == "left"
+    assert results["1"]["details"] == "Missing from batch response"
+    assert "error" in results["5"]  # missing required fields
+
+
+@pytest.mark.parametrize("text", ["", "I can't do that.", '[{"id": 3, "bias": "left"', '{"id": 3}'])
+def test_parse_batch_response_fails_every_id_on_bad_text(text):
+    results = parse_batch_response(text, [3, 4])
+    assert set(results) == {"3", "4"}
+    assert all("error" in r for r in results.values())
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+
+import cache
+from batch import analyze_article, analyze_article_stream, analyze_packed, cacheable_response
+from cache import CachedModel, ResponseCache, make_cache_key
+from conftest import make_articles
+from fake_llm import FakeModel, FakeResponse
+from prompts import get_batch_bias_prompt, get_bias_prompt, get_reframe_prompt
+from reframe import stream_reframe
+
+VALID = json.dumps({"bias": "left", "emotion": "anger", "framing": "loaded"})
+
+
+class ScriptedModel:
+    """Answers every prompt with ``text`` and counts the calls."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        if stream:
+            return iter([FakeResponse(self.text[:5]), FakeResponse(self.text[5:])])
+        return FakeResponse(self.text, prompt)
+
+
+@pytest.fixture
+def store(workdir):
+    return ResponseCache(str(workdir / "cache.db"))
+
+
+def test_cache_key_ignores_whitespace_but_not_model():
+    assert make_cache_key("m", "a  b\n c") == make_cache_key("m", " a b c ")
+    assert make_cache_key("m", "a b") != make_cache_key("other", "a b")
+
+
+def test_entries_expire_after_ttl(workdir, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    store = ResponseCache(str(workdir / "cache.db"), ttl=60)
+    store.set("k", "v")
+    now[0] += 59
+    assert store.get("k") == "v"
+    now[0] += 2
+    assert store.get("k") is None
+    assert store.stats() == {"hits": 1, "misses": 1, "entries": 0}
+
+
+def test_evicts_least_recently_used(workdir, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    store = ResponseCache(str(workdir / "cache.db"), max_entries=2)
+    for key in ("a", "b"):
+        now[0] += 1
+        store.set(key, key)
+    now[0] += 1
+    store.get("a")  # "b" is now the least recently used
+    now[0] += 1
+    store.set("c", "c")
+    assert (store.get("a"), store.get("b"), store.get("c")) == ("a", None, "c")
+
+
+def test_cache_persists_across_instances(workdir):
+    ResponseCache(str(workdir / "cache.db")).set("k", "v")
+    assert ResponseCache(str(workdir / "cache.db")).get("k") == "v"
+
+
+def test_cached_model_serves_repeats_without_calling_the_model(store):
+    inner = ScriptedModel(VALID)
+    model = CachedModel(inner, store, "m")
+    assert model.generate_content("prompt").text == VALID
+    assert model.generate_content("prompt").text == VALID
+    assert [chunk.text for chunk in model.generate_content("prompt", stream=True)] == [VALID]
+    assert inner.calls == 1
+
+
+def test_only_complete_streams_are_cached(store):
+    model = CachedModel(ScriptedModel(VALID), store, "m")
+    stream = model.generate_content("prompt", stream=True)
+    next(stream)
+    stream.close()
+    assert store.stats()["entries"] == 0
+    "".join(chunk.text for chunk in model.generate_content("prompt", stream=True))
+    assert store.get(make_cache_key("m", "prompt")) == VALID
+
+
+@pytest.mark.parametrize("analyze", [
+    lambda model: analyze_article(model, "An article about the budget vote"),
+    lambda model: analyze_article_stream(model, "An article about the budget vote"),
+])
+def test_unparseable_analyses_are_not_cached(store, analyze):
+    inner = ScriptedModel("I'm sorry, I can't analyze this article.")
+    model = CachedModel(inner, store, "m", validate=cacheable_response)
+    assert "error" in analyze(model)["parsed"]
+    assert "error" in analyze(model)["parsed"]
+    assert inner.calls == 2
+    assert store.stats()["entries"] == 0
+
+    inner.text = VALID
+    analyze(model)
+    analyze(model)
+    assert inner.calls == 3
+
+
+def test_partial_batch_replies_are_not_cached():
+    prompt = get_batch_bias_prompt([(0, "first article"), (1, "second article")])
+    item = {"bias": "left", "emotion": "calm", "framing": "neutral"}
+    assert cacheable_response(prompt, json.dumps([dict(item, id=0), dict(item, id=1)]))
+    assert not cacheable_response(prompt, json.dumps([dict(item, id=0)]))
+    assert not cacheable_response(prompt, "not json")
+
+
+def test_free_text_prompts_are_always_cacheable():
+    assert cacheable_response(get_reframe_prompt("article"), "A neutral rewrite.")
+    assert not cacheable_response(get_bias_prompt("article"), "A neutral rewrite.")
+
+
+def test_reframes_are_cached_behind_the_validator(store):
+    inner = FakeModel(latency=0)
+    model = CachedModel(inner, store, "m", validate=cacheable_response)
+    first = "".join(stream_reframe(model, "Some article text"))
+    assert "".join(stream_reframe(model, "Some article text")) == first
+    assert inner.calls == 1
+
+
+def test_packed_analyses_through_the_cache(store):
+    inner = FakeModel(latency=0)
+    model = CachedModel(inner, store, "m", validate=cacheable_response)
+    group = list(enumerate(make_articles(3)))
+    for _ in range(2):
+        assert all("error" not in result["parsed"] for _, result in analyze_packed(model, group))
+    assert inner.calls == 1
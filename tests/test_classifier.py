@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pytest
+
+import classifier
+from bench_classifier import synthetic_history
+from classifier import (
+    LOCAL_OMISSIONS, OTHER_LABEL, TARGETS, LocalClassifier, current_classifier, normalize_label, train,
+    training_data
+)
+from conftest import make_articles
+from fake_llm import FakeModel
+from history import HistoryStore
+from jobs import JobQueue, WorkerPool
+from vector_index import VectorIndex
+
+
+@pytest.fixture
+def history(workdir):
+    return HistoryStore(str(workdir / "history.db"), legacy_json=None)
+
+
+@pytest.fixture
+def index(workdir):
+    return VectorIndex(str(workdir / "index"), dim=16)
+
+
+def head(classes, weights):
+    weights = np.asarray(weights, dtype=np.float32)
+    return np.array(classes, dtype=object), weights, np.zeros(len(classes), dtype=np.float32)
+
+
+def two_way_classifier():
+    """Confident about vectors along either axis, unsure about the diagonal."""
+    return LocalClassifier({
+        "bias": head(["left", "right"], [[20, 0], [0, 20]]),
+        "emotion": head(["neutral"], [[0, 0]]),
+        "framing": head(["conflict", OTHER_LABEL], [[20, 0], [0, 20]]),
+    })
+
+
+def test_labels_are_normalised():
+    assert normalize_label("bias", " Left ") == "left"
+    assert normalize_label("emotion", "Fear, anger,, fear") == "anger, fear"
+
+
+def test_predict_reports_the_weakest_head():
+    (labels, confident), (_, unsure), (other, rare) = two_way_classifier().predict([[1, 0], [1, 1], [0, 1]])
+    assert labels == {"bias": "left", "emotion": "neutral", "framing": "conflict"}
+    assert confident > 0.99
+    assert unsure == pytest.approx(0.5)
+    assert other["framing"] == OTHER_LABEL and rare == 0.0  # the pooled label is never accepted
+
+
+def test_analyze_only_returns_confident_articles(monkeypatch):
+    vectors = {"a clear story": [1, 0], "a mixed story": [1, 1]}
+    monkeypatch.setattr(classifier, "embed_articles", lambda texts: np.array([vectors[t] for t in texts]))
+    results = two_way_classifier().analyze(["a clear story", "a mixed story", "  "])
+    assert list(results) == [0]
+    parsed = results[0]["parsed"]
+    assert parsed["bias"] == "left" and parsed["omissions"] == LOCAL_OMISSIONS and "classifier" in parsed
+    assert results[0]["exception"] is None and results[0]["usage"]["prompt_tokens"] == 0
+
+
+def test_training_needs_enough_rows(history, index):
+    vectors, records = synthetic_history(10, dim=16)
+    index.add(history.append(records), vectors)
+    assert train(history, index)["error"] == "Not enough training data"
+
+
+def test_training_skips_errors_and_local_labels(history, index):
+    vectors, records = synthetic_history(4, dim=16)
+    records[1] = {"error": "Parse failed"}
+    records[2] = dict(records[2], classifier="v1")
+    index.add(history.append(records), vectors)
+    x, labels = training_data(history, index)
+    assert len(labels) == 2
+    np.testing.assert_allclose(x, index.items()[1][[0, 3]])
+
+
+def test_trained_classifier_agrees_with_its_labels(history, workdir):
+    vectors, records = synthetic_history(600, label_noise=0.0)
+    index = VectorIndex(str(workdir / "full"))
+    index.add(history.append(records), vectors)
+    model = train(history, index)
+    assert model.trained_rows == 600
+    assert set(model.heads) == set(TARGETS)
+    confident = [row for row in model.report if row["calls_saved"] > 0]
+    assert confident and all(row["agreement"] > 0.9 for row in confident)
+
+
+def test_current_classifier_reloads_after_retraining(workdir):
+    path = str(workdir / "model.pkl")
+    assert current_classifier(path) is None
+    two_way_classifier().save(path)
+    first = current_classifier(path)
+    assert current_classifier(path) is first
+    two_way_classifier().save(path)
+    os.utime(path, ns=(0, 0))
+    assert current_classifier(path) is not first
+
+
+def test_jobs_skip_the_llm_for_locally_labelled_articles(workdir, history, monkeypatch):
+    texts = make_articles(4)
+    vectors = {text: [1, 0] if n % 2 else [1, 1] for n, text in enumerate(texts)}
+    monkeypatch.setattr(classifier, "embed_articles", lambda batch: np.array([vectors[t] for t in batch]))
+    path = str(workdir / "model.pkl")
+    two_way_classifier().save(path)
+
+    queue = JobQueue(str(workdir / "jobs.db"))
+    options = {"dedupe": False, "local": True}
+    job_id = queue.submit(texts, options=options)
+    queue.claim()
+    model = FakeModel(latency=0)
+    WorkerPool(queue, model, history, classifier_path=path).run_job(job_id, options)
+    assert model.calls == 2
+    assert queue.status(job_id)["done"] == history.count() == 4
+    _, results = queue.results(job_id)
+    assert [results[i]["parsed"].get("omissions") == LOCAL_OMISSIONS for i in range(4)] == [False, True] * 2
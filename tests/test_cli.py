@@ -0,0 +1,136 @@
+import csv
+import json
+
+from cli import main, normalize_record, read_corpus, run
+from conftest import make_articles
+from fake_llm import FakeModel
+
+
+def records(texts, prefix="a"):
+    return [
+        {"id": f"{prefix}{i}", "title": f"Title {i}", "link": None, "published": None, "text": text}
+        for i, text in enumerate(texts)
+    ]
+
+
+def read_jsonl(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def test_normalize_record_picks_text_and_id():
+    record = normalize_record({"url": "https://x/1", "description": " Body ", "publishedAt": "2024-01-01"})
+    assert record == {"id": "https://x/1", "title": None, "link": "https://x/1", "published": "2024-01-01",
+                      "text": "Body"}
+    assert normalize_record({"text": "same"})["id"] == normalize_record({"text": "same"})["id"]
+
+
+def test_read_corpus_formats(workdir):
+    rows = [{"title": "T", "summary": "S", "link": "L"}]
+    (workdir / "c.json").write_text(json.dumps(rows))
+    (workdir / "c.jsonl").write_text(json.dumps(rows[0]) + "\n\n")
+    with open(workdir / "c.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["title", "summary", "link"])
+        writer.writeheader()
+        writer.writerows(rows)
+    for name in ("c.json", "c.jsonl", "c.csv"):
+        assert [r["text"] for r in read_corpus(str(workdir / name))] == ["S"]
+
+
+def test_resume_retries_only_failed_articles(workdir):
+    corpus = records(make_articles(30))
+    output = str(workdir / "results.jsonl")
+
+    first = run(corpus, output, FakeModel(latency=0, error_rate=0.3, seed=1), workers=3)
+    assert first["failed"] > 0
+    assert first["analyzed"] + first["failed"] == 30
+    assert len(read_jsonl(output)) == first["analyzed"]
+    assert len(read_jsonl(output + ".errors.jsonl")) == first["failed"]
+
+    model = FakeModel(latency=0)
+    second = run(corpus, output, model, workers=3)
+    assert second["skipped"] == first["analyzed"]
+    assert second["analyzed"] == model.calls == first["failed"]
+    assert sorted(row["id"] for row in read_jsonl(output)) == sorted(r["id"] for r in corpus)
+
+
+def test_resume_after_a_torn_last_line(workdir):
+    corpus = records(make_articles(5))
+    output = workdir / "results.jsonl"
+    run(corpus[:3], str(output), FakeModel(latency=0))
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "a3", "bias"')  # interrupted mid-write
+
+    model = FakeModel(latency=0)
+    stats = run(corpus, str(output), model)
+    assert (stats["skipped"], stats["analyzed"], model.calls) == (3, 2, 2)
+    ids = []
+    for line in output.read_text(encoding="utf-8").splitlines():
+        try:
+            ids.append(json.loads(line)["id"])
+        except ValueError:
+            continue
+    assert sorted(ids) == ["a0", "a1", "a2", "a3", "a4"]
+
+
+def test_limit_and_blank_articles(workdir):
+    corpus = records(make_articles(6) + [""])
+    model = FakeModel(latency=0)
+    stats = run(corpus, str(workdir / "results.jsonl"), model, limit=4)
+    assert stats["analyzed"] == model.calls == 4
+
+
+def test_main_with_fake_model(workdir, capsys):
+    corpus = workdir / "corpus.jsonl"
+    corpus.write_text("".join(json.dumps({"id": i, "summary": t}) + "\n" for i, t in enumerate(make_articles(3))))
+    main([str(corpus), "-o", str(workdir / "out.jsonl"), "--fake", "--metrics", str(workdir / "run.prom")])
+    assert len(read_jsonl(workdir / "out.jsonl")) == 3
+    assert "Analyzed 3 articles" in capsys.readouterr().out
+    assert (workdir / "run.prom").exists()
+
+
+def test_run_is_silent_unless_given_a_log(workdir, capsys):
+    corpus = records(make_articles(100))
+    run(corpus, str(workdir / "results.jsonl"), FakeModel(latency=0))
+    assert capsys.readouterr().out == ""
+    messages = []
+    run(records(make_articles(100, seed=1), prefix="b"), str(workdir / "results.jsonl"), FakeModel(latency=0),
+        log=messages.append)
+    assert messages == ["100 analyzed, 0 failed"]
+
+
+def test_dedupe_reuses_representative_results(workdir):
+    texts = make_articles(4)
+    corpus = records(texts) + records([text + " Updated." for text in texts], prefix="dup")
+    output = str(workdir / "results.jsonl")
+
+    model = FakeModel(latency=0)
+    stats = run(corpus, output, model, workers=2, dedupe=True)
+    assert model.calls == 4
+    assert (stats["analyzed"], stats["deduplicated"], stats["failed"]) == (8, 4, 0)
+    rows = {row["id"]: row for row in read_jsonl(output)}
+    assert all(rows[f"dup{i}"]["duplicate_of"] == f"a{i}" for i in range(4))
+
+
+def test_dedupe_never_drops_duplicates_of_failed_representatives(workdir):
+    texts = make_articles(20, seed=3)
+    corpus = records(texts) + records([text + " Updated." for text in texts], prefix="dup")
+    output = str(workdir / "results.jsonl")
+
+    stats = run(corpus, output, FakeModel(latency=0, error_rate=0.4, seed=2), workers=3, dedupe=True)
+    rows, errors = read_jsonl(output), read_jsonl(output + ".errors.jsonl")
+    assert stats["failed"] > 0
+    assert len(rows) + len(errors) == len(corpus)
+    failed_reps = {row["id"] for row in errors if "duplicate_of" not in row}
+    assert {row["duplicate_of"] for row in errors if "duplicate_of" in row} == failed_reps
+    # Only successful reuses count as saved calls
+    assert stats["deduplicated"] == sum("duplicate_of" in row for row in rows)
+
+    # The next run retries the failed representatives and their duplicates
+    model = FakeModel(latency=0)
+    run(corpus, output, model, workers=3, dedupe=True)
+    assert model.calls == len(failed_reps)
+    assert len(read_jsonl(output)) == len(corpus)
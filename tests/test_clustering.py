@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+
+import clustering
+from clustering import EmbeddingStore, embed_articles, text_hash
+from conftest import make_articles
+
+
+class CountingEncoder:
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return self.encoder.encode(texts, **kwargs)
+
+
+def test_embedding_store_round_trips_float32(workdir):
+    vector = np.arange(4, dtype=np.float32)
+    EmbeddingStore(str(workdir / "e.db")).put_many([("h", vector)])
+    found = EmbeddingStore(str(workdir / "e.db")).get_many(["h", "missing"])
+    assert list(found) == ["h"]
+    np.testing.assert_array_equal(found["h"], vector)
+
+
+def test_only_unseen_texts_are_encoded(workdir, hashing_encoder, monkeypatch):
+    counter = CountingEncoder(hashing_encoder)
+    monkeypatch.setattr(clustering, "_model", counter)
+    store = EmbeddingStore(str(workdir / "e.db"))
+    texts = make_articles(5)
+
+    first = embed_articles(texts + texts[:2], store=store)
+    assert first.shape == (7, hashing_encoder.dim)
+    assert len(counter.encoded) == 5
+    second = embed_articles(texts[:3] + ["A brand new article"], store=store)
+    assert counter.encoded[5:] == ["A brand new article"]
+    np.testing.assert_allclose(second[:3], first[:3])
+
+
+def test_blank_and_tiny_texts_are_skipped(hashing_encoder):
+    assert embed_articles(["", "   ", "hi"]) is None
+    assert embed_articles(["", "A real article text"]).shape[0] == 1
+
+
+def test_store_path_comes_from_the_environment(workdir, hashing_encoder, monkeypatch):
+    path = workdir / "shared" / "embeddings.db"
+    path.parent.mkdir()
+    monkeypatch.setenv("NARRATIVELENS_EMBEDDING_STORE", str(path))
+    embed_articles(["A real article text"])
+    assert path.exists()
+    assert text_hash("A real article text") in EmbeddingStore(str(path)).get_many([text_hash("A real article text")])
+    assert not (workdir / "embeddings.db").exists()
+
+
+def test_map_dir_comes_from_the_environment(workdir, monkeypatch):
+    monkeypatch.setenv("NARRATIVELENS_MAP_DIR", str(workdir / "maps"))
+    embeddings = np.random.default_rng(0).normal(size=(4, 8)).astype(np.float32)
+    clustering.get_semantic_map(embeddings)
+    assert len(list((workdir / "maps").glob("*.pkl"))) == 1
+    assert not (workdir / clustering.DEFAULT_MAP_DIR).exists()
+
+
+def blobs(n, seed=0, dim=16, centres=3):
+    rng = np.random.default_rng(seed)
+    points = rng.normal(scale=8.0, size=(centres, dim))[rng.integers(centres, size=n)]
+    return (points + rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_corpus_key_depends_on_data_and_settings():
+    embeddings = blobs(6)
+    assert clustering.corpus_key(embeddings) == clustering.corpus_key(embeddings.copy())
+    assert clustering.corpus_key(embeddings) != clustering.corpus_key(embeddings, n_neighbors=10)
+    assert clustering.corpus_key(embeddings) != clustering.corpus_key(embeddings[:5])
+
+
+def test_fitted_map_is_cached_and_places_new_points(workdir):
+    embeddings = blobs(40)
+    fitted = clustering.get_semantic_map(embeddings, map_dir=str(workdir / "maps"))
+    assert fitted.coords.shape == (40, 2) and fitted.labels.shape == (40,)
+    loaded = clustering.get_semantic_map(embeddings, map_dir=str(workdir / "maps"))
+    assert loaded is not fitted
+    np.testing.assert_array_equal(loaded.coords, fitted.coords)
+
+    coords, labels = loaded.transform(blobs(5, seed=1))
+    assert coords.shape == (5, 2) and labels.shape == (5,)
+
+
+def test_tiny_corpora_fall_back_to_pca(workdir):
+    fitted = clustering.get_semantic_map(blobs(4), map_dir=str(workdir / "maps"))
+    assert type(fitted.reducer).__name__ == "PCA"
+    assert fitted.coords.shape == (4, 2)
+    assert clustering.get_semantic_map(blobs(2), map_dir=str(workdir / "maps")).labels.tolist() == [0, 0]
+
+
+def test_corrupt_map_is_refit(workdir):
+    embeddings = blobs(4)
+    path = workdir / "maps" / f"{clustering.corpus_key(embeddings)}.pkl"
+    path.parent.mkdir()
+    path.write_bytes(b"not a pickle")
+    assert clustering.get_semantic_map(embeddings, map_dir=str(path.parent)).coords.shape == (4, 2)
+    assert clustering.SemanticMap.load(str(path)).coords.shape == (4, 2)
+
+
+def test_map_cache_evicts_least_recently_used(workdir):
+    map_dir = str(workdir / "maps")
+    corpora = [blobs(4, seed=seed) for seed in range(4)]
+    clustering.get_semantic_map(corpora[0], map_dir=map_dir)
+    size = (workdir / "maps" / f"{clustering.corpus_key(corpora[0])}.pkl").stat().st_size
+    budget = int(size * 2.5)
+
+    for age, embeddings in enumerate(corpora[:2]):
+        clustering.get_semantic_map(embeddings, map_dir=map_dir, max_bytes=budget)
+        path = workdir / "maps" / f"{clustering.corpus_key(embeddings)}.pkl"
+        os.utime(path, (100 + age, 100 + age))
+    clustering.get_semantic_map(corpora[0], map_dir=map_dir, max_bytes=budget)  # a hit refreshes corpus 0
+    clustering.get_semantic_map(corpora[2], map_dir=map_dir, max_bytes=budget)
+
+    cached = {p.stem for p in (workdir / "maps").glob("*.pkl")}
+    assert cached == {clustering.corpus_key(corpora[0]), clustering.corpus_key(corpora[2])}
+
+
+def test_an_oversized_map_is_still_kept(workdir):
+    map_dir = str(workdir / "maps")
+    clustering.get_semantic_map(blobs(4), map_dir=map_dir, max_bytes=1)
+    clustering.get_semantic_map(blobs(4, seed=1), map_dir=map_dir, max_bytes=1)
+    assert [p.stem for p in (workdir / "maps").glob("*.pkl")] == [clustering.corpus_key(blobs(4, seed=1))]
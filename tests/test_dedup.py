@@ -0,0 +1,36 @@
+import pytest
+
+from conftest import make_articles
+from dedup import NearDuplicateIndex, group_near_duplicates, shingles
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert set(shingles("The Council voted, today!")) == set(shingles("the council voted today"))
+    assert shingles("").size == 0
+    assert shingles("two words").size == 1
+
+
+def test_groups_light_edits_with_their_representative():
+    texts = make_articles(10)
+    edited = [text.replace(".", ", officials said.") for text in texts]
+    groups = group_near_duplicates(texts + edited + [texts[3]])
+    assert groups[:10] == list(range(10))
+    assert groups[10:] == list(range(10)) + [3]
+
+
+def test_distinct_articles_stay_apart():
+    groups = group_near_duplicates(make_articles(200, seed=7))
+    assert groups == list(range(200))
+
+
+def test_threshold_controls_what_counts_as_a_duplicate():
+    text = make_articles(1)[0]
+    words = text.split()
+    rewritten = " ".join(words[: len(words) // 2] + ["entirely", "different", "ending"] * 5)
+    assert group_near_duplicates([text, rewritten], threshold=0.95) == [0, 1]
+    assert group_near_duplicates([text, text + " Updated."], threshold=0.8) == [0, 0]
+
+
+def test_index_rejects_uneven_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=100, bands=16)
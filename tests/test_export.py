@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+import pytest
+
+import export
+from export import EXPORT_FIELDS, create_pdf_report, export_bytes, export_file, write_export
+from history import HistoryStore
+from synthetic import synthetic_results
+
+
+def results(n=5):
+    return list(synthetic_results(n))
+
+
+def test_json_and_jsonl_round_trip():
+    expected = results()
+    assert json.loads(export_bytes(iter(expected), "json")) == expected
+    lines = export_bytes(iter(expected), "jsonl").decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == expected
+    assert json.loads(export_bytes([], "json")) == []
+
+
+def test_csv_keeps_only_export_fields_and_leaves_the_file_open():
+    expected = results()
+    buffer = io.BytesIO()
+    write_export([dict(r, extra="dropped") for r in expected], "csv", buffer)
+    assert not buffer.closed
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue().decode("utf-8"))))
+    assert tuple(rows[0]) == EXPORT_FIELDS
+    assert [row["omissions"] for row in rows] == [r["omissions"] for r in expected]
+
+
+def test_parquet_is_written_in_row_groups():
+    pq = pytest.importorskip("pyarrow.parquet")
+    buffer = io.BytesIO()
+    export.write_parquet(iter(results(5)), buffer, batch_rows=2)
+    table = pq.read_table(io.BytesIO(buffer.getvalue()))
+    assert table.column_names == list(EXPORT_FIELDS)
+    assert table.column("title").to_pylist() == [r["title"] for r in results(5)]
+    assert pq.ParquetFile(io.BytesIO(buffer.getvalue())).num_row_groups == 3
+
+
+def test_pdf_report_is_written_to_a_fresh_file(workdir):
+    pytest.importorskip("fpdf")
+    path = create_pdf_report(results(3))
+    try:
+        assert open(path, "rb").read(5) == b"%PDF-"
+        assert path != create_pdf_report(results(1), str(workdir / "named.pdf"))
+        assert (workdir / "named.pdf").read_bytes().startswith(b"%PDF-")
+    finally:
+        export.os.remove(path)
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="xml"):
+        export_bytes(results(1), "xml")
+
+
+def test_failed_export_leaves_no_temp_file(workdir):
+    def broken():
+        yield results(1)[0]
+        raise RuntimeError("history went away")
+
+    with pytest.raises(RuntimeError):
+        export_file(broken(), "jsonl", directory=str(workdir))
+    assert list(workdir.iterdir()) == []
+
+
+def test_cli_exports_the_history(workdir):
+    store = HistoryStore(str(workdir / "history.db"), legacy_json=None)
+    store.append(results(4))
+    export.main(["-f", "jsonl", "-o", str(workdir / "out.jsonl"), "--history", str(workdir / "history.db")])
+    assert list(export.read_jsonl(str(workdir / "out.jsonl"))) == results(4)
@@ -0,0 +1,77 @@
+import json
+import threading
+
+import pytest
+
+from history import HistoryStore
+from synthetic import synthetic_results
+
+
+@pytest.fixture
+def store(workdir):
+    return HistoryStore(str(workdir / "history.db"), legacy_json=None)
+
+
+def test_append_returns_increasing_ids(store):
+    results = list(synthetic_results(5))
+    ids = store.append(results[:3]) + store.append(results[3:])
+    assert ids == sorted(ids) and len(set(ids)) == 5
+    assert store.count() == 5 and store.max_id() == ids[-1]
+    assert store.get_many([ids[0], ids[4], 999]) == {ids[0]: results[0], ids[4]: results[4]}
+
+
+def test_latest_and_between(store):
+    results = list(synthetic_results(6))
+    store.append(results[:2], created=100.0)
+    store.append(results[2:4], created=200.0)
+    store.append(results[4:], created=300.0)
+    assert store.latest(2) == [results[5], results[4]]
+    assert store.between(150, 300) == results[2:4]
+
+
+def test_iter_records_pages_through_everything(store):
+    results = list(synthetic_results(25))
+    store.append(results)
+    assert list(store.iter_records(batch_size=7)) == results
+
+
+def test_columns_since_skips_json_decoding(store):
+    results = list(synthetic_results(3))
+    ids = store.append(results, created=50.0)
+    rows = store.columns_since(ids[0])
+    assert [row[0] for row in rows] == ids[1:]
+    assert rows[0][1:] == (50.0, results[1]["published"], results[1]["bias"], results[1]["emotion"],
+                           results[1]["framing"], results[1]["source"])
+
+
+def test_concurrent_appends_from_two_connections(workdir):
+    path = str(workdir / "history.db")
+    stores = [HistoryStore(path, legacy_json=None) for _ in range(2)]
+    results = list(synthetic_results(40))
+
+    def write(store, chunk):
+        for result in chunk:
+            store.append([result])
+
+    threads = [threading.Thread(target=write, args=(s, results[i::2])) for i, s in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stores[0].count() == 40
+
+
+def test_legacy_json_is_imported_once(workdir):
+    legacy = workdir / "analysis_history.json"
+    results = list(synthetic_results(3))
+    legacy.write_text(json.dumps(results + ["not a record"]))
+    path = str(workdir / "history.db")
+    assert HistoryStore(path, legacy_json=str(legacy)).count() == 3
+    assert HistoryStore(path, legacy_json=str(legacy)).count() == 3
+    assert HistoryStore(path, legacy_json=None).latest(1) == [results[2]]
+
+
+def test_unreadable_legacy_json_imports_nothing(workdir):
+    legacy = workdir / "analysis_history.json"
+    legacy.write_text("{not json")
+    assert HistoryStore(str(workdir / "history.db"), legacy_json=str(legacy)).count() == 0
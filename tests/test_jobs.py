@@ -0,0 +1,170 @@
+import pytest
+
+from conftest import make_articles
+from fake_llm import FakeModel
+from history import HistoryStore
+from jobs import JobQueue, WorkerPool
+from vector_index import VectorIndex
+
+
+@pytest.fixture
+def queue(workdir):
+    return JobQueue(str(workdir / "jobs.db"))
+
+
+@pytest.fixture
+def history(workdir):
+    return HistoryStore(str(workdir / "history.db"), legacy_json=None)
+
+
+def item_rows(queue, job_id):
+    return queue._conn.execute(
+        "SELECT idx, status, history_id FROM job_items WHERE job_id = ? ORDER BY idx", (job_id,)
+    ).fetchall()
+
+
+def test_claim_takes_the_oldest_queued_job(queue):
+    first = queue.submit(["a", "b"], options={"dedupe": False})
+    second = queue.submit(["c"])
+    assert queue.claim() == (first, {"dedupe": False})
+    assert queue.claim() == (second, {})
+    assert queue.claim() is None
+    assert queue.status(first)["status"] == "running"
+
+
+def test_retry_requeues_failed_items_of_finished_jobs(queue):
+    job_id = queue.submit(["a", "b", "c"])
+    queue.claim()
+    assert queue.retry(job_id) == 0  # still running
+    queue.finish_item(job_id, 0, "done", {"parsed": {}})
+    queue.finish_item(job_id, 1, "failed", {"error": "boom"})
+    queue.finish(job_id)
+    assert queue.status(job_id)["failed"] == 1
+
+    assert queue.retry(job_id) == 2  # the failed item and the one never reached
+    assert [idx for idx, _, _ in queue.pending_items(job_id)] == [1, 2]
+    assert queue.status(job_id)["status"] == "queued"
+    assert queue.retry("missing") == 0
+
+
+def test_cancel_wins_over_finish(queue):
+    job_id = queue.submit(["a"])
+    queue.claim()
+    queue.cancel(job_id)
+    queue.finish(job_id)
+    assert queue.status(job_id)["status"] == "cancelled"
+
+
+def test_requeue_running_after_restart(queue, workdir):
+    job_id = queue.submit(["a"])
+    queue.claim()
+    reopened = JobQueue(str(workdir / "jobs.db"))
+    assert reopened.requeue_running() == 1
+    assert reopened.claim() == (job_id, {})
+
+
+def test_results_polls_only_changed_items(queue):
+    job_id = queue.submit(["a", "b"])
+    queue.finish_item(job_id, 1, "done", {"n": 1})
+    seq, changed = queue.results(job_id)
+    assert changed == {1: {"n": 1}}
+    queue.finish_item(job_id, 0, "done", {"n": 0})
+    assert queue.results(job_id, after=seq)[1] == {0: {"n": 0}}
+
+
+def test_run_job_saves_each_result_to_history(queue, history):
+    texts = make_articles(12)
+    job_id = queue.submit(texts, options={"dedupe": False})
+    queue.claim()
+    model = FakeModel(latency=0, error_rate=0.25, malformed_rate=0.25, seed=2)
+    WorkerPool(queue, model, history).run_job(job_id, {"dedupe": False})
+    queue.finish(job_id)
+
+    rows = item_rows(queue, job_id)
+    done = [r for r in rows if r[1] == "done"]
+    failed = [r for r in rows if r[1] == "failed"]
+    assert done and failed and model.malformed
+    # Only parsed results reach the history, each linked to its item
+    assert history.count() == len(done)
+    assert all(history_id is not None for _, _, history_id in done)
+    assert all(history_id is None for _, _, history_id in failed)
+    _, results = queue.results(job_id)
+    assert all(results[idx]["parsed"] is None and results[idx]["error"] for idx, _, _ in failed)
+
+    # Parse failures are retried like request failures
+    assert queue.retry(job_id) == len(failed)
+    queue.claim()
+    WorkerPool(queue, FakeModel(latency=0), history).run_job(job_id, {"dedupe": False})
+    assert all(status == "done" for _, status, _ in item_rows(queue, job_id))
+    assert history.count() == len(texts)
+
+
+def test_interrupted_job_keeps_finished_work(queue, history, monkeypatch):
+    texts = make_articles(10)
+    job_id = queue.submit(texts, options={"dedupe": False})
+    queue.claim()
+    calls = {"n": 0}
+    is_cancelled = queue.is_cancelled
+
+    def crash_after_four(job):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            raise RuntimeError("process stopped")
+        return is_cancelled(job)
+
+    monkeypatch.setattr(queue, "is_cancelled", crash_after_four)
+    with pytest.raises(RuntimeError):
+        WorkerPool(queue, FakeModel(latency=0), history, max_concurrency=1).run_job(job_id, {"dedupe": False})
+    assert queue.status(job_id)["done"] == history.count() == 4
+
+    monkeypatch.setattr(queue, "is_cancelled", is_cancelled)
+    queue.requeue_running()
+    queue.claim()
+    model = FakeModel(latency=0)
+    WorkerPool(queue, model, history).run_job(job_id, {"dedupe": False})
+    assert model.calls == 6
+    assert queue.status(job_id)["done"] == history.count() == 10
+
+
+def test_a_crashed_job_records_its_error(queue, history, monkeypatch):
+    job_id = queue.submit(make_articles(3))
+    pool = WorkerPool(queue, FakeModel(latency=0), history, workers=1, poll_interval=0.01)
+
+    def crash(job, options):
+        pool._stop.set()
+        raise RuntimeError("dedupe exploded")
+
+    monkeypatch.setattr(pool, "run_job", crash)
+    pool._loop()
+    info = queue.status(job_id)
+    assert info["status"] == "done" and info["error"] == "dedupe exploded"
+    assert info["done"] == info["failed"] == 0
+
+
+def test_duplicates_share_their_representatives_outcome(queue, history):
+    texts = make_articles(6, seed=5)
+    articles = texts + [text + " Updated." for text in texts]
+    job_id = queue.submit(articles)
+    queue.claim()
+    model = FakeModel(latency=0, error_rate=0.5, seed=1)
+    WorkerPool(queue, model, history).run_job(job_id, {"dedupe": True})
+
+    assert model.calls == len(texts)
+    status = {idx: s for idx, s, _ in item_rows(queue, job_id)}
+    assert "failed" in status.values()
+    assert all(status[i] == status[i + len(texts)] for i in range(len(texts)))
+    _, results = queue.results(job_id)
+    assert all(results[i + len(texts)]["duplicate_of"] == i for i in range(len(texts)))
+    assert history.count() == sum(s == "done" for s in status.values())
+
+
+def test_related_indexes_every_saved_item_once(queue, history, workdir, hashing_encoder):
+    index = VectorIndex(str(workdir / "index"))
+    pool = WorkerPool(queue, FakeModel(latency=0), history, vector_index=index)
+    for seed in (0, 1):
+        job_id = queue.submit(make_articles(5, seed=seed), options={"related": True, "dedupe": False})
+        queue.claim()
+        pool.run_job(job_id, {"related": True, "dedupe": False})
+        pool.run_job(job_id, {"related": True, "dedupe": False})  # nothing left to index
+    ids, _ = index.items()
+    assert sorted(ids.tolist()) == list(range(1, 11))
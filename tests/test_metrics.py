@@ -0,0 +1,93 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from batch import analyze_article
+from conftest import make_articles
+from fake_llm import FakeModel
+from metrics import STAGE_METRIC, Metrics, export_periodically, metrics, serve
+
+
+@pytest.fixture
+def registry():
+    return Metrics(buckets=(0.1, 1.0))
+
+
+def test_counters_sum_over_matching_labels(registry):
+    registry.inc("requests_total", prompt="single", outcome="ok")
+    registry.inc("requests_total", 2, outcome="ok", prompt="single")
+    registry.inc("requests_total", prompt="batch", outcome="error")
+    assert registry.total("requests_total") == 4
+    assert registry.total("requests_total", outcome="ok") == 3
+    assert registry.total("requests_total", prompt="batch", outcome="ok") == 0
+    assert registry.total("missing_total") == 0
+
+
+def test_stage_timers_and_decorator(registry):
+    with registry.stage("fetch") as timer:
+        pass
+    assert timer.elapsed >= 0
+
+    @registry.timed("parse")
+    def parse(value):
+        return value * 2
+
+    assert parse(2) == parse(3) - 2 == 4
+    summary = registry.stage_summary()
+    assert summary["fetch"]["count"] == 1
+    assert summary["parse"]["count"] == 2 and summary["parse"]["mean"] == summary["parse"]["total"] / 2
+
+
+def test_a_failing_stage_is_still_timed(registry):
+    with pytest.raises(ValueError):
+        with registry.stage("reframe"):
+            raise ValueError("bad response")
+    assert registry.stage_summary()["reframe"]["count"] == 1
+
+
+def test_prometheus_text_format(registry):
+    registry.inc("narrativelens_parse_failures_total", prompt='say "hi"\n')
+    registry.observe(STAGE_METRIC, 0.5, stage="fetch")
+    registry.observe(STAGE_METRIC, 5.0, stage="fetch")
+    lines = registry.prometheus_text().splitlines()
+    assert "# TYPE narrativelens_parse_failures_total counter" in lines
+    assert 'narrativelens_parse_failures_total{prompt="say \\"hi\\"\\n"} 1' in lines
+    assert f"# HELP {STAGE_METRIC} Time spent in each pipeline stage." in lines
+    buckets = [line for line in lines if line.startswith(f"{STAGE_METRIC}_bucket")]
+    assert [line.rsplit(" ", 1)[1] for line in buckets] == ["0", "1", "2"]
+    assert buckets[-1].startswith(f'{STAGE_METRIC}_bucket{{stage="fetch",le="+Inf"}}')
+    assert f'{STAGE_METRIC}_sum{{stage="fetch"}} 5.5' in lines
+    assert f'{STAGE_METRIC}_count{{stage="fetch"}} 2' in lines
+
+
+def test_file_and_http_exports(registry, workdir):
+    registry.inc("narrativelens_local_labels_total", 3)
+    path = str(workdir / "metrics.prom")
+    stop = export_periodically(path, interval=60, registry=registry)
+    stop.set()
+    assert "narrativelens_local_labels_total 3" in open(path).read()
+
+    server = serve(0, registry=registry, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "narrativelens_local_labels_total 3" in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        server.shutdown()
+
+
+def test_analysis_records_requests_and_tokens():
+    before_ok = metrics.total("narrativelens_llm_requests_total", prompt="single", outcome="ok")
+    before_tokens = metrics.total("narrativelens_llm_tokens_total", kind="prompt")
+    before_generate = metrics.stage_summary().get("generate", {"count": 0})["count"]
+    result = analyze_article(FakeModel(latency=0), make_articles(1)[0])
+    assert "error" not in result["parsed"]
+    assert metrics.total("narrativelens_llm_requests_total", prompt="single", outcome="ok") == before_ok + 1
+    assert metrics.total("narrativelens_llm_tokens_total", kind="prompt") == (
+        before_tokens + result["usage"]["prompt_tokens"]
+    )
+    assert metrics.stage_summary()["generate"]["count"] == before_generate + 1
@@ -0,0 +1,58 @@
+import os
+
+import prompts
+from prompts import PromptRegistry, PromptTemplate, batch_prompt_ids, get_batch_bias_prompt, get_bias_prompt
+
+
+def test_template_fills_placeholders_and_leaves_other_braces():
+    template = PromptTemplate("t", 'Return {"bias": "..."} for {article} ({missing})')
+    assert template.render(article="TEXT") == 'Return {"bias": "..."} for TEXT ({missing})'
+
+
+def test_values_are_not_reinterpreted():
+    assert PromptTemplate("t", "A: {article}").render(article="{article} {x}") == "A: {article} {x}"
+
+
+def test_version_tracks_the_text():
+    assert PromptTemplate("a", "same").version == PromptTemplate("b", "same").version
+    assert PromptTemplate("a", "same").version != PromptTemplate("a", "other").version
+
+
+def test_matches_recognises_rendered_prompts():
+    template = PromptTemplate("t", "Head {article} tail")
+    assert template.matches(template.render(article="anything at all"))
+    assert not template.matches("Head only")
+    assert not PromptTemplate("t", "Head {article} tail").matches("Other anything tail")
+
+
+def test_registry_resolves_relative_to_the_package(workdir):
+    assert os.getcwd() == str(workdir)
+    assert "{article}" not in get_bias_prompt("An article")
+    assert "An article" in get_bias_prompt("An article")
+
+
+def test_registry_reloads_edited_templates(workdir):
+    (workdir / "p.txt").write_text("v1 {x}")
+    registry = PromptRegistry(str(workdir), reload_interval=0)
+    first = registry.version("p")
+    assert registry.render("p", x="a") == "v1 a"
+
+    (workdir / "p.txt").write_text("v2 {x}")
+    os.utime(workdir / "p.txt", ns=(0, os.stat(workdir / "p.txt").st_mtime_ns + 10**9))
+    assert registry.render("p", x="a") == "v2 a"
+    assert registry.version("p") != first
+
+
+def test_registry_caches_between_checks(workdir, monkeypatch):
+    (workdir / "p.txt").write_text("v1")
+    registry = PromptRegistry(str(workdir), reload_interval=3600)
+    template = registry.get("p")
+    calls = []
+    monkeypatch.setattr(prompts.os, "stat", lambda path: calls.append(path))
+    assert registry.get("p") is template and calls == []
+
+
+def test_batch_prompt_carries_article_ids():
+    prompt = get_batch_bias_prompt([(3, "first"), ("x7", "second")])
+    assert batch_prompt_ids(prompt) == ["3", "x7"]
+    assert batch_prompt_ids(get_bias_prompt("[id=1] not on its own line")) == []
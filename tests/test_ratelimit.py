@@ -0,0 +1,126 @@
+import pytest
+
+import ratelimit
+from fake_llm import FakeModel, FakeRateLimitError, FakeServerError
+from ratelimit import (
+    AdaptiveRateLimiter, RateLimitedModel, TokenBucket, is_daily_quota_error, is_rate_limit_error, retry_delay_hint
+)
+
+DAILY = FakeRateLimitError("429 Quota exceeded. quota_id: GenerateRequestsPerDayPerProjectPerModel")
+
+
+class FlakyModel:
+    """Raises each error in ``errors`` once, then answers normally."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.inner = FakeModel(latency=0)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.inner.generate_content(prompt, **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(ratelimit.time, "sleep", recorded.append)
+    return recorded
+
+
+def limited(model, **kwargs):
+    return RateLimitedModel(model, AdaptiveRateLimiter(requests_per_minute=10_000), **kwargs)
+
+
+def test_error_classification():
+    assert is_rate_limit_error(FakeRateLimitError("429 Resource has been exhausted"))
+    assert not is_rate_limit_error(FakeServerError("503 overloaded"))
+    assert is_daily_quota_error(DAILY)
+    assert not is_daily_quota_error(FakeRateLimitError("429 quota_id: GenerateRequestsPerMinutePerProjectPerModel"))
+
+
+def test_retry_delay_hint_formats():
+    assert retry_delay_hint(Exception("429 ... retry_delay { seconds: 17 }")) == 17
+    assert retry_delay_hint(Exception("Please retry in 2.5s.")) == 2.5
+    assert retry_delay_hint(Exception("429")) is None
+
+
+def test_retries_rate_limit_errors_with_backoff(sleeps):
+    model = FlakyModel([FakeRateLimitError("429 exhausted")] * 3)
+    response = limited(model, base_delay=1.0).generate_content("prompt")
+    assert response.text and model.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= 1.0 * 2 ** attempt for attempt, delay in enumerate(sleeps))
+
+
+def test_waits_at_least_the_server_hint(sleeps):
+    model = FlakyModel([FakeRateLimitError("429 exhausted, retry in 30s")])
+    limited(model, base_delay=0.001).generate_content("prompt")
+    assert sleeps == [30.0]
+
+
+def test_backoff_is_capped(sleeps):
+    model = FlakyModel([FakeRateLimitError("429 exhausted")] * 5)
+    limited(model, base_delay=100, max_delay=2).generate_content("prompt")
+    assert max(sleeps) <= 2
+
+
+def test_gives_up_after_max_retries(sleeps):
+    model = FlakyModel([FakeRateLimitError("429 exhausted")] * 10)
+    with pytest.raises(FakeRateLimitError):
+        limited(model, max_retries=2).generate_content("prompt")
+    assert model.calls == 3
+
+
+@pytest.mark.parametrize("error", [DAILY, FakeServerError("503 overloaded")])
+def test_daily_quota_and_other_errors_are_not_retried(sleeps, error):
+    model = FlakyModel([error])
+    with pytest.raises(type(error)):
+        limited(model).generate_content("prompt")
+    assert model.calls == 1 and sleeps == []
+
+
+def test_throttle_drops_to_observed_throughput_and_success_probes_up():
+    limiter = AdaptiveRateLimiter(requests_per_minute=100)
+    for _ in range(10):
+        limiter.on_success()
+    grown = limiter.requests_per_minute
+    assert grown > 100
+    limiter.on_throttle(FakeRateLimitError("429 requests per minute"))
+    assert limiter.requests_per_minute == pytest.approx(10 * limiter.safety)
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_token_throttle_only_lowers_the_token_budget():
+    limiter = AdaptiveRateLimiter(requests_per_minute=100, tokens_per_minute=10_000)
+    limiter.on_success(tokens=500)
+    limiter.on_throttle(FakeRateLimitError("429 input token count per minute exceeded"))
+    assert limiter.tokens_per_minute == pytest.approx(500 * limiter.safety)
+    assert limiter.requests_per_minute > 100
+
+
+def test_token_bucket_waits_for_refill(sleeps, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+
+    def sleep(delay):
+        sleeps.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(ratelimit.time, "sleep", sleep)
+    bucket = TokenBucket(rate=60, period=60.0)  # one per second, 60 in the bucket
+    assert bucket.acquire(60) == 0
+    assert bucket.acquire(2) == pytest.approx(2.0)
+
+
+def test_rate_limited_fake_quota_recovers(sleeps):
+    model = FakeModel(latency=0, requests_per_period=2, period=60)
+    wrapped = limited(model, max_retries=1)
+    wrapped.generate_content("a")
+    wrapped.generate_content("b")
+    with pytest.raises(FakeRateLimitError):
+        wrapped.generate_content("c")
+    assert model.rate_limited == 2 and wrapped.limiter.throttled == 1
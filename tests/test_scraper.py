@@ -0,0 +1,106 @@
+import logging
+
+import pytest
+import requests
+
+import scraper
+from scraper import NewsAPIError, fetch_articles_newsapi, fetch_page, iter_articles
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, etag=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Serves NewsAPI-shaped pages; ``fail`` maps page numbers to exceptions."""
+
+    def __init__(self, total=250, fail=None, etag='"v1"'):
+        self.total = total
+        self.fail = fail or {}
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append((params, headers))
+        page, query = params["page"], params["q"]
+        if page in self.fail:
+            error = self.fail[page]
+            if isinstance(error, Exception):
+                raise error
+            return FakeResponse(200, {"status": "error", "message": error})
+        if self.etag and headers.get("If-None-Match") == self.etag:
+            return FakeResponse(304, etag=self.etag)
+        size = params["pageSize"]
+        articles = [
+            {"title": f"{query} {page}-{i}", "description": f"About {query}, item {page}-{i}",
+             "url": f"https://news.example/{query}/{page}/{i}", "publishedAt": "2024-01-01"}
+            for i in range(min(size, max(0, self.total - (page - 1) * size)))
+        ]
+        return FakeResponse(200, {"status": "ok", "totalResults": self.total, "articles": articles}, self.etag)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(scraper, "get_session", lambda: fake)
+    monkeypatch.setattr(scraper, "_cache", scraper.OrderedDict())
+    return fake
+
+
+def test_pages_are_reused_within_ttl_then_revalidated(session, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scraper.time, "time", lambda: now[0])
+    first = fetch_page("climate", ttl=60)
+    assert fetch_page("climate", ttl=60) is first
+    assert len(session.requests) == 1
+
+    now[0] += 61
+    assert fetch_page("climate", ttl=60) == first
+    assert session.requests[-1][1]["If-None-Match"] == '"v1"'  # answered with a 304
+    assert len(session.requests) == 2
+
+
+def test_error_payload_raises(session):
+    session.fail = {1: "apiKeyInvalid"}
+    with pytest.raises(NewsAPIError, match="apiKeyInvalid"):
+        fetch_page("climate")
+
+
+def test_cache_evicts_least_recently_used(session, monkeypatch):
+    monkeypatch.setattr(scraper, "_CACHE_MAX_ENTRIES", 2)
+    fetch_page("hot")
+    fetch_page("b")
+    fetch_page("hot")  # a hit makes "hot" the most recently used
+    fetch_page("c")
+    assert [dict(params)["q"] for _, params in scraper._cache] == ["hot", "c"]
+    calls = len(session.requests)
+    fetch_page("hot")
+    assert len(session.requests) == calls
+
+
+def test_iter_articles_paginates_and_skips_repeats(session):
+    articles = list(iter_articles(["climate", "climate"], max_pages=5, page_size=100))
+    # 250 results are three pages; the repeated query's articles are dropped by URL
+    assert len(articles) == 250
+    assert len({a["link"] for a in articles}) == 250
+
+
+def test_later_page_failures_are_logged_and_skipped(session, caplog):
+    session.fail = {2: "maximumResultsReached", 3: requests.ConnectionError("reset")}
+    with caplog.at_level(logging.WARNING, logger="scraper"):
+        articles = list(iter_articles("climate", max_pages=3, page_size=100))
+    assert len(articles) == 100
+    assert "Skipping page 2" in caplog.text and "Skipping page 3" in caplog.text
+
+
+def test_first_page_failure_is_reported(session):
+    session.fail = {1: requests.ConnectionError("down")}
+    with pytest.raises(requests.ConnectionError):
+        list(iter_articles("climate"))
+    assert fetch_articles_newsapi("climate") == {"error": "down"}
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from conftest import MALFORMED_PATH
+from utils import StreamingAnalysisParser, extract_json, parse_llm_response, validate_analysis
+
+with open(MALFORMED_PATH, encoding="utf-8") as f:
+    CASES = json.load(f)
+
+
+def stream_parse(text, chunk_size):
+    parser = StreamingAnalysisParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    return parser.result()
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_parse_llm_response_matches_corpus(case):
+    parsed = parse_llm_response(case["text"])
+    assert ("error" not in parsed) == (case["expect"] == "ok"), parsed
+    if case["expect"] == "ok":
+        assert {"bias", "emotion", "framing", "omissions", "source"} <= set(parsed)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_streaming_parser_agrees_with_whole_text(case, chunk_size):
+    assert stream_parse(case["text"], chunk_size) == parse_llm_response(case["text"])
+
+
+def test_streaming_parser_reports_fields_as_they_complete():
+    text = '```json\n{"bias": "left", "emotion": "anger", "framing": "loaded"}\n```'
+    parser = StreamingAnalysisParser()
+    seen = {}
+    for ch in text:
+        seen.update(parser.feed(ch))
+    assert seen == {"bias": "left", "emotion": "anger", "framing": "loaded"}
+
+
+def test_extract_json_skips_brace_like_prose():
+    assert extract_json('Use {curly} braces. {"a": 1,}') == {"a": 1}
+    assert extract_json('Result: [{"id": 1}] done', opener="[") == [{"id": 1}]
+
+
+@pytest.mark.parametrize("text", ["", "no json here", '{"a": 1', "{'a': 1}"])
+def test_extract_json_raises_value_error(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+
+
+def test_validate_analysis_canonicalises_fields():
+    result = validate_analysis({"Political Bias": "LEFT", "emotion": ["anger", "fear"], "framing": " loaded "})
+    assert result == {"bias": "left", "emotion": "anger, fear", "framing": "loaded",
+                      "omissions": "None found", "source": "Unknown"}
+
+
+def test_validate_analysis_requires_core_fields():
+    with pytest.raises(ValueError):
+        validate_analysis({"bias": "left", "emotion": "anger"})
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+import vector_index
+from history import HistoryStore
+from vector_index import VectorIndex, related_coverage
+
+DIM = 16
+
+
+def unit_vectors(n, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def small_threshold(monkeypatch):
+    """Switch to IVF search past 50 vectors instead of 50,000."""
+    monkeypatch.setattr(vector_index, "BRUTE_FORCE_MAX", 50)
+
+
+def test_empty_index_returns_nothing(workdir):
+    assert VectorIndex(str(workdir / "index"), dim=DIM).search(unit_vectors(1)[0]) == []
+
+
+def test_add_reopen_and_search_exactly(workdir):
+    path = str(workdir / "index")
+    vectors = unit_vectors(30)
+    index = VectorIndex(path, dim=DIM)
+    index.add(list(range(100, 120)), vectors[:20])
+    index.add(list(range(120, 130)), vectors[20:])
+
+    reopened = VectorIndex(path, dim=DIM)
+    assert reopened.count == 30
+    for i in (0, 19, 29):
+        best_id, score = reopened.search(vectors[i], k=3)[0]
+        assert best_id == 100 + i and score == pytest.approx(1.0, abs=1e-5)
+    ids, stored = reopened.items()
+    assert ids.tolist() == list(range(100, 130))
+    np.testing.assert_allclose(stored, vectors, atol=1e-6)
+
+
+def test_grows_past_initial_capacity(workdir, monkeypatch):
+    monkeypatch.setattr(vector_index, "_INITIAL_CAPACITY", 4)
+    path = str(workdir / "index")
+    vectors = unit_vectors(11)
+    index = VectorIndex(path, dim=DIM)
+    for i, vector in enumerate(vectors):
+        index.add([i], vector)
+    assert VectorIndex(path, dim=DIM).search(vectors[7], k=1)[0][0] == 7
+
+
+def test_stays_exact_up_to_brute_force_max(workdir, small_threshold):
+    index = VectorIndex(str(workdir / "index"), dim=DIM)
+    index.add(list(range(50)), unit_vectors(50))
+    assert index._centroids is None
+
+
+def test_trains_ivf_past_brute_force_max(workdir, small_threshold):
+    path = str(workdir / "index")
+    vectors = unit_vectors(400, seed=1)
+    index = VectorIndex(path, dim=DIM)
+    index.add(list(range(51)), vectors[:51])
+    assert index._centroids is not None and index._trained_count == 51
+    index.add(list(range(51, 400)), vectors[51:])  # more than 4x the trained size: retrains
+    assert index._trained_count == 400
+
+    reopened = VectorIndex(path, dim=DIM)
+    assert reopened._centroids is not None
+    for i in (0, 50, 51, 399):
+        assert reopened.search(vectors[i], k=1)[0][0] == i
+    # Probing every list is exact search
+    query = unit_vectors(1, seed=2)[0]
+    exact = np.argsort(-(vectors @ query))[:5].tolist()
+    assert [i for i, _ in reopened.search(query, k=5, nprobe=len(reopened._centroids))] == exact
+
+
+def test_incremental_adds_after_training_are_searchable(workdir, small_threshold):
+    vectors = unit_vectors(120, seed=3)
+    index = VectorIndex(str(workdir / "index"), dim=DIM)
+    index.add(list(range(60)), vectors[:60])
+    trained = index._trained_count
+    index.add(list(range(60, 120)), vectors[60:])  # below the retrain point
+    assert index._trained_count == trained
+    for i in (60, 119):
+        assert index.search(vectors[i], k=1)[0][0] == i
+
+
+def test_related_coverage_joins_history_records(workdir):
+    history = HistoryStore(str(workdir / "history.db"), legacy_json=None)
+    ids = history.append([{"title": "a"}, {"title": "b"}])
+    vectors = unit_vectors(3, seed=4)
+    index = VectorIndex(str(workdir / "index"), dim=DIM)
+    index.add(ids + [999], vectors)  # 999 has no history row
+
+    related = related_coverage(index, history, vectors[0], k=3, min_similarity=0.99)
+    assert related == [({"title": "a"}, pytest.approx(1.0, abs=1e-5))]
+    assert related_coverage(index, history, vectors[2], min_similarity=0.99) == []